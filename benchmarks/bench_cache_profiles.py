@@ -0,0 +1,141 @@
+"""
+Measure the gateway cache memory of each cache profile.
+
+Usage:
+    python -m benchmarks.bench_cache_profiles [--guilds 200] [--members 1000]
+
+Feeds the same synthetic GUILD_CREATE payloads to a discord.py connection
+state configured by each profile in ``utils.cache_profile`` and reports the
+Python heap it retains (tracemalloc), along with a projection to
+``--project`` guilds.
+
+What a shard receives depends on the profile, and the payloads mirror that:
+- Profiles that chunk at startup receive every member.
+- Others only ever see members who join or are sent with events while the
+  bot runs, modelled as ``--seen`` of each guild.
+- Presences are only sent with the presences intent, for ``--online`` of
+  the members.
+
+The message cache is left out; it is bounded by ``max_messages`` anyway.
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from discord.state import ConnectionState  # noqa: E402
+
+from utils.cache_profile import PROFILES  # noqa: E402
+
+
+def member_payload(user_id: int) -> dict:
+    return {
+        'user': {
+            'id': str(user_id),
+            'username': f'user{user_id % 100000}',
+            'global_name': f'User {user_id % 100000}',
+            'discriminator': '0',
+            'avatar': f'{user_id:032x}',
+        },
+        'roles': [],
+        'joined_at': '2024-01-01T00:00:00+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0,
+    }
+
+
+def presence_payload(user_id: int) -> dict:
+    return {
+        'user': {'id': str(user_id)},
+        'status': 'online',
+        'client_status': {'desktop': 'online'},
+        'activities': [{'name': 'A game', 'type': 0, 'created_at': 0}],
+    }
+
+
+def guild_payload(guild_id: int, members: int, fraction: float, presences: float) -> dict:
+    base = guild_id * 1_000_000
+    included = [base + i for i in range(int(members * fraction))]
+    online = included[:int(members * presences)]
+    return {
+        'id': str(guild_id),
+        'name': f'Guild {guild_id}',
+        'owner_id': str(base),
+        'member_count': members,
+        'large': members > 250,
+        'roles': [{
+            'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+            'color': 0, 'hoist': False, 'managed': False, 'mentionable': False,
+        }],
+        'channels': [],
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'members': [member_payload(user_id) for user_id in included],
+        'presences': [presence_payload(user_id) for user_id in online],
+    }
+
+
+def measure(profile, args) -> dict:
+    options = profile.client_options()
+    intents = options['intents']
+    state = ConnectionState(
+        dispatch=lambda *a, **k: None, handlers={}, hooks={}, http=None,
+        intents=intents,
+        member_cache_flags=options['member_cache_flags'],
+        chunk_guilds_at_startup=options['chunk_guilds_at_startup'],
+        max_messages=options['max_messages'],
+    )
+    if not intents.members:
+        fraction = 0.0
+    elif profile.chunk_guilds_at_startup:
+        fraction = 1.0
+    else:
+        fraction = args.seen
+    online = args.online * fraction if intents.presences else 0.0
+
+    gc.collect()
+    tracemalloc.start()
+    for guild_id in range(1, args.guilds + 1):
+        state._add_guild_from_data(guild_payload(guild_id, args.members, fraction, online))
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    guilds = state.guilds
+    return {
+        'members': sum(len(guild._members) for guild in guilds),
+        'users': len(state._users),
+        'presences': sum(1 for guild in guilds for member in guild.members if member.activities),
+        'bytes': retained,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guilds', type=int, default=200, help='guilds to simulate')
+    parser.add_argument('--members', type=int, default=1000, help='members per guild')
+    parser.add_argument('--seen', type=float, default=0.05, help='fraction of members seen without chunking')
+    parser.add_argument('--online', type=float, default=0.2, help='fraction of members with a presence')
+    parser.add_argument('--project', type=int, default=5000, help='guild count to project memory to')
+    args = parser.parse_args()
+
+    print(f'{args.guilds} guilds x {args.members} members, projected to {args.project} guilds\n')
+    print(f'{"profile":<12} {"members":>9} {"users":>9} {"presences":>9} {"retained":>11} {"per guild":>11} {"projected":>11}')
+    for profile in PROFILES.values():
+        result = measure(profile, args)
+        per_guild = result['bytes'] / args.guilds
+        print(
+            f'{profile.name:<12} {result["members"]:>9,} {result["users"]:>9,} {result["presences"]:>9,} '
+            f'{result["bytes"] / 2**20:>8.1f} MiB {per_guild / 1024:>7.1f} KiB '
+            f'{per_guild * args.project / 2**30:>7.2f} GiB'
+        )
+
+
+if __name__ == '__main__':
+    main()
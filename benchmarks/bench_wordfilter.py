@@ -0,0 +1,85 @@
+"""
+Benchmark the automod word filter against naive per-term matching.
+
+Usage:
+    python -m benchmarks.bench_wordfilter [--terms 5000] [--messages 2000]
+
+Compares, on the same random blocklist and messages:
+- naive: one ``re.search`` per term per message (what a simple loop does)
+- combined: all terms joined into one alternation regex
+- aho-corasick: ``utils.word_filter.WordMatcher``
+"""
+
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.word_filter import WordMatcher, normalize  # noqa: E402
+
+
+def random_word(rng: random.Random, low: int = 4, high: int = 10) -> str:
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def build_messages(rng: random.Random, terms, count: int, hit_rate: float):
+    vocabulary = [random_word(rng, 2, 8) for _ in range(2000)]
+    messages = []
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(5, 30))
+        if rng.random() < hit_rate:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(terms))
+        messages.append(' '.join(words))
+    return messages
+
+
+def timed(label: str, messages, check) -> int:
+    start = time.perf_counter()
+    hits = sum(1 for message in messages if check(message))
+    elapsed = time.perf_counter() - start
+    print(f'{label:<14} {elapsed * 1000:10.1f} ms total {elapsed / len(messages) * 1e6:10.1f} µs/message  {hits} hits')
+    return hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--terms', type=int, default=5000, help='number of blocked terms')
+    parser.add_argument('--messages', type=int, default=2000, help='number of messages to scan')
+    parser.add_argument('--hit-rate', type=float, default=0.05, help='fraction of messages containing a term')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    terms = list({random_word(rng) for _ in range(args.terms)})
+    messages = build_messages(rng, terms, args.messages, args.hit_rate)
+    print(f'{len(terms)} terms, {len(messages)} messages, {sum(map(len, messages)) / len(messages):.0f} chars/message\n')
+
+    start = time.perf_counter()
+    naive_patterns = [re.compile(rf'\b{re.escape(term)}\b') for term in terms]
+    print(f'naive compile         {(time.perf_counter() - start) * 1000:8.1f} ms')
+    start = time.perf_counter()
+    combined = re.compile(r'\b(?:' + '|'.join(map(re.escape, terms)) + r')\b')
+    print(f'combined compile      {(time.perf_counter() - start) * 1000:8.1f} ms')
+    start = time.perf_counter()
+    matcher = WordMatcher(terms)
+    matcher.find('')
+    matcher.find('warm up')
+    print(f'aho-corasick build    {(time.perf_counter() - start) * 1000:8.1f} ms ({matcher.nodes} nodes)\n')
+
+    expected = timed('naive', messages, lambda m: any(p.search(normalize(m)) for p in naive_patterns))
+    assert timed('combined', messages, lambda m: combined.search(normalize(m)) is not None) == expected
+    assert timed('aho-corasick', messages, lambda m: matcher.find(m) is not None) == expected
+
+    start = time.perf_counter()
+    matcher.add([random_word(rng) for _ in range(100)])
+    matcher.find('rebuild')
+    print(f'\nadd 100 terms + relink {(time.perf_counter() - start) * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
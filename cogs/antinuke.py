@@ -1,12 +1,53 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-from typing import Optional
+from collections import deque
+from datetime import timedelta
+from typing import Deque, Dict, Optional, Set, Tuple, Union
+import asyncio
+import io
+import json
 import logging
+import time
+
+from utils.action_tracker import (
+    ActionTracker,
+    BAN,
+    CHANNEL_DELETE,
+    KICK,
+    ROLE_DELETE,
+    WEBHOOK_CREATE,
+)
+from utils.audit_log import AuditLogFetcher
+from utils.mass_action import run_pool
+from utils.raid_gate import RaidGate
+from utils.rollback import RollbackEngine
+from utils.snapshot import DELETION_RETENTION, ChannelSnapshot, RoleSnapshot
+from utils.whitelist import WhitelistIndex
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Tracked action -> audit log action used to attribute it
+AUDIT_ACTIONS = {
+    CHANNEL_DELETE: discord.AuditLogAction.channel_delete,
+    ROLE_DELETE: discord.AuditLogAction.role_delete,
+    BAN: discord.AuditLogAction.ban,
+    KICK: discord.AuditLogAction.kick,
+    WEBHOOK_CREATE: discord.AuditLogAction.webhook_create,
+}
+
+# Suspected raiders are collected for this many seconds and handled in one batch
+RAID_BATCH_DELAY = 2.0
+
+ACTION_LABELS = {
+    CHANNEL_DELETE: "channel deletions",
+    ROLE_DELETE: "role deletions",
+    BAN: "bans",
+    KICK: "kicks",
+    WEBHOOK_CREATE: "webhook creations",
+}
+
 
 class AntiNuke(commands.Cog):
     """Anti-nuke protection cog to prevent server raids and malicious actions.
@@ -25,9 +66,301 @@ class AntiNuke(commands.Cog):
             bot: The bot instance
         """
         self.bot = bot
-        self.action_cooldowns = {}  # Track actions to detect spam
+        config = getattr(bot, "config", {})
+        # Sliding-window counters keyed by (guild, actor, action)
+        self.action_cooldowns = ActionTracker(max_keys=config.get("antinuke_max_tracked", 50000))
+        self.rollback_engine = RollbackEngine(concurrency=config.get("antinuke_rollback_concurrency", 5))
+        # Snapshots of objects deleted recently, keyed by (guild, actor)
+        self._deleted: Dict[Tuple[int, int], Deque[Tuple[float, Union[ChannelSnapshot, RoleSnapshot]]]] = {}
+        self._responding: Set[Tuple[int, int]] = set()
+        # Recent member removals per guild; most are voluntary leaves, so the audit log is only
+        # read once enough of them land within the kick window to possibly be a mass kick
+        self._removals: Dict[int, Deque[float]] = {}
+        self.audit_log = AuditLogFetcher()
+        self.whitelist = WhitelistIndex()
+        raid = config.get("raid_mode", {})
+        self.raid_gate = RaidGate(
+            window=raid.get("window", 120),
+            burst_joins=raid.get("burst_joins", 10),
+            burst_seconds=raid.get("burst_seconds", 10),
+            threshold=raid.get("threshold", 0.6),
+            raid_cooldown=raid.get("cooldown", 300),
+            weights=raid.get("weights")
+        )
+        # "quarantine" gives suspects the guild's mute role, falling back to a kick without one
+        self.raid_action = raid.get("action", "quarantine")
+        self._raid_batches: Dict[int, asyncio.Task] = {}
         logger.info("AntiNuke cog initialized")
 
+    async def cog_load(self):
+        """Load per-guild thresholds and the whitelist, then start the idle eviction timer."""
+        db_pool = getattr(self.bot, "db_pool", None)
+        try:
+            await self.whitelist.load(db_pool)
+        except Exception as e:
+            logger.error(f"Failed to load anti-nuke whitelist: {e}")
+        if db_pool:
+            try:
+                rows = await db_pool.fetch(
+                    "SELECT guild_id, action, max_actions, window_seconds FROM antinuke_thresholds"
+                )
+                self.action_cooldowns.load_overrides(rows)
+                logger.info(f"Loaded {len(rows)} anti-nuke threshold override(s)")
+            except Exception as e:
+                logger.error(f"Failed to load anti-nuke thresholds: {e}")
+        self.evict_idle_actions.start()
+
+    async def cog_unload(self):
+        """Stop background tasks."""
+        self.evict_idle_actions.cancel()
+        await self.audit_log.close()
+
+    @tasks.loop(seconds=60)
+    async def evict_idle_actions(self):
+        """Drop action counters and deletion snapshots that are no longer needed."""
+        evicted = self.action_cooldowns.evict_idle()
+        if evicted:
+            logger.debug(f"Evicted {evicted} idle anti-nuke counter(s)")
+        self.raid_gate.evict_idle()
+        self.audit_log.evict_idle()
+        
+        cutoff = time.monotonic() - DELETION_RETENTION
+        for key in [key for key, entries in self._deleted.items() if entries[-1][0] < cutoff]:
+            if key not in self._responding:
+                del self._deleted[key]
+        now = time.monotonic()
+        for guild_id in [
+            guild_id for guild_id, removals in self._removals.items()
+            if now - removals[-1] > self.action_cooldowns.threshold(guild_id, KICK)[1]
+        ]:
+            del self._removals[guild_id]
+
+    def _is_exempt(self, guild: discord.Guild, actor: Optional[discord.abc.User]) -> bool:
+        """Return whether an actor is never subject to anti-nuke enforcement."""
+        return (
+            actor is None
+            or actor.id in (guild.owner_id, self.bot.user.id)
+            or self.whitelist.contains(guild.id, actor.id)
+        )
+
+    def _remember(self, guild: discord.Guild, actor: discord.abc.User, snapshot: Union[ChannelSnapshot, RoleSnapshot]):
+        """Keep a snapshot of a deleted object so it can be restored if the actor turns out to be nuking."""
+        key = (guild.id, actor.id)
+        entries = self._deleted.get(key)
+        if entries is None:
+            entries = self._deleted[key] = deque(maxlen=500)
+        entries.append((time.monotonic(), snapshot))
+
+    async def _attribute(self, guild: discord.Guild, action: str, target_id: int) -> Optional[discord.AuditLogEntry]:
+        """Find the audit log entry for an action if anti-nuke is enabled in the guild.
+        
+        Args:
+            guild: The guild the action happened in
+            action: The tracked action type
+            target_id: The id of the affected object
+            
+        Returns:
+            The audit log entry, or None if protection is off or no entry was found
+        """
+        if not self.bot.guild_config.get(guild.id).antinuke_enabled:
+            return None
+        return await self.audit_log.resolve(guild, AUDIT_ACTIONS[action], target_id)
+
+    async def _track(self, guild: discord.Guild, action: str, actor: Optional[discord.abc.User]):
+        """Count an action against its actor and respond once the threshold is crossed.
+        
+        Args:
+            guild: The guild the action happened in
+            action: The tracked action type
+            actor: The user who performed the action
+        """
+        if self._is_exempt(guild, actor):
+            return
+        if self.action_cooldowns.record(guild.id, actor.id, action):
+            self.action_cooldowns.reset(guild.id, actor.id, action)
+            await self._on_threshold(guild, actor, action)
+
+    async def _on_threshold(self, guild: discord.Guild, actor: discord.abc.User, action: str):
+        """Alert the log channel, ban the actor and roll back their deletions.
+        
+        Args:
+            guild: The affected guild
+            actor: The offending user
+            action: The tracked action type
+        """
+        if (guild.id, actor.id) in self._responding:
+            # Already being rolled back; the running rollback picks up the new deletions
+            return
+        limit, window = self.action_cooldowns.threshold(guild.id, action)
+        label = ACTION_LABELS[action]
+        logger.warning(f"Mass {label} by {actor} ({actor.id}) in {guild.name}: {limit} within {window:g}s")
+        
+        log_channel = self.bot.channel_index.resolve(guild, "anti-nuke-logs")
+        if log_channel:
+            embed = discord.Embed(
+                title=f"🚨 Mass {label.title()} Detected",
+                description=f"{actor.mention} performed **{limit}** {label} within **{window:g}s**.",
+                color=discord.Color.dark_red(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed.add_field(name="Actor ID", value=str(actor.id))
+            await log_channel.send(embed=embed)
+        
+        await self._rollback(guild, actor)
+
+    async def _rollback(self, guild: discord.Guild, actor: discord.abc.User):
+        """Ban the actor and restore everything they deleted recently.
+        
+        Deletions that land while a rollback is running are picked up by
+        another pass once the current one finishes.
+        
+        Args:
+            guild: The affected guild
+            actor: The user responsible for the nuke
+        """
+        key = (guild.id, actor.id)
+        if key in self._responding:
+            return
+        self._responding.add(key)
+        
+        # Shared by every pass, so a later pass can point channels at roles and categories restored earlier
+        role_map: Dict[int, discord.Role] = {}
+        category_map: Dict[int, discord.CategoryChannel] = {}
+        first_pass = True
+        actor_banned = False
+        roles_restored = channels_restored = failures = 0
+        elapsed = 0.0
+        try:
+            while True:
+                entries = self._deleted.pop(key, ())
+                roles = [snapshot for _, snapshot in entries if isinstance(snapshot, RoleSnapshot)]
+                channels = [snapshot for _, snapshot in entries if isinstance(snapshot, ChannelSnapshot)]
+                if not first_pass and not roles and not channels:
+                    break
+                
+                result = await self.rollback_engine.rollback(
+                    guild,
+                    actor if first_pass else None,
+                    roles=roles,
+                    channels=channels,
+                    reason=f"Anti-nuke: rolling back actions by {actor} ({actor.id})",
+                    role_map=role_map,
+                    category_map=category_map
+                )
+                if first_pass:
+                    actor_banned = result.actor_banned
+                    first_pass = False
+                roles_restored += result.roles_restored
+                channels_restored += result.channels_restored
+                failures += result.failures
+                elapsed += result.elapsed
+        except Exception as e:
+            logger.error(f"Error during anti-nuke rollback in {guild.name}: {e}")
+        finally:
+            self._responding.discard(key)
+        
+        log_channel = self.bot.channel_index.resolve(guild, "anti-nuke-logs")
+        if log_channel:
+            embed = discord.Embed(
+                title="🔁 Anti-Nuke Rollback",
+                description=f"Responded to {actor.mention} (`{actor.id}`).",
+                color=discord.Color.blurple(),
+                timestamp=discord.utils.utcnow()
+            )
+            embed.add_field(name="Actor banned", value="Yes" if actor_banned else "No")
+            embed.add_field(name="Roles restored", value=str(roles_restored))
+            embed.add_field(name="Channels restored", value=str(channels_restored))
+            embed.add_field(name="Failures", value=str(failures))
+            embed.set_footer(text=f"Completed in {elapsed:.1f}s")
+            await log_channel.send(embed=embed)
+
+    async def _handle_raiders(self, guild: discord.Guild, delay: float = RAID_BATCH_DELAY):
+        """Score the recent joiners of a guild in raid mode and act on the suspects in one batch.
+        
+        Args:
+            guild: The guild being raided
+            delay: Seconds to wait so joins arriving together share one batch
+        """
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._raid_batches.pop(guild.id, None)
+        
+        suspects = [
+            member for member in map(guild.get_member, self.raid_gate.suspects(guild.id))
+            if member is not None and not self._is_exempt(guild, member)
+        ]
+        if not suspects:
+            return
+        
+        config = self.bot.guild_config.get(guild.id)
+        mute_role = guild.get_role(config.mute_role) if config.mute_role else None
+        reason = "Anti-nuke: suspected raid account"
+        if self.raid_action == "quarantine" and mute_role and mute_role < guild.me.top_role:
+            verb = "Quarantined"
+            action = lambda member: member.add_roles(mute_role, reason=reason)
+        else:
+            verb = "Kicked"
+            action = lambda member: member.kick(reason=reason)
+        
+        succeeded, failed = await run_pool(suspects, action)
+        logger.warning(f"Raid mode in {guild.name}: {verb.lower()} {len(succeeded)} suspect(s), {len(failed)} failed")
+        
+        log_channel = self.bot.channel_index.resolve(guild, "anti-nuke-logs")
+        if log_channel:
+            embed = discord.Embed(
+                title="🚨 Raid Mode",
+                description=f"{verb} **{len(succeeded)}** suspected raid account(s).",
+                color=discord.Color.dark_red(),
+                timestamp=discord.utils.utcnow()
+            )
+            if failed:
+                embed.add_field(name="Failed", value=str(len(failed)))
+            mentions = " ".join(member.mention for member in succeeded[:40])
+            if mentions:
+                embed.add_field(name="Accounts", value=mentions[:1024], inline=False)
+            await log_channel.send(embed=embed)
+
+    def _queue_raid_batch(self, guild: discord.Guild, delay: float = RAID_BATCH_DELAY):
+        """Start a raid batch for the guild unless one is already waiting."""
+        if guild.id not in self._raid_batches:
+            self._raid_batches[guild.id] = asyncio.create_task(self._handle_raiders(guild, delay))
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        """Drop cached audit log entries for a guild the bot has left."""
+        self.audit_log.forget_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        """Feed joins to the raid gate and handle suspects while a raid is under way.
+        
+        Args:
+            member: The member who joined
+        """
+        guild = member.guild
+        try:
+            if member.bot or not self.bot.guild_config.get(guild.id).antinuke_enabled:
+                return
+            if self.raid_gate.record(member):
+                logger.warning(f"Join burst detected in {guild.name}, raid mode enabled")
+                log_channel = self.bot.channel_index.resolve(guild, "anti-nuke-logs")
+                if log_channel:
+                    embed = discord.Embed(
+                        title="🚨 Raid Mode Enabled",
+                        description=(
+                            f"**{self.raid_gate.burst_joins}** or more joins within "
+                            f"**{self.raid_gate.burst_seconds:g}s**. Suspicious joiners will be handled automatically."
+                        ),
+                        color=discord.Color.dark_red(),
+                        timestamp=discord.utils.utcnow()
+                    )
+                    await log_channel.send(embed=embed)
+            if self.raid_gate.is_raid(guild.id):
+                self._queue_raid_batch(guild)
+        except Exception as e:
+            logger.error(f"Error in on_member_join: {e}")
+
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
         """Monitor channel deletions to detect potential raids.
@@ -35,36 +368,130 @@ class AntiNuke(commands.Cog):
         Args:
             channel: The deleted channel
         """
+        guild = channel.guild
         try:
-            guild = channel.guild
+            # Find who deleted the channel; concurrent deletions share one audit log fetch
+            entry = await self._attribute(guild, CHANNEL_DELETE, channel.id)
+            if entry is None:
+                return
+            deleter = entry.user
+            if not self._is_exempt(guild, deleter):
+                snapshot = self.bot.snapshots.deleted_snapshot(guild.id, channel.id)
+                self._remember(guild, deleter, snapshot or ChannelSnapshot.from_channel(channel))
             
-            # Fetch the audit log to see who deleted the channel
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.channel_delete):
-                if entry.target.id == channel.id:
-                    deleter = entry.user
-                    
-                    # Log the deletion
-                    logger.warning(f"Channel {channel.name} deleted by {deleter} in {guild.name}")
-                    
-                    # Send alert to a designated log channel (if configured)
-                    # This is a placeholder - would need proper configuration
-                    log_channel = discord.utils.get(guild.text_channels, name="anti-nuke-logs")
-                    if log_channel:
-                        embed = discord.Embed(
-                            title="⚠️ Channel Deleted",
-                            description=f"**Channel:** {channel.name}\n**Deleted by:** {deleter.mention}",
-                            color=discord.Color.red(),
-                            timestamp=discord.utils.utcnow()
-                        )
-                        await log_channel.send(embed=embed)
-                    break
+            # Count the deletion first so a nuke is answered before any alerts go out
+            await self._track(guild, CHANNEL_DELETE, deleter)
+            
+            # Log the deletion
+            logger.warning(f"Channel {channel.name} deleted by {deleter} in {guild.name}")
+            
+            # Send alert to the configured log channel
+            log_channel = self.bot.channel_index.resolve(guild, "anti-nuke-logs")
+            if log_channel:
+                embed = discord.Embed(
+                    title="⚠️ Channel Deleted",
+                    description=f"**Channel:** {channel.name}\n**Deleted by:** {deleter.mention}",
+                    color=discord.Color.red(),
+                    timestamp=discord.utils.utcnow()
+                )
+                await log_channel.send(embed=embed)
                     
         except discord.Forbidden:
             logger.error(f"Missing permissions to check audit logs in {guild.name}")
         except Exception as e:
             logger.error(f"Error in on_guild_channel_delete: {e}")
 
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Monitor role deletions to detect mass role wipes.
+        
+        Args:
+            role: The deleted role
+        """
+        guild = role.guild
+        try:
+            entry = await self._attribute(guild, ROLE_DELETE, role.id)
+            if entry:
+                if not self._is_exempt(guild, entry.user):
+                    snapshot = self.bot.snapshots.deleted_snapshot(guild.id, role.id)
+                    self._remember(guild, entry.user, snapshot or RoleSnapshot.from_role(role))
+                await self._track(guild, ROLE_DELETE, entry.user)
+        except discord.Forbidden:
+            logger.error(f"Missing permissions to check audit logs in {guild.name}")
+        except Exception as e:
+            logger.error(f"Error in on_guild_role_delete: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_ban(self, guild: discord.Guild, user: discord.abc.User):
+        """Monitor bans to detect mass bans.
+        
+        Args:
+            guild: The guild the ban happened in
+            user: The banned user
+        """
+        try:
+            entry = await self._attribute(guild, BAN, user.id)
+            if entry:
+                await self._track(guild, BAN, entry.user)
+        except discord.Forbidden:
+            logger.error(f"Missing permissions to check audit logs in {guild.name}")
+        except Exception as e:
+            logger.error(f"Error in on_member_ban: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        """Monitor member removals to detect mass kicks.
+        
+        Args:
+            member: The member who left or was kicked
+        """
+        guild = member.guild
+        if not self.bot.guild_config.get(guild.id).antinuke_enabled:
+            return
+        
+        # A mass kick needs at least `limit` removals within the window, so until then nothing
+        # can cross the threshold and there is no reason to read the audit log
+        limit, window = self.action_cooldowns.threshold(guild.id, KICK)
+        now = time.monotonic()
+        removals = self._removals.get(guild.id)
+        if removals is None or removals.maxlen != limit:
+            removals = self._removals[guild.id] = deque(removals or (), maxlen=limit)
+        removals.append(now)
+        if len(removals) < limit or now - removals[0] > window:
+            return
+        
+        try:
+            # One fetch attributes every kick of the burst, including the ones before the gate opened
+            since = discord.utils.utcnow() - timedelta(seconds=window)
+            for entry in await self.audit_log.pull(guild, AUDIT_ACTIONS[KICK]):
+                if entry.created_at >= since:
+                    await self._track(guild, KICK, entry.user)
+        except discord.Forbidden:
+            logger.error(f"Missing permissions to check audit logs in {guild.name}")
+        except Exception as e:
+            logger.error(f"Error in on_member_remove: {e}")
+
+    @commands.Cog.listener()
+    async def on_webhooks_update(self, channel: discord.abc.GuildChannel):
+        """Monitor webhook creation to detect webhook spam.
+        
+        Args:
+            channel: The channel whose webhooks changed
+        """
+        guild = channel.guild
+        try:
+            if not self.bot.guild_config.get(guild.id).antinuke_enabled:
+                return
+            # The event does not say which webhook changed, so read new creations
+            for entry in await self.audit_log.pull(guild, AUDIT_ACTIONS[WEBHOOK_CREATE]):
+                await self._track(guild, WEBHOOK_CREATE, entry.user)
+        except discord.Forbidden:
+            logger.error(f"Missing permissions to check audit logs in {guild.name}")
+        except Exception as e:
+            logger.error(f"Error in on_webhooks_update: {e}")
+
     @app_commands.command(name="antinuke", description="Configure anti-nuke protection settings")
+    @app_commands.guild_only()
     @app_commands.checks.has_permissions(administrator=True)
     async def antinuke_config(self, interaction: discord.Interaction, enabled: bool):
         """Configure anti-nuke protection for the server.
@@ -74,8 +501,7 @@ class AntiNuke(commands.Cog):
             enabled: Whether to enable or disable anti-nuke protection
         """
         try:
-            # This would typically save to a database
-            # For demonstration purposes, we'll just send a confirmation
+            await self.bot.guild_config.update(interaction.guild.id, antinuke_enabled=enabled)
             
             status = "enabled" if enabled else "disabled"
             embed = discord.Embed(
@@ -117,6 +543,171 @@ class AntiNuke(commands.Cog):
             )
 
 
+    @commands.command(name="snapshot", hidden=True)
+    @commands.is_owner()
+    async def snapshot_export(self, ctx: commands.Context, guild_id: Optional[int] = None):
+        """Export the stored structure snapshot of a guild as JSON (Owner only).
+        
+        Args:
+            ctx: The command context
+            guild_id: The guild to export, defaults to the current guild
+        """
+        guild_id = guild_id or (ctx.guild.id if ctx.guild else None)
+        export = self.bot.snapshots.export(guild_id) if guild_id else None
+        if export is None:
+            await ctx.send("❌ No snapshot is stored for that guild.")
+            return
+        
+        stats = self.bot.snapshots.stats()
+        data = json.dumps(export, indent=2).encode("utf-8")
+        await ctx.send(
+            f"📦 {len(export['roles'])} role(s), {len(export['channels'])} channel(s). "
+            f"Store: {stats['guilds']} guild(s), ~{stats['memory_bytes'] / 1024:.0f} KiB in memory, "
+            f"{stats['writes']} write(s) / {stats['bytes_written'] / 1024:.0f} KiB persisted.",
+            file=discord.File(io.BytesIO(data), filename=f"snapshot-{guild_id}.json")
+        )
+
+    whitelist_group = app_commands.Group(
+        name="whitelist",
+        description="Manage users exempt from anti-nuke protection",
+        guild_only=True,
+        default_permissions=discord.Permissions(administrator=True)
+    )
+
+    @whitelist_group.command(name="add", description="Exempt a user from anti-nuke protection")
+    @app_commands.describe(user="The user to whitelist")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def whitelist_add(self, interaction: discord.Interaction, user: discord.User):
+        """Add a user to the anti-nuke whitelist.
+        
+        Args:
+            interaction: The interaction object
+            user: The user to whitelist
+        """
+        try:
+            added = await self.whitelist.add(interaction.guild.id, user.id, interaction.user.id)
+            if added:
+                await interaction.response.send_message(f"✅ {user.mention} is now whitelisted.", ephemeral=True)
+                logger.info(f"{user} whitelisted in {interaction.guild.name} by {interaction.user}")
+            else:
+                await interaction.response.send_message(f"{user.mention} is already whitelisted.", ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in whitelist add command: {e}")
+            await interaction.response.send_message("An error occurred while updating the whitelist.", ephemeral=True)
+
+    @whitelist_group.command(name="remove", description="Remove a user's anti-nuke exemption")
+    @app_commands.describe(user="The user to remove from the whitelist")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def whitelist_remove(self, interaction: discord.Interaction, user: discord.User):
+        """Remove a user from the anti-nuke whitelist.
+        
+        Args:
+            interaction: The interaction object
+            user: The user to remove
+        """
+        try:
+            removed = await self.whitelist.remove(interaction.guild.id, user.id)
+            if removed:
+                await interaction.response.send_message(f"✅ {user.mention} is no longer whitelisted.", ephemeral=True)
+                logger.info(f"{user} removed from whitelist in {interaction.guild.name} by {interaction.user}")
+            else:
+                await interaction.response.send_message(f"{user.mention} is not whitelisted.", ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in whitelist remove command: {e}")
+            await interaction.response.send_message("An error occurred while updating the whitelist.", ephemeral=True)
+
+    @whitelist_group.command(name="list", description="Show users exempt from anti-nuke protection")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def whitelist_list(self, interaction: discord.Interaction):
+        """List whitelisted users.
+        
+        Args:
+            interaction: The interaction object
+        """
+        user_ids = sorted(self.whitelist.members(interaction.guild.id))
+        embed = discord.Embed(
+            title="🛡️ Anti-Nuke Whitelist",
+            description="\n".join(f"<@{user_id}> (`{user_id}`)" for user_id in user_ids)[:4096] or "No users are whitelisted.",
+            color=discord.Color.blurple()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="antinuke-threshold", description="Set how many actions trigger anti-nuke protection")
+    @app_commands.describe(
+        action="The action to limit",
+        limit="Number of actions allowed within the window",
+        window="Window length in seconds"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name=label.capitalize(), value=action)
+        for action, label in ACTION_LABELS.items()
+    ])
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(administrator=True)
+    async def antinuke_threshold(
+        self,
+        interaction: discord.Interaction,
+        action: app_commands.Choice[str],
+        limit: app_commands.Range[int, 1, 100],
+        window: app_commands.Range[int, 1, 3600]
+    ):
+        """Configure the anti-nuke threshold for one action type.
+        
+        Args:
+            interaction: The interaction object
+            action: The action type to configure
+            limit: Number of actions allowed within the window
+            window: Window length in seconds
+        """
+        try:
+            db_pool = getattr(self.bot, "db_pool", None)
+            if db_pool:
+                await db_pool.execute(
+                    """
+                    INSERT INTO antinuke_thresholds (guild_id, action, max_actions, window_seconds)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (guild_id, action)
+                    DO UPDATE SET max_actions = EXCLUDED.max_actions, window_seconds = EXCLUDED.window_seconds
+                    """,
+                    interaction.guild.id, action.value, limit, window
+                )
+            self.action_cooldowns.set_threshold(interaction.guild.id, action.value, limit, window)
+            
+            await interaction.response.send_message(
+                f"🛡️ Anti-nuke will trigger on **{limit}** {ACTION_LABELS[action.value]} within **{window}s**.",
+                ephemeral=True
+            )
+            logger.info(f"Anti-nuke threshold for {action.value} set to {limit}/{window}s in {interaction.guild.name}")
+        except Exception as e:
+            logger.error(f"Error in antinuke_threshold command: {e}")
+            await interaction.response.send_message(
+                "An error occurred while updating the threshold.",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="raidmode", description="Turn raid mode on or off")
+    @app_commands.describe(enabled="Whether suspicious joiners should be handled automatically")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(administrator=True)
+    async def raidmode(self, interaction: discord.Interaction, enabled: bool):
+        """Force raid mode on, scoring recent joiners right away, or end it.
+        
+        Args:
+            interaction: The interaction object
+            enabled: Whether raid mode should be on
+        """
+        guild = interaction.guild
+        if enabled:
+            self.raid_gate.start_raid(guild.id)
+            self._queue_raid_batch(guild, delay=0)
+            message = "🚨 Raid mode is **on**. Recent and new joiners will be scored and handled."
+        else:
+            self.raid_gate.end_raid(guild.id)
+            message = "✅ Raid mode is **off**."
+        await interaction.response.send_message(message, ephemeral=True)
+        logger.info(f"Raid mode {'enabled' if enabled else 'disabled'} in {guild.name} by {interaction.user}")
+
+
 async def setup(bot: commands.Bot):
     """Load the AntiNuke cog.
     
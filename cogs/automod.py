@@ -0,0 +1,414 @@
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+from collections import Counter
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import re
+import time
+
+from utils.cache import LRUCache
+from utils.log_sink import LogSink
+from utils.mass_action import run_pool
+from utils.metrics import LatencyStats
+from utils.near_duplicate import NearDuplicateIndex
+from utils.rate_limit import RateLimiter
+from utils.word_filter import BlocklistCache
+
+logger = logging.getLogger(__name__)
+
+INVITE_PATTERN = re.compile(r"(?:discord(?:app)?\.com/invite|discord\.gg)/[\w-]+", re.IGNORECASE)
+LINK_PATTERN = re.compile(r"https?://\S+", re.IGNORECASE)
+MAX_TERM_LENGTH = 100
+
+# What each rule does to the offending message and its author
+DELETE = "delete"
+TIMEOUT = "timeout"
+RULE_ACTIONS = {
+    "spam": (DELETE, TIMEOUT),
+    "duplicate": (DELETE, TIMEOUT),
+    "mentions": (DELETE, TIMEOUT),
+    "blocklist": (DELETE,),
+    "near_duplicate": (DELETE, TIMEOUT),
+    "pattern": (DELETE,),
+    "invite": (DELETE,),
+    "link": (DELETE,),
+}
+
+RULE_LABELS = {
+    "spam": "Message spam",
+    "flood": "Channel flood",
+    "duplicate": "Repeated messages",
+    "mentions": "Mass mentions",
+    "blocklist": "Blocked word",
+    "near_duplicate": "Copy-pasted spam",
+    "pattern": "Blocked pattern",
+    "invite": "Invite link",
+    "link": "Link",
+}
+
+# A check returns True when the message breaks its rule
+Check = Callable[[discord.Message, float], bool]
+
+
+class AutoMod(commands.Cog):
+    """Automatic moderation of incoming messages.
+
+    Every message goes through one pipeline of checks, cheapest first:
+    - Per-user and per-channel rate limits (token buckets)
+    - Repeated identical messages
+    - Mass mentions
+    - The guild's blocked words (one Aho-Corasick pass per message)
+    - Configured regex patterns, invites and links
+    - Near-duplicates of recent messages from other users (MinHash + LSH)
+
+    The first failed check decides the action. A flooded channel is put in
+    slowmode without stopping the pipeline. Deletions, timeouts and
+    slowmode changes are queued and applied in batches once per second so
+    the message handler itself never waits on the API.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        config = getattr(bot, "config", {}).get("automod", {})
+        self.user_limiter = RateLimiter(config.get("user_messages", 5), config.get("user_seconds", 4.0))
+        self.channel_limiter = RateLimiter(config.get("channel_messages", 30), config.get("channel_seconds", 5.0))
+        self.duplicate_limit = config.get("duplicate_limit", 3)
+        self.duplicate_window = config.get("duplicate_seconds", 30.0)
+        self.mention_limit = config.get("mention_limit", 6)
+        self.timeout = timedelta(seconds=config.get("timeout_seconds", 300))
+        self.slowmode_delay = config.get("slowmode_seconds", 5)
+        self.block_invites = config.get("block_invites", True)
+        self.block_links = config.get("block_links", False)
+        patterns = config.get("patterns", [])
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE) if patterns else None
+
+        self.blocklist = BlocklistCache(
+            maxsize=config.get("blocklist_cache_size", 1000),
+            max_terms=config.get("blocklist_max_terms", 5000)
+        )
+
+        self.near_duplicates = None
+        if config.get("near_duplicate", True):
+            self.near_duplicates = NearDuplicateIndex(
+                threshold=config.get("near_duplicate_threshold", 0.7),
+                min_users=config.get("near_duplicate_users", 3),
+                min_length=config.get("near_duplicate_min_length", 20),
+                ttl=config.get("near_duplicate_seconds", 300.0),
+                max_entries=config.get("near_duplicate_max_messages", 2000),
+                max_guilds=config.get("near_duplicate_max_guilds", 1000)
+            )
+
+        # (guild, user) -> (content hash, repeat count, first seen)
+        self._last_message = LRUCache(config.get("max_tracked_users", 50000))
+        self.stages: List[Tuple[str, Check]] = self._build_stages()
+
+        self._deletes: Dict[int, List[discord.Message]] = {}
+        self._timeouts: Dict[Tuple[int, int], Tuple[discord.Member, str]] = {}
+        self._slowmode: Dict[int, discord.TextChannel] = {}
+        self.sink = LogSink()
+
+        self.latency = LatencyStats()
+        self.hits: Counter = Counter()
+        logger.info("AutoMod cog initialized")
+
+    def _build_stages(self) -> List[Tuple[str, Check]]:
+        """Return the checks in the order they run; cheap ones come first."""
+        stages: List[Tuple[str, Check]] = [
+            ("spam", self._check_spam),
+            ("flood", self._check_flood),
+            ("duplicate", self._check_duplicate),
+            ("mentions", self._check_mentions),
+            ("blocklist", self._check_blocklist),
+        ]
+        if self.pattern is not None:
+            stages.append(("pattern", self._check_pattern))
+        if self.block_invites:
+            stages.append(("invite", self._check_invite))
+        if self.block_links:
+            stages.append(("link", self._check_link))
+        if self.near_duplicates is not None:
+            stages.append(("near_duplicate", self._check_near_duplicate))
+        return stages
+
+    async def cog_load(self):
+        self.blocklist.start(getattr(self.bot, "db_pool", None))
+        self.flush_actions.start()
+
+    async def cog_unload(self):
+        self.flush_actions.cancel()
+        await self._flush()
+        await self.sink.close()
+        await self.blocklist.close()
+
+    # ==================== CHECKS ====================
+    def _check_spam(self, message: discord.Message, now: float) -> bool:
+        return not self.user_limiter.hit((message.guild.id, message.author.id), now)
+
+    def _check_flood(self, message: discord.Message, now: float) -> bool:
+        # A busy channel is not the author's fault, so only slow the channel down
+        if not self.channel_limiter.hit(message.channel.id, now):
+            if message.channel.id not in self._slowmode:
+                self.hits["flood"] += 1
+                self._slowmode[message.channel.id] = message.channel
+        return False
+
+    def _check_duplicate(self, message: discord.Message, now: float) -> bool:
+        if not message.content:
+            return False
+        key = (message.guild.id, message.author.id)
+        digest = hash(message.content.casefold())
+        last = self._last_message.get(key)
+        if last is not None and last[0] == digest and now - last[2] <= self.duplicate_window:
+            count = last[1] + 1
+            self._last_message.set(key, (digest, count, last[2]))
+            return count >= self.duplicate_limit
+        self._last_message.set(key, (digest, 1, now))
+        return False
+
+    def _check_mentions(self, message: discord.Message, now: float) -> bool:
+        return len(message.raw_mentions) + len(message.raw_role_mentions) >= self.mention_limit
+
+    def _check_blocklist(self, message: discord.Message, now: float) -> bool:
+        if not message.content:
+            return False
+        matcher = self.blocklist.get(message.guild.id)
+        return bool(matcher) and matcher.find(message.content) is not None
+
+    def _check_pattern(self, message: discord.Message, now: float) -> bool:
+        return self.pattern.search(message.content) is not None
+
+    def _check_invite(self, message: discord.Message, now: float) -> bool:
+        return "discord" in message.content and INVITE_PATTERN.search(message.content) is not None
+
+    def _check_link(self, message: discord.Message, now: float) -> bool:
+        return "http" in message.content and LINK_PATTERN.search(message.content) is not None
+
+    def _check_near_duplicate(self, message: discord.Message, now: float) -> bool:
+        if not message.content:
+            return False
+        cluster = self.near_duplicates.check(
+            message.guild.id, message.author.id, message.channel.id, message.id, message.content, now
+        )
+        if not cluster:
+            return False
+        # The earlier copies already passed the pipeline, so queue them here
+        for entry in cluster:
+            if entry.message_id == message.id:
+                continue
+            channel = message.guild.get_channel_or_thread(entry.channel_id)
+            if channel is not None:
+                self._deletes.setdefault(channel.id, []).append(channel.get_partial_message(entry.message_id))
+            member = message.guild.get_member(entry.user_id)
+            if member is not None:
+                self._timeouts.setdefault((message.guild.id, member.id), (member, "near_duplicate"))
+        return True
+
+    def inspect(self, message: discord.Message, now: Optional[float] = None) -> Optional[str]:
+        """Run the pipeline and return the first rule the message breaks, if any."""
+        now = time.monotonic() if now is None else now
+        for rule, check in self.stages:
+            if check(message, now):
+                return rule
+        return None
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Check every guild message and queue the action for any broken rule."""
+        if message.guild is None or message.author.bot or not isinstance(message.author, discord.Member):
+            return
+        if not self.bot.guild_config.get(message.guild.id).automod_enabled:
+            return
+        if message.author.guild_permissions.manage_messages:
+            return
+
+        start = time.perf_counter_ns()
+        rule = self.inspect(message)
+        self.latency.observe(time.perf_counter_ns() - start)
+        if rule is not None:
+            self.hits[rule] += 1
+            self._queue(message, rule)
+
+    # ==================== ACTIONS ====================
+    def _queue(self, message: discord.Message, rule: str):
+        """Queue the actions of a rule for the next batch."""
+        actions = RULE_ACTIONS[rule]
+        if DELETE in actions:
+            self._deletes.setdefault(message.channel.id, []).append(message)
+        if TIMEOUT in actions:
+            self._timeouts.setdefault((message.guild.id, message.author.id), (message.author, rule))
+
+    @tasks.loop(seconds=1.0)
+    async def flush_actions(self):
+        """Apply queued actions."""
+        try:
+            await self._flush()
+        except Exception as e:
+            logger.error(f"Error applying automod actions: {e}")
+
+    async def _flush(self):
+        deletes, self._deletes = self._deletes, {}
+        timeouts, self._timeouts = self._timeouts, {}
+        slowmode, self._slowmode = self._slowmode, {}
+
+        for messages in deletes.values():
+            channel = messages[0].channel
+            for i in range(0, len(messages), 100):
+                try:
+                    await channel.delete_messages(messages[i:i + 100], reason="AutoMod")
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException as e:
+                    logger.warning(f"AutoMod failed to delete messages in {channel}: {e}")
+
+        for channel in slowmode.values():
+            if getattr(channel, "slowmode_delay", self.slowmode_delay) < self.slowmode_delay:
+                try:
+                    await channel.edit(slowmode_delay=self.slowmode_delay, reason="AutoMod: channel flood")
+                    self._log(channel.guild, f"Enabled {self.slowmode_delay}s slowmode in {channel.mention}", "flood")
+                except discord.HTTPException as e:
+                    logger.warning(f"AutoMod failed to set slowmode in {channel}: {e}")
+
+        if timeouts:
+            async def apply_timeout(entry: Tuple[discord.Member, str]):
+                member, rule = entry
+                await member.timeout(self.timeout, reason=f"AutoMod: {RULE_LABELS[rule]}")
+
+            succeeded, failed = await run_pool(list(timeouts.values()), apply_timeout)
+            for member, rule in succeeded:
+                self._log(member.guild, f"Timed out {member.mention} for **{RULE_LABELS[rule].lower()}**", rule)
+            for (member, _), e in failed:
+                logger.warning(f"AutoMod failed to time out {member}: {e}")
+
+    def _log(self, guild: discord.Guild, description: str, rule: str):
+        log_channel = self.bot.channel_index.resolve(guild, "mod-logs")
+        if log_channel:
+            embed = discord.Embed(
+                title="🤖 AutoMod",
+                description=description,
+                color=discord.Color.orange(),
+                timestamp=discord.utils.utcnow()
+            )
+            self.sink.push(log_channel, embed, kind="automod actions")
+
+    # ==================== COMMANDS ====================
+    @app_commands.command(name="automod", description="Turn automatic moderation on or off")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def automod_config(self, interaction: discord.Interaction, enabled: bool):
+        """Enable or disable automod for the server."""
+        try:
+            await self.bot.guild_config.update(interaction.guild.id, automod_enabled=enabled)
+            status = "enabled" if enabled else "disabled"
+            embed = discord.Embed(
+                title="🤖 AutoMod Configuration",
+                description=f"Automatic moderation has been **{status}** for this server.",
+                color=discord.Color.green() if enabled else discord.Color.orange()
+            )
+            await interaction.response.send_message(embed=embed)
+            logger.info(f"AutoMod {status} in {interaction.guild.name} by {interaction.user}")
+        except Exception as e:
+            logger.error(f"Error in automod command: {e}")
+            await interaction.response.send_message("❌ Failed to update automod settings.", ephemeral=True)
+
+    blocklist_group = app_commands.Group(
+        name="blocklist",
+        description="Manage words automod deletes",
+        guild_only=True,
+        default_permissions=discord.Permissions(manage_guild=True)
+    )
+
+    @staticmethod
+    def _split_terms(terms: str) -> List[str]:
+        return [term.strip() for term in terms.split(",") if term.strip()]
+
+    @blocklist_group.command(name="add", description="Block words or phrases")
+    @app_commands.describe(terms="Comma-separated words; *word* also matches inside other words")
+    async def blocklist_add(self, interaction: discord.Interaction, terms: str):
+        """Add terms to the server's blocklist."""
+        terms = self._split_terms(terms)
+        if any(len(term) > MAX_TERM_LENGTH for term in terms):
+            await interaction.response.send_message(f"❌ Terms can be at most {MAX_TERM_LENGTH} characters long.", ephemeral=True)
+            return
+        try:
+            added = await self.blocklist.add(interaction.guild.id, terms, interaction.user.id)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        except Exception as e:
+            logger.error(f"Error in blocklist add command: {e}")
+            await interaction.response.send_message("❌ Failed to update the blocklist.", ephemeral=True)
+            return
+        if added:
+            await interaction.response.send_message(f"✅ Blocked **{len(added)}** term(s).", ephemeral=True)
+        else:
+            await interaction.response.send_message("Those terms are already blocked.", ephemeral=True)
+
+    @blocklist_group.command(name="remove", description="Unblock words or phrases")
+    @app_commands.describe(terms="Comma-separated words exactly as they were added")
+    async def blocklist_remove(self, interaction: discord.Interaction, terms: str):
+        """Remove terms from the server's blocklist."""
+        try:
+            removed = await self.blocklist.remove(interaction.guild.id, self._split_terms(terms))
+        except Exception as e:
+            logger.error(f"Error in blocklist remove command: {e}")
+            await interaction.response.send_message("❌ Failed to update the blocklist.", ephemeral=True)
+            return
+        if removed:
+            await interaction.response.send_message(f"✅ Unblocked **{len(removed)}** term(s).", ephemeral=True)
+        else:
+            await interaction.response.send_message("None of those terms are blocked.", ephemeral=True)
+
+    @blocklist_group.command(name="list", description="Show the blocked words")
+    async def blocklist_list(self, interaction: discord.Interaction):
+        """List the server's blocked terms."""
+        matcher = await self.blocklist.fetch(interaction.guild.id)
+        terms = matcher.terms
+        embed = discord.Embed(
+            title=f"🚫 Blocklist ({len(terms)})",
+            description=", ".join(f"`{term}`" for term in terms)[:4096] or "No terms are blocked.",
+            color=discord.Color.blurple()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="automod-stats", description="Show automod counters and per-message overhead")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def automod_stats(self, interaction: discord.Interaction):
+        """Report rule hits and pipeline latency for this process."""
+        latency = self.latency.summary()
+        embed = discord.Embed(title="🤖 AutoMod Stats", color=discord.Color.blurple())
+        embed.add_field(name="Messages checked", value=f"{latency['count']:,}")
+        embed.add_field(
+            name="Overhead per message",
+            value=(
+                f"mean {latency['mean_us']:.1f}µs\n"
+                f"p50 ≤{latency['p50_us']:g}µs · p99 ≤{latency['p99_us']:g}µs\n"
+                f"max {latency['max_us']:.1f}µs"
+            )
+        )
+        hits = "\n".join(f"{RULE_LABELS[rule]}: {count:,}" for rule, count in self.hits.most_common())
+        embed.add_field(name="Rule hits", value=hits or "None", inline=False)
+        embed.add_field(
+            name="Tracked",
+            value=f"{len(self.user_limiter):,} user bucket(s), {len(self.channel_limiter):,} channel bucket(s)",
+            inline=False
+        )
+        if self.near_duplicates is not None:
+            index = self.near_duplicates.stats()
+            embed.add_field(
+                name="Near-duplicate index",
+                value=(
+                    f"{index['entries']:,} message(s) in {index['guilds']:,} server(s), "
+                    f"~{index['memory_bytes'] / 1024:,.0f} KiB\n"
+                    f"lookup mean {index['mean_us']:.1f}µs · p99 ≤{index['p99_us']:g}µs · "
+                    f"{index['flagged']:,} cluster(s) flagged"
+                ),
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot: commands.Bot):
+    """Load the AutoMod cog."""
+    await bot.add_cog(AutoMod(bot))
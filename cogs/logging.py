@@ -1,7 +1,11 @@
 import discord
 from discord.ext import commands
+from discord import app_commands
+from typing import Optional
 import logging
 
+from utils.log_sink import LogSink
+
 logger = logging.getLogger(__name__)
 
 class Logging(commands.Cog):
@@ -12,17 +16,26 @@ class Logging(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        config = getattr(bot, "config", {})
+        self.sink = LogSink(
+            flush_interval=config.get("log_flush_interval", 2.0),
+            max_backlog=config.get("log_max_backlog", 100)
+        )
         logger.info("Logging cog initialized")
 
+    async def cog_unload(self):
+        """Flush pending log embeds before the cog goes away."""
+        await self.sink.close()
+
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Log when a member joins the guild and post an embed to a log channel.
         
-        Looks for a channel named 'mod-logs'. In production, make this configurable.
+        Uses the guild's configured log channel, falling back to a channel named 'mod-logs'.
         """
         try:
             guild = member.guild
-            log_ch = discord.utils.get(guild.text_channels, name="mod-logs")
+            log_ch = self.bot.channel_index.resolve(guild, "mod-logs")
             logger.info("Member joined: %s (%s)", member, member.id)
             if log_ch:
                 embed = discord.Embed(
@@ -32,10 +45,49 @@ class Logging(commands.Cog):
                 )
                 embed.set_thumbnail(url=member.display_avatar.url)
                 embed.add_field(name="ID", value=str(member.id))
-                await log_ch.send(embed=embed)
+                self.sink.push(log_ch, embed, kind="joins")
         except Exception:
             logger.exception("Error handling member join event")
 
+    @app_commands.command(name="logchannel", description="Set or clear the channel used for server logs.")
+    @app_commands.describe(channel="The log channel (leave empty to clear)")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def logchannel(self, interaction: discord.Interaction, channel: Optional[discord.TextChannel] = None):
+        """Store the log channel in the guild configuration."""
+        try:
+            await self.bot.guild_config.update(interaction.guild.id, log_channel=channel.id if channel else None)
+            if channel:
+                await interaction.response.send_message(f"✅ Logs will be sent to {channel.mention}", ephemeral=True)
+            else:
+                await interaction.response.send_message("✅ Log channel cleared.", ephemeral=True)
+        except Exception:
+            logger.exception("Error in logchannel command")
+            await interaction.response.send_message("Unable to update the log channel right now.", ephemeral=True)
+
+    @app_commands.command(name="logqueue", description="Show how many log entries are waiting to be sent.")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def logqueue(self, interaction: discord.Interaction):
+        """Report the log sink's queue depth for this server's log channels."""
+        try:
+            stats = self.sink.stats()
+            lines = [
+                f"<#{channel_id}>: {info['depth']} queued, {info['dropped']} dropped, "
+                f"{info['embeds']} sent in {info['messages']} message(s)"
+                for channel_id, info in stats.items()
+                if interaction.guild.get_channel(channel_id)
+            ]
+            embed = discord.Embed(
+                title="Log Queue",
+                description="\n".join(lines) or "No pending log entries.",
+                color=discord.Color.blurple()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception:
+            logger.exception("Error in logqueue command")
+            await interaction.response.send_message("Unable to read the log queue right now.", ephemeral=True)
+
 async def setup(bot: commands.Bot):
     """Load the Logging cog."""
     await bot.add_cog(Logging(bot))
@@ -10,18 +10,19 @@ from dotenv import load_dotenv
 from datetime import datetime
 import json
 
+from utils.cache_profile import DEFAULT_PROFILE, get_profile
+from utils.counters import BotCounters
+from utils.log_pipeline import setup_logging
+
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging; records are written by a background thread
+setup_logging({
+    'level': os.getenv('LOG_LEVEL', 'INFO'),
+    'file': os.getenv('LOG_FILE', 'bot.log'),
+    'json': os.getenv('LOG_JSON', '').lower() in ('1', 'true', 'yes')
+})
 logger = logging.getLogger('DiscordBot')
 
 # Bot configuration
@@ -30,14 +31,17 @@ class BotConfig:
     PREFIX = os.getenv('BOT_PREFIX', '!')
     OWNER_ID = int(os.getenv('OWNER_ID', '0'))
     DATABASE_URL = os.getenv('DATABASE_URL')
+    CACHE_PROFILE = os.getenv('CACHE_PROFILE', DEFAULT_PROFILE)
+    MAX_MESSAGES = int(os.getenv('MAX_MESSAGES')) if os.getenv('MAX_MESSAGES') else None
     
 class MultipurposeBot(commands.Bot):
     def __init__(self):
-        intents = discord.Intents.all()
+        # Intents, member cache, startup chunking and message cache come from one profile
+        self.cache_profile = get_profile(BotConfig.CACHE_PROFILE)
         
         super().__init__(
             command_prefix=self.get_prefix,
-            intents=intents,
+            **self.cache_profile.client_options(BotConfig.MAX_MESSAGES),
             help_command=None,
             owner_id=BotConfig.OWNER_ID,
             case_insensitive=True,
@@ -54,6 +58,7 @@ class MultipurposeBot(commands.Bot):
         self.uptime = datetime.now()
         self.session = None
         self.db = None
+        self.counters = BotCounters()
         
         # Cog extensions
         self.initial_extensions = [
@@ -99,11 +104,20 @@ class MultipurposeBot(commands.Bot):
                 logger.error(f"Failed to load extension {extension}: {e}")
                 traceback.print_exc()
     
+    def local_counts(self):
+        """Guild, member and user totals, kept up to date by guild and member events"""
+        return self.counters.snapshot(users=len(self._connection._users))
+    
+    async def total_counts(self, max_age: float = 60.0):
+        """Totals of the whole bot; a single process has nothing to aggregate"""
+        return self.local_counts()
+    
     async def on_ready(self):
         """Called when the bot is ready"""
+        counts = self.local_counts()
         logger.info(f"Bot logged in as {self.user} (ID: {self.user.id})")
-        logger.info(f"Connected to {len(self.guilds)} guilds")
-        logger.info(f"Serving {len(set(self.get_all_members()))} users")
+        logger.info(f"Connected to {counts['guilds']} guilds")
+        logger.info(f"Serving {counts['members']} members")
         logger.info("Bot is ready!")
         
         # Sync slash commands
@@ -116,6 +130,7 @@ class MultipurposeBot(commands.Bot):
     async def on_guild_join(self, guild):
         """Called when the bot joins a guild"""
         logger.info(f"Joined guild: {guild.name} (ID: {guild.id})")
+        self.counters.guild_added(guild)
         
         # Send welcome message to the first available text channel
         for channel in guild.text_channels:
@@ -143,6 +158,17 @@ class MultipurposeBot(commands.Bot):
     async def on_guild_remove(self, guild):
         """Called when the bot is removed from a guild"""
         logger.info(f"Left guild: {guild.name} (ID: {guild.id})")
+        self.counters.guild_removed(guild.id)
+    
+    async def on_guild_available(self, guild):
+        """Called when a guild is loaded at startup or after an outage"""
+        self.counters.guild_added(guild)
+    
+    async def on_member_join(self, member):
+        self.counters.member_joined(member.guild.id)
+    
+    async def on_member_remove(self, member):
+        self.counters.member_left(member.guild.id)
     
     async def on_command_error(self, ctx: Context, error: Exception):
         """Global error handler"""
@@ -1,9 +1,110 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import Optional, Union
+from typing import Dict, List, Optional, Union
 import asyncio
-from datetime import timedelta
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+
+from utils.lockdown import LockdownManager
+from utils.mass_action import ProgressReporter, run_pool
+from utils.paginator import KeysetPaginator
+from utils.purge import PurgeFilter, purge_channel
+from utils.scheduler import ScheduledJob
+from utils.warn_counter import WarningCounter
+
+logger = logging.getLogger(__name__)
+
+WARNINGS_PER_PAGE = 10
+CASES_PER_PAGE = 10
+PURGE_LIMIT = 10000
+MASS_ACTION_LIMIT = 1000
+BULK_BAN_CHUNK = 200
+USER_ID_PATTERN = re.compile(r"<@!?(\d{15,20})>|\b(\d{15,20})\b")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+TEMP_ACTION_MAX = 365 * 86400  # Longest tempban/temprole, in seconds
+
+
+def parse_duration(duration: str) -> int:
+    """Parse a duration such as ``10m``, ``12h`` or ``2w`` into seconds.
+    
+    Raises:
+        ValueError: If the duration is malformed or not positive
+    """
+    unit = duration[-1:].lower()
+    if unit not in DURATION_UNITS:
+        raise ValueError(f"Unknown duration unit: {duration!r}")
+    seconds = int(duration[:-1]) * DURATION_UNITS[unit]
+    if seconds <= 0:
+        raise ValueError("Duration must be positive")
+    return seconds
+
+
+class DurationConverter(commands.Converter):
+    """Converts a duration such as ``30m`` into seconds."""
+    
+    async def convert(self, ctx: commands.Context, argument: str) -> int:
+        try:
+            return parse_duration(argument)
+        except ValueError:
+            raise commands.BadArgument(f"Invalid duration: {argument}")
+
+
+class MassActionFlags(commands.FlagConverter, prefix="--", delimiter=" "):
+    """Target selection for massban/masskick."""
+    
+    users: Optional[str] = commands.flag(default=None, description="User IDs or mentions")
+    joined: Optional[int] = commands.flag(default=None, description="Members who joined in the last N minutes")
+    age: Optional[int] = commands.flag(default=None, description="Accounts created in the last N days")
+    name: Optional[str] = commands.flag(default=None, description="Regex matched against usernames and nicknames")
+    reason: str = commands.flag(default="Mass moderation", description="Reason for the action")
+
+
+class PurgeFlags(commands.FlagConverter, prefix="--", delimiter=" "):
+    """Filters for the purge command."""
+    
+    user: Optional[discord.User] = commands.flag(default=None, description="Only delete messages from this user")
+    match: Optional[str] = commands.flag(default=None, description="Only delete messages matching this regex")
+    attachments: bool = commands.flag(default=False, description="Only delete messages with attachments")
+    bots: bool = commands.flag(default=False, description="Only delete messages from bots")
+    minutes: Optional[int] = commands.flag(default=None, description="Only delete messages from the last N minutes")
+
+
+class CaseFlags(commands.FlagConverter, prefix="--", delimiter=" "):
+    """Filters for the cases command."""
+    
+    user: Optional[discord.User] = commands.flag(default=None, description="Only cases against this user")
+    moderator: Optional[discord.User] = commands.flag(default=None, description="Only cases by this moderator")
+    action: Optional[str] = commands.flag(default=None, description="Only this action, e.g. ban or timeout")
+    within: Optional[DurationConverter] = commands.flag(default=None, description="Only cases from the last duration, e.g. 7d")
+
+
+class ConfirmView(discord.ui.View):
+    """Asks the invoking moderator to confirm a destructive action."""
+    
+    def __init__(self, author_id: int):
+        super().__init__(timeout=30)
+        self.author_id = author_id
+        self.confirmed: Optional[bool] = None
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ This confirmation isn't for you.", ephemeral=True)
+            return False
+        return True
+    
+    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.confirmed = True
+        await interaction.response.edit_message(view=None)
+        self.stop()
+    
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.confirmed = False
+        await interaction.response.edit_message(view=None)
+        self.stop()
 
 class Moderation(commands.Cog):
     """Advanced moderation commands for server management.
@@ -17,6 +118,88 @@ class Moderation(commands.Cog):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        escalation = getattr(bot, "config", {}).get("warn_escalation", {})
+        self.warn_threshold = escalation.get("threshold", 3)
+        self.warn_timeout = timedelta(minutes=escalation.get("timeout_minutes", 60))
+        self.warn_counter = WarningCounter(window=timedelta(hours=escalation.get("window_hours", 24)))
+        # Seconds kick/ban wait for the notice DM before acting
+        self.dm_deadline = getattr(bot, "config", {}).get("dm_deadline", 3.0)
+        self.locks = LockdownManager(concurrency=getattr(bot, "config", {}).get("lockdown_concurrency", 10))
+    
+    async def cog_load(self):
+        """Restore locked channels and register the handlers for expiring actions."""
+        await self.locks.load(self.bot.db_pool)
+        self.bot.scheduler.register("unban", self._expire_tempban)
+        self.bot.scheduler.register("remove_role", self._expire_temprole)
+        self.bot.scheduler.register("unlock", self._expire_lockdown)
+    
+    async def cog_unload(self):
+        """Stop handling expiring actions; pending jobs stay in the database."""
+        self.bot.scheduler.unregister("unban")
+        self.bot.scheduler.unregister("remove_role")
+        self.bot.scheduler.unregister("unlock")
+    
+    async def cog_before_invoke(self, ctx: commands.Context):
+        """Chunk the guild first for commands that go through its whole member list."""
+        if ctx.guild and ctx.command.extras.get("needs_members"):
+            await self.bot.member_chunker.ensure(ctx.guild)
+    
+    async def _expire_tempban(self, job: ScheduledJob):
+        """Lift a temporary ban.
+        
+        Goes through the HTTP API when the guild is not in the cache (e.g.
+        while it is unavailable), so the ban is not left in place forever.
+        """
+        guild = self.bot.get_guild(job.guild_id)
+        try:
+            if guild is None:
+                await self.bot.http.unban(job.payload["user_id"], job.guild_id, reason="Temporary ban expired")
+            else:
+                await guild.unban(discord.Object(id=job.payload["user_id"]), reason="Temporary ban expired")
+        except (discord.NotFound, discord.Forbidden):
+            return  # Already unbanned, or we can no longer unban here
+        await self.bot.cases.record(job.guild_id, "unban", job.payload["user_id"], self.bot.user.id, "Temporary ban expired")
+    
+    async def _expire_temprole(self, job: ScheduledJob):
+        """Remove a temporary role."""
+        guild = self.bot.get_guild(job.guild_id)
+        if guild is None:
+            return
+        role = guild.get_role(job.payload["role_id"])
+        if role is None:
+            return
+        member = guild.get_member(job.payload["user_id"])
+        if member is None:
+            try:
+                member = await guild.fetch_member(job.payload["user_id"])
+            except discord.NotFound:
+                return
+        try:
+            await member.remove_roles(role, reason="Temporary role expired")
+        except (discord.NotFound, discord.Forbidden):
+            pass
+    
+    async def _expire_lockdown(self, job: ScheduledJob):
+        """Unlock a channel, or the whole server, once a timed lock runs out."""
+        guild = self.bot.get_guild(job.guild_id)
+        if guild is None:
+            return
+        channel_id = job.payload.get("channel_id")
+        await self.locks.unlock(guild, [channel_id] if channel_id else None, reason="Lockdown expired")
+    
+    async def _record_case(self, ctx: commands.Context, action: str, user: discord.abc.Snowflake, reason: Optional[str], duration: Optional[int] = None) -> Optional[int]:
+        """Queue a case for an action taken by the invoking moderator and return its number."""
+        try:
+            return await self.bot.cases.record(ctx.guild.id, action, user.id, ctx.author.id, reason, duration)
+        except Exception as e:
+            logger.error(f"Failed to record {action} case in {ctx.guild.id}: {e}")
+            return None
+    
+    @staticmethod
+    def _case_footer(embed: discord.Embed, case: Optional[int]) -> discord.Embed:
+        if case is not None:
+            embed.set_footer(text=f"Case #{case}")
+        return embed
         
     @commands.Cog.listener()
     async def on_ready(self):
@@ -47,21 +230,19 @@ class Moderation(commands.Cog):
             await ctx.send("❌ I cannot kick someone with a higher or equal role than me!", ephemeral=True)
             return
         
-        # Send DM to the member before kicking
-        try:
-            embed = discord.Embed(
-                title="🚪 You have been kicked",
-                description=f"You were kicked from **{ctx.guild.name}**",
-                color=discord.Color.orange()
-            )
-            embed.add_field(name="Reason", value=reason, inline=False)
-            embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
-            await member.send(embed=embed)
-        except:
-            pass  # User has DMs disabled
+        # DM the member before kicking; the kick goes ahead once it is delivered or the deadline passes
+        embed = discord.Embed(
+            title="🚪 You have been kicked",
+            description=f"You were kicked from **{ctx.guild.name}**",
+            color=discord.Color.orange()
+        )
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+        await self.bot.dm_dispatcher.notify_before(member, deadline=self.dm_deadline, embed=embed)
         
         # Kick the member
         await member.kick(reason=f"{ctx.author} - {reason}")
+        case = await self._record_case(ctx, "kick", member, reason)
         
         # Send confirmation
         embed = discord.Embed(
@@ -71,7 +252,7 @@ class Moderation(commands.Cog):
         )
         embed.add_field(name="Reason", value=reason, inline=False)
         embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._case_footer(embed, case))
     
     # ==================== BAN COMMAND ====================
     @commands.hybrid_command(
@@ -98,21 +279,20 @@ class Moderation(commands.Cog):
                 await ctx.send("❌ I cannot ban someone with a higher or equal role than me!", ephemeral=True)
                 return
             
-            # Send DM before banning
-            try:
-                embed = discord.Embed(
-                    title="🔨 You have been banned",
-                    description=f"You were banned from **{ctx.guild.name}**",
-                    color=discord.Color.red()
-                )
-                embed.add_field(name="Reason", value=reason, inline=False)
-                embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
-                await member.send(embed=embed)
-            except:
-                pass
+            # DM before banning, bounded by the same deadline as kicks
+            embed = discord.Embed(
+                title="🔨 You have been banned",
+                description=f"You were banned from **{ctx.guild.name}**",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Reason", value=reason, inline=False)
+            embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+            await self.bot.dm_dispatcher.notify_before(member, deadline=self.dm_deadline, embed=embed)
         
-        # Ban the user
+        # Ban the user; a permanent ban replaces any pending tempban expiry
+        await self.bot.scheduler.cancel(ctx.guild.id, "unban", user_id=member.id)
         await ctx.guild.ban(member, reason=f"{ctx.author} - {reason}", delete_message_days=1)
+        case = await self._record_case(ctx, "ban", member, reason)
         
         # Send confirmation
         embed = discord.Embed(
@@ -122,7 +302,7 @@ class Moderation(commands.Cog):
         )
         embed.add_field(name="Reason", value=reason, inline=False)
         embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._case_footer(embed, case))
     
     # ==================== UNBAN COMMAND ====================
     @commands.hybrid_command(
@@ -147,6 +327,8 @@ class Moderation(commands.Cog):
         
         try:
             await ctx.guild.unban(user, reason=f"{ctx.author} - {reason}")
+            await self.bot.scheduler.cancel(ctx.guild.id, "unban", user_id=user.id)
+            case = await self._record_case(ctx, "unban", user, reason)
             
             embed = discord.Embed(
                 title="✅ Member Unbanned",
@@ -155,10 +337,74 @@ class Moderation(commands.Cog):
             )
             embed.add_field(name="Reason", value=reason, inline=False)
             embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
-            await ctx.send(embed=embed)
+            await ctx.send(embed=self._case_footer(embed, case))
         except discord.NotFound:
             await ctx.send("❌ This user is not banned!", ephemeral=True)
     
+    # ==================== TEMPBAN COMMAND ====================
+    @commands.hybrid_command(
+        name="tempban",
+        description="Ban a user for a limited time"
+    )
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    async def tempban(self, ctx: commands.Context, member: Union[discord.Member, discord.User], duration: str, *, reason: Optional[str] = "No reason provided"):
+        """Ban a user and unban them automatically once the duration has passed.
+        
+        Args:
+            ctx: The command context
+            member: The member/user to ban
+            duration: Duration (e.g., 12h, 7d, 2w)
+            reason: The reason for the ban
+        """
+        if not self.bot.scheduler.available:
+            await ctx.send("❌ Temporary bans require a configured database!", ephemeral=True)
+            return
+        
+        try:
+            seconds = parse_duration(duration)
+        except ValueError:
+            await ctx.send("❌ Invalid duration format! Use: 10m, 1h, 1d, 1w, etc.", ephemeral=True)
+            return
+        if seconds > TEMP_ACTION_MAX:
+            await ctx.send("❌ Temporary bans cannot exceed 365 days!", ephemeral=True)
+            return
+        
+        if isinstance(member, discord.Member):
+            if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+                await ctx.send("❌ You cannot ban someone with a higher or equal role!", ephemeral=True)
+                return
+                
+            if member.top_role >= ctx.guild.me.top_role:
+                await ctx.send("❌ I cannot ban someone with a higher or equal role than me!", ephemeral=True)
+                return
+            
+            embed = discord.Embed(
+                title="🔨 You have been temporarily banned",
+                description=f"You were banned from **{ctx.guild.name}** for **{duration}**",
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Reason", value=reason, inline=False)
+            embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+            await self.bot.dm_dispatcher.notify_before(member, deadline=self.dm_deadline, embed=embed)
+        
+        # Schedule the unban before banning so a failed insert never leaves a permanent ban
+        expires = datetime.utcnow() + timedelta(seconds=seconds)
+        await self.bot.scheduler.cancel(ctx.guild.id, "unban", user_id=member.id)
+        await self.bot.scheduler.schedule(ctx.guild.id, "unban", expires, user_id=member.id, moderator_id=ctx.author.id)
+        await ctx.guild.ban(member, reason=f"{ctx.author} - {reason} ({duration})", delete_message_days=1)
+        case = await self._record_case(ctx, "tempban", member, reason, seconds)
+        
+        embed = discord.Embed(
+            title="✅ Member Temporarily Banned",
+            description=f"**{member}** has been banned for **{duration}**",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Expires", value=discord.utils.format_dt(expires.replace(tzinfo=timezone.utc), "R"), inline=False)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+        await ctx.send(embed=self._case_footer(embed, case))
+    
     # ==================== TIMEOUT COMMAND ====================
     @commands.hybrid_command(
         name="timeout",
@@ -177,17 +423,13 @@ class Moderation(commands.Cog):
         """
         # Parse duration
         try:
-            time_dict = {"s": 1, "m": 60, "h": 3600, "d": 86400}
-            unit = duration[-1].lower()
-            amount = int(duration[:-1])
-            seconds = amount * time_dict.get(unit, 60)
-            
-            if seconds > 2419200:  # Max 28 days
-                await ctx.send("❌ Timeout duration cannot exceed 28 days!", ephemeral=True)
-                return
-        except:
+            seconds = parse_duration(duration)
+        except ValueError:
             await ctx.send("❌ Invalid duration format! Use: 10m, 1h, 1d, etc.", ephemeral=True)
             return
+        if seconds > 2419200:  # Max 28 days
+            await ctx.send("❌ Timeout duration cannot exceed 28 days!", ephemeral=True)
+            return
         
         # Hierarchy check
         if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
@@ -196,6 +438,7 @@ class Moderation(commands.Cog):
         
         # Timeout the member
         await member.timeout(timedelta(seconds=seconds), reason=f"{ctx.author} - {reason}")
+        case = await self._record_case(ctx, "timeout", member, reason, seconds)
         
         embed = discord.Embed(
             title="⏰ Member Timed Out",
@@ -204,7 +447,7 @@ class Moderation(commands.Cog):
         )
         embed.add_field(name="Reason", value=reason, inline=False)
         embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._case_footer(embed, case))
     
     # ==================== UNTIMEOUT COMMAND ====================
     @commands.hybrid_command(
@@ -220,13 +463,72 @@ class Moderation(commands.Cog):
             return
         
         await member.timeout(None, reason=f"{ctx.author} - {reason}")
+        case = await self._record_case(ctx, "untimeout", member, reason)
         
         embed = discord.Embed(
             title="✅ Timeout Removed",
             description=f"**{member}**'s timeout has been removed",
             color=discord.Color.green()
         )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self._case_footer(embed, case))
+    
+    # ==================== TEMPROLE COMMAND ====================
+    @commands.hybrid_command(
+        name="temprole",
+        description="Give a member a role for a limited time"
+    )
+    @commands.has_permissions(manage_roles=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def temprole(self, ctx: commands.Context, member: discord.Member, role: discord.Role, duration: str, *, reason: Optional[str] = "No reason provided"):
+        """Give a member a role that is removed automatically once the duration has passed.
+        
+        Args:
+            ctx: The command context
+            member: The member to give the role to
+            role: The role to give
+            duration: Duration (e.g., 12h, 7d, 2w)
+            reason: The reason for the role
+        """
+        if not self.bot.scheduler.available:
+            await ctx.send("❌ Temporary roles require a configured database!", ephemeral=True)
+            return
+        
+        try:
+            seconds = parse_duration(duration)
+        except ValueError:
+            await ctx.send("❌ Invalid duration format! Use: 10m, 1h, 1d, 1w, etc.", ephemeral=True)
+            return
+        if seconds > TEMP_ACTION_MAX:
+            await ctx.send("❌ Temporary roles cannot exceed 365 days!", ephemeral=True)
+            return
+        
+        if role.managed or role.is_default():
+            await ctx.send("❌ This role cannot be assigned!", ephemeral=True)
+            return
+        
+        if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            await ctx.send("❌ You cannot assign a role higher than or equal to your own!", ephemeral=True)
+            return
+        
+        if role >= ctx.guild.me.top_role:
+            await ctx.send("❌ I cannot assign a role higher than or equal to my own!", ephemeral=True)
+            return
+        
+        expires = datetime.utcnow() + timedelta(seconds=seconds)
+        await self.bot.scheduler.cancel(ctx.guild.id, "remove_role", user_id=member.id, role_id=role.id)
+        await self.bot.scheduler.schedule(ctx.guild.id, "remove_role", expires, user_id=member.id, role_id=role.id)
+        await member.add_roles(role, reason=f"{ctx.author} - {reason} ({duration})")
+        case = await self._record_case(ctx, "temprole", member, f"{role.name}: {reason}", seconds)
+        
+        embed = discord.Embed(
+            title="✅ Temporary Role Added",
+            description=f"**{member}** has been given {role.mention} for **{duration}**",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Expires", value=discord.utils.format_dt(expires.replace(tzinfo=timezone.utc), "R"), inline=False)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+        await ctx.send(embed=self._case_footer(embed, case))
     
     # ==================== PURGE COMMAND ====================
     @commands.hybrid_command(
@@ -235,22 +537,69 @@ class Moderation(commands.Cog):
     )
     @commands.has_permissions(manage_messages=True)
     @commands.bot_has_permissions(manage_messages=True)
-    async def purge(self, ctx: commands.Context, amount: int):
-        """Delete a specified number of messages.
+    async def purge(self, ctx: commands.Context, amount: int, *, flags: PurgeFlags):
+        """Delete up to a number of messages, optionally filtered.
+        
+        Usage:
+            !purge 50
+            !purge 5000 --bots true --minutes 60
         
         Args:
             ctx: The command context
-            amount: Number of messages to delete (1-100)
+            amount: Number of messages to delete (1-10000)
+            flags: Author, regex, attachment, bot and time filters
         """
-        if amount < 1 or amount > 100:
-            await ctx.send("❌ Amount must be between 1 and 100!", ephemeral=True)
+        if amount < 1 or amount > PURGE_LIMIT:
+            await ctx.send(f"❌ Amount must be between 1 and {PURGE_LIMIT}!", ephemeral=True)
             return
         
-        # Delete messages
-        deleted = await ctx.channel.purge(limit=amount + 1)  # +1 for command message
+        try:
+            check = PurgeFilter(
+                author_id=flags.user.id if flags.user else None,
+                pattern=flags.match,
+                attachments=flags.attachments,
+                bots=flags.bots
+            )
+        except re.error as e:
+            raise commands.BadArgument(f"Invalid match pattern: {e}") from e
+        after = discord.utils.utcnow() - timedelta(minutes=flags.minutes) if flags.minutes else None
+        
+        # Start below the invoking message so it and the progress message are never scanned
+        if ctx.interaction is None:
+            before = ctx.message
+            try:
+                await ctx.message.delete()
+            except discord.HTTPException:
+                pass
+        else:
+            before = discord.Object(id=discord.utils.time_snowflake(discord.utils.utcnow()))
+            await ctx.defer(ephemeral=True)
         
-        # Send confirmation that auto-deletes
-        msg = await ctx.send(f"✅ Deleted **{len(deleted) - 1}** messages!", ephemeral=True)
+        progress = None
+        if amount > 100:
+            message = await ctx.send(embed=discord.Embed(title="🧹 Purging...", color=discord.Color.orange()), ephemeral=True)
+            progress = ProgressReporter(message, "🧹 Purge", amount)
+        
+        config = getattr(self.bot, "config", {})
+        deleted, scanned = await purge_channel(
+            ctx.channel,
+            amount,
+            check,
+            before=before,
+            after=after,
+            max_scan=config.get("purge_scan_limit", PURGE_LIMIT),
+            progress=progress
+        )
+        
+        if progress:
+            embed = discord.Embed(
+                title="✅ Purge Complete",
+                description=f"Deleted **{deleted}** message(s) after scanning **{scanned}**.",
+                color=discord.Color.green()
+            )
+            await progress.finish(embed)
+        else:
+            await ctx.send(f"✅ Deleted **{deleted}** messages!", ephemeral=True, delete_after=5)
     
     # ==================== SLOWMODE COMMAND ====================
     @commands.hybrid_command(
@@ -277,14 +626,561 @@ class Moderation(commands.Cog):
         else:
             await ctx.send(f"✅ Slowmode set to **{seconds}** seconds!")
     
+    # ==================== LOCK COMMAND ====================
+    @commands.hybrid_command(
+        name="lock",
+        description="Stop @everyone from talking in a channel"
+    )
+    @commands.has_permissions(manage_channels=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def lock(self, ctx: commands.Context, channel: Optional[discord.TextChannel] = None, duration: Optional[DurationConverter] = None, *, reason: Optional[str] = "No reason provided"):
+        """Lock a channel, optionally unlocking it automatically.
+        
+        Args:
+            ctx: The command context
+            channel: The channel to lock (defaults to the current channel)
+            duration: Optional duration after which the channel unlocks (e.g., 30m, 2h)
+            reason: The reason for the lock
+        """
+        channel = channel or ctx.channel
+        if self.locks.is_locked(ctx.guild.id, channel.id):
+            await ctx.send("❌ This channel is already locked!", ephemeral=True)
+            return
+        
+        locked, failed = await self.locks.lock(ctx.guild, [channel], reason=f"{ctx.author} - {reason}")
+        if failed:
+            await ctx.send(f"❌ I couldn't lock {channel.mention}!", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="🔒 Channel Locked",
+            description=f"{channel.mention} has been locked",
+            color=discord.Color.red()
+        )
+        if duration and self.bot.scheduler.available:
+            until = datetime.utcnow() + timedelta(seconds=duration)
+            await self.bot.scheduler.schedule(ctx.guild.id, "unlock", until, channel_id=channel.id)
+            embed.add_field(name="Unlocks", value=discord.utils.format_dt(until.replace(tzinfo=timezone.utc), "R"), inline=False)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+        await ctx.send(embed=embed)
+    
+    # ==================== UNLOCK COMMAND ====================
+    @commands.hybrid_command(
+        name="unlock",
+        description="Unlock a locked channel"
+    )
+    @commands.has_permissions(manage_channels=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def unlock(self, ctx: commands.Context, channel: Optional[discord.TextChannel] = None):
+        """Restore a locked channel's permissions exactly as they were.
+        
+        Args:
+            ctx: The command context
+            channel: The channel to unlock (defaults to the current channel)
+        """
+        channel = channel or ctx.channel
+        if not self.locks.is_locked(ctx.guild.id, channel.id):
+            await ctx.send("❌ This channel is not locked!", ephemeral=True)
+            return
+        
+        await self.bot.scheduler.cancel(ctx.guild.id, "unlock", channel_id=channel.id)
+        restored, failed = await self.locks.unlock(ctx.guild, [channel.id], reason=f"{ctx.author} - Unlock")
+        if failed:
+            await ctx.send(f"❌ I couldn't unlock {channel.mention}!", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="🔓 Channel Unlocked",
+            description=f"{channel.mention} has been unlocked",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+    
+    # ==================== LOCKDOWN COMMAND ====================
+    @commands.hybrid_command(
+        name="lockdown",
+        description="Lock every public channel in the server"
+    )
+    @commands.has_permissions(administrator=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def lockdown(self, ctx: commands.Context, duration: Optional[DurationConverter] = None, *, reason: Optional[str] = "Server lockdown"):
+        """Lock every channel @everyone can see, optionally unlocking automatically.
+        
+        Args:
+            ctx: The command context
+            duration: Optional duration after which the server unlocks (e.g., 30m, 2h)
+            reason: The reason for the lockdown
+        """
+        everyone = ctx.guild.default_role
+        channels = [
+            channel for channel in ctx.guild.channels
+            if not isinstance(channel, discord.CategoryChannel)
+            and channel.permissions_for(everyone).view_channel
+            and channel.permissions_for(ctx.guild.me).manage_roles
+        ]
+        
+        if ctx.interaction:
+            await ctx.defer()
+        message = await ctx.send(embed=discord.Embed(title="🔒 Locking server...", color=discord.Color.orange()))
+        progress = ProgressReporter(message, "🔒 Server Lockdown", total=len(channels))
+        locked, failed = await self.locks.lock(ctx.guild, channels, reason=f"{ctx.author} - {reason}", progress=progress)
+        
+        embed = discord.Embed(
+            title="🔒 Server Locked",
+            description=f"Locked **{len(locked)}** channel(s)",
+            color=discord.Color.red()
+        )
+        if failed:
+            embed.add_field(name="Failed", value=str(len(failed)))
+        if duration and self.bot.scheduler.available:
+            # One timer for the whole lockdown replaces any pending unlocks
+            until = datetime.utcnow() + timedelta(seconds=duration)
+            await self.bot.scheduler.cancel(ctx.guild.id, "unlock")
+            await self.bot.scheduler.schedule(ctx.guild.id, "unlock", until)
+            embed.add_field(name="Unlocks", value=discord.utils.format_dt(until.replace(tzinfo=timezone.utc), "R"), inline=False)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+        await progress.finish(embed)
+    
+    # ==================== UNLOCKDOWN COMMAND ====================
+    @commands.hybrid_command(
+        name="unlockdown",
+        description="Unlock every channel locked in the server"
+    )
+    @commands.has_permissions(administrator=True)
+    @commands.bot_has_permissions(manage_roles=True)
+    async def unlockdown(self, ctx: commands.Context):
+        """Restore the permissions of every locked channel."""
+        locked = self.locks.locked_channels(ctx.guild.id)
+        if not locked:
+            await ctx.send("❌ No channels are locked!", ephemeral=True)
+            return
+        
+        await self.bot.scheduler.cancel(ctx.guild.id, "unlock")
+        if ctx.interaction:
+            await ctx.defer()
+        message = await ctx.send(embed=discord.Embed(title="🔓 Unlocking server...", color=discord.Color.orange()))
+        progress = ProgressReporter(message, "🔓 Server Unlock", total=len(locked))
+        restored, failed = await self.locks.unlock(ctx.guild, reason=f"{ctx.author} - Lockdown lifted", progress=progress)
+        
+        embed = discord.Embed(
+            title="🔓 Server Unlocked",
+            description=f"Restored **{restored}** channel(s)",
+            color=discord.Color.green()
+        )
+        if failed:
+            embed.add_field(name="Failed", value=str(failed))
+        await progress.finish(embed)
+    
+    # ==================== WARN COMMAND ====================
+    @commands.hybrid_command(
+        name="warn",
+        description="Warn a member"
+    )
+    @commands.has_permissions(moderate_members=True)
+    async def warn(self, ctx: commands.Context, member: discord.Member, *, reason: Optional[str] = "No reason provided"):
+        """Warn a member and time them out once they collect too many warnings.
+        
+        Args:
+            ctx: The command context
+            member: The member to warn
+            reason: The reason for the warning
+        """
+        if not self.bot.db_pool:
+            await ctx.send("❌ Warnings require a configured database!", ephemeral=True)
+            return
+        
+        # Hierarchy check
+        if member.top_role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            await ctx.send("❌ You cannot warn someone with a higher or equal role!", ephemeral=True)
+            return
+        
+        row = await self.bot.db_pool.fetchrow(
+            """
+            INSERT INTO warnings (guild_id, user_id, moderator_id, reason)
+            VALUES ($1, $2, $3, $4)
+            RETURNING id, created_at
+            """,
+            ctx.guild.id, member.id, ctx.author.id, reason
+        )
+        count = await self.warn_counter.record(self.bot.db_pool, ctx.guild.id, member.id, row["created_at"])
+        case = await self._record_case(ctx, "warn", member, reason)
+        
+        embed = discord.Embed(
+            title="⚠️ Member Warned",
+            description=f"**{member}** has been warned",
+            color=discord.Color.orange()
+        )
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=False)
+        embed.add_field(name="Recent Warnings", value=str(count), inline=True)
+        embed.set_footer(text=f"Warning ID: {row['id']}" + (f" • Case #{case}" if case is not None else ""))
+        
+        # Escalate every time the member reaches another multiple of the threshold
+        if self.warn_threshold and count % self.warn_threshold == 0:
+            try:
+                await member.timeout(self.warn_timeout, reason=f"Automatic: {count} warnings")
+                await self._record_case(ctx, "timeout", member, f"Automatic: {count} warnings", int(self.warn_timeout.total_seconds()))
+                minutes = int(self.warn_timeout.total_seconds() // 60)
+                embed.add_field(name="Escalation", value=f"Timed out for **{minutes}m**", inline=True)
+            except discord.HTTPException as e:
+                embed.add_field(name="Escalation", value="Failed to time out member", inline=True)
+                logger.warning(f"Failed to escalate warning for {member.id}: {e}")
+        
+        await ctx.send(embed=embed)
+    
+    # ==================== WARNINGS COMMAND ====================
+    @commands.hybrid_command(
+        name="warnings",
+        description="Show a member's warnings"
+    )
+    @commands.has_permissions(moderate_members=True)
+    async def warnings(self, ctx: commands.Context, member: Union[discord.Member, discord.User]):
+        """Show a member's warning history, newest first.
+        
+        Args:
+            ctx: The command context
+            member: The member/user to look up
+        """
+        if not self.bot.db_pool:
+            await ctx.send("❌ Warnings require a configured database!", ephemeral=True)
+            return
+        
+        async def fetch_page(before_id: Optional[int]):
+            # Keyset pagination on (guild_id, user_id, id DESC) keeps every page an index range scan.
+            # The first page gets its own statement: an optional cursor in one cached statement
+            # ends up in a generic plan that can no longer use it as an index bound.
+            if before_id is None:
+                rows = await self.bot.db_pool.fetch(
+                    """
+                    SELECT id, moderator_id, reason, created_at FROM warnings
+                    WHERE guild_id = $1 AND user_id = $2
+                    ORDER BY id DESC
+                    LIMIT $3
+                    """,
+                    ctx.guild.id, member.id, WARNINGS_PER_PAGE + 1
+                )
+            else:
+                rows = await self.bot.db_pool.fetch(
+                    """
+                    SELECT id, moderator_id, reason, created_at FROM warnings
+                    WHERE guild_id = $1 AND user_id = $2 AND id < $3
+                    ORDER BY id DESC
+                    LIMIT $4
+                    """,
+                    ctx.guild.id, member.id, before_id, WARNINGS_PER_PAGE + 1
+                )
+            page = rows[:WARNINGS_PER_PAGE]
+            embed = discord.Embed(
+                title=f"⚠️ Warnings for {member}",
+                color=discord.Color.orange()
+            )
+            if not page:
+                embed.description = "This member has no warnings."
+            for row in page:
+                embed.add_field(
+                    name=f"#{row['id']} • {discord.utils.format_dt(row['created_at'], style='d')}",
+                    value=f"{row['reason'] or 'No reason provided'}\nModerator: <@{row['moderator_id']}>",
+                    inline=False
+                )
+            next_cursor = page[-1]["id"] if len(rows) > WARNINGS_PER_PAGE else None
+            return embed, next_cursor
+        
+        await KeysetPaginator(ctx.author.id, fetch_page).start(ctx)
+    
+    # ==================== CLEARWARNS COMMAND ====================
+    @commands.hybrid_command(
+        name="clearwarns",
+        description="Clear all warnings of a member"
+    )
+    @commands.has_permissions(administrator=True)
+    async def clearwarns(self, ctx: commands.Context, member: Union[discord.Member, discord.User]):
+        """Delete every warning of a member.
+        
+        Args:
+            ctx: The command context
+            member: The member/user whose warnings to clear
+        """
+        if not self.bot.db_pool:
+            await ctx.send("❌ Warnings require a configured database!", ephemeral=True)
+            return
+        
+        result = await self.bot.db_pool.execute(
+            "DELETE FROM warnings WHERE guild_id = $1 AND user_id = $2",
+            ctx.guild.id, member.id
+        )
+        self.warn_counter.clear(ctx.guild.id, member.id)
+        cleared = int(result.split()[-1])
+        
+        embed = discord.Embed(
+            title="✅ Warnings Cleared",
+            description=f"Cleared **{cleared}** warning(s) for **{member}**",
+            color=discord.Color.green()
+        )
+        await ctx.send(embed=embed)
+    
+    # ==================== CASES COMMAND ====================
+    @commands.hybrid_command(
+        name="cases",
+        description="Browse the server's moderation cases"
+    )
+    @commands.has_permissions(moderate_members=True)
+    @commands.guild_only()
+    async def cases(self, ctx: commands.Context, *, flags: CaseFlags):
+        """Show moderation cases, newest first, optionally filtered.
+        
+        Usage:
+            !cases
+            !cases --user @someone --action ban
+            !cases --moderator @mod --within 7d
+        
+        Args:
+            ctx: The command context
+            flags: Filters for user, moderator, action and age
+        """
+        if not self.bot.cases.available:
+            await ctx.send("❌ Cases require a configured database!", ephemeral=True)
+            return
+        
+        # Cases still waiting in the write queue should show up too
+        await self.bot.cases.flush()
+        
+        conditions = ["guild_id = $1"]
+        params: list = [ctx.guild.id]
+        if flags.user:
+            params.append(flags.user.id)
+            conditions.append(f"user_id = ${len(params)}")
+        if flags.moderator:
+            params.append(flags.moderator.id)
+            conditions.append(f"moderator_id = ${len(params)}")
+        if flags.action:
+            params.append(flags.action.lower())
+            conditions.append(f"action = ${len(params)}")
+        if flags.within:
+            params.append(datetime.utcnow() - timedelta(seconds=flags.within))
+            conditions.append(f"created_at >= ${len(params)}")
+        
+        async def fetch_page(before_case: Optional[int]):
+            # Keyset pagination on (guild_id, ..., case_number DESC) keeps every page an index range scan;
+            # the cursor is only part of the statement when there is one, so it stays an index bound
+            page_conditions = list(conditions)
+            page_params = list(params)
+            if before_case is not None:
+                page_params.append(before_case)
+                page_conditions.append(f"case_number < ${len(page_params)}")
+            page_params.append(CASES_PER_PAGE + 1)
+            query = f"""
+                SELECT case_number, action, user_id, moderator_id, reason, duration_seconds, created_at FROM mod_cases
+                WHERE {" AND ".join(page_conditions)}
+                ORDER BY case_number DESC
+                LIMIT ${len(page_params)}
+            """
+            rows = await self.bot.db_pool.fetch(query, *page_params)
+            page = rows[:CASES_PER_PAGE]
+            embed = discord.Embed(
+                title=f"📋 Cases for {flags.user}" if flags.user else "📋 Moderation Cases",
+                color=discord.Color.blurple()
+            )
+            if not page:
+                embed.description = "No matching cases."
+            for row in page:
+                details = f"<@{row['user_id']}> by <@{row['moderator_id']}>"
+                if row["duration_seconds"]:
+                    details += f" for **{timedelta(seconds=row['duration_seconds'])}**"
+                embed.add_field(
+                    name=f"#{row['case_number']} • {row['action'].title()} • {discord.utils.format_dt(row['created_at'], style='d')}",
+                    value=f"{details}\n{row['reason'] or 'No reason provided'}"[:1024],
+                    inline=False
+                )
+            next_cursor = page[-1]["case_number"] if len(rows) > CASES_PER_PAGE else None
+            return embed, next_cursor
+        
+        await KeysetPaginator(ctx.author.id, fetch_page).start(ctx)
+    
+    # ==================== MASS ACTIONS ====================
+    def _collect_mass_targets(self, ctx: commands.Context, flags: MassActionFlags) -> List[discord.abc.Snowflake]:
+        """Resolve massban/masskick flags into a de-duplicated list of targets.
+        
+        Explicit IDs are always included; filters select cached members that
+        match every filter given. Members the moderator or the bot cannot act
+        on are skipped.
+        """
+        guild = ctx.guild
+        targets: Dict[int, discord.abc.Snowflake] = {}
+        
+        if flags.users:
+            for mention_id, raw_id in USER_ID_PATTERN.findall(flags.users):
+                user_id = int(mention_id or raw_id)
+                targets[user_id] = guild.get_member(user_id) or discord.Object(id=user_id)
+        
+        if flags.joined is not None or flags.age is not None or flags.name:
+            now = discord.utils.utcnow()
+            joined_after = now - timedelta(minutes=flags.joined) if flags.joined is not None else None
+            created_after = now - timedelta(days=flags.age) if flags.age is not None else None
+            try:
+                pattern = re.compile(flags.name, re.IGNORECASE) if flags.name else None
+            except re.error as e:
+                raise commands.BadArgument(f"Invalid name pattern: {e}") from e
+            for member in guild.members:
+                if joined_after and (member.joined_at is None or member.joined_at < joined_after):
+                    continue
+                if created_after and member.created_at < created_after:
+                    continue
+                if pattern and not (pattern.search(member.name) or (member.nick and pattern.search(member.nick))):
+                    continue
+                targets[member.id] = member
+        
+        protected = {ctx.author.id, guild.me.id, guild.owner_id}
+        allowed = []
+        for user_id, target in targets.items():
+            if user_id in protected:
+                continue
+            if isinstance(target, discord.Member):
+                if target.top_role >= ctx.author.top_role and ctx.author != guild.owner:
+                    continue
+                if target.top_role >= guild.me.top_role:
+                    continue
+            allowed.append(target)
+        return allowed[:MASS_ACTION_LIMIT]
+    
+    async def _record_mass_cases(self, ctx: commands.Context, action: str, user_ids: List[int], reason: str):
+        """Queue one case per user actioned by a mass command."""
+        try:
+            await self.bot.cases.record_many(ctx.guild.id, action, user_ids, ctx.author.id, reason)
+        except Exception as e:
+            logger.error(f"Failed to record mass {action} cases in {ctx.guild.id}: {e}")
+    
+    async def _confirm_mass_action(self, ctx: commands.Context, verb: str, targets: List[discord.abc.Snowflake]) -> Optional[discord.Message]:
+        """Ask for confirmation and return the message to use for progress, or None if cancelled."""
+        if not targets:
+            await ctx.send("❌ No matching users that both you and I are allowed to moderate!", ephemeral=True)
+            return None
+        
+        view = ConfirmView(ctx.author.id)
+        embed = discord.Embed(
+            title=f"⚠️ Confirm mass {verb}",
+            description=f"This will {verb} **{len(targets)}** user(s).",
+            color=discord.Color.red()
+        )
+        message = await ctx.send(embed=embed, view=view)
+        await view.wait()
+        if not view.confirmed:
+            await message.edit(embed=discord.Embed(title=f"Mass {verb} cancelled", color=discord.Color.light_grey()), view=None)
+            return None
+        return message
+    
+    @commands.hybrid_command(
+        name="massban",
+        description="Ban many users at once by ID or filter",
+        extras={"needs_members": True}
+    )
+    @commands.has_permissions(ban_members=True)
+    @commands.bot_has_permissions(ban_members=True)
+    @commands.guild_only()
+    async def massban(self, ctx: commands.Context, *, flags: MassActionFlags):
+        """Ban users given by ID/mention or matched by join time, account age or name.
+        
+        Usage:
+            !massban --users 123 456 --reason raid
+            !massban --joined 10 --age 3
+        
+        Args:
+            ctx: The command context
+            flags: Target selection and reason
+        """
+        targets = self._collect_mass_targets(ctx, flags)
+        message = await self._confirm_mass_action(ctx, "ban", targets)
+        if message is None:
+            return
+        
+        reason = f"{ctx.author} - {flags.reason}"
+        progress = ProgressReporter(message, "🔨 Mass Ban", len(targets))
+        remaining = targets
+        banned: List[int] = []
+        
+        # The bulk ban endpoint bans up to 200 users per request
+        if ctx.guild.me.guild_permissions.manage_guild:
+            remaining = []
+            for start in range(0, len(targets), BULK_BAN_CHUNK):
+                chunk = targets[start:start + BULK_BAN_CHUNK]
+                try:
+                    result = await ctx.guild.bulk_ban(chunk, reason=reason, delete_message_seconds=86400)
+                    banned.extend(user.id for user in result.banned)
+                    await progress.advance(True, len(result.banned))
+                    await progress.advance(False, len(result.failed))
+                except discord.HTTPException as e:
+                    logger.warning(f"Bulk ban failed, falling back to single bans: {e}")
+                    remaining.extend(chunk)
+        
+        if remaining:
+            concurrency = getattr(self.bot, "config", {}).get("mass_action_concurrency", 5)
+            succeeded, _ = await run_pool(
+                remaining,
+                lambda target: ctx.guild.ban(target, reason=reason, delete_message_days=1),
+                concurrency=concurrency,
+                progress=progress
+            )
+            banned.extend(target.id for target in succeeded)
+        
+        await progress.finish()
+        await self._record_mass_cases(ctx, "ban", banned, flags.reason)
+    
+    @commands.hybrid_command(
+        name="masskick",
+        description="Kick many members at once by ID or filter",
+        extras={"needs_members": True}
+    )
+    @commands.has_permissions(kick_members=True)
+    @commands.bot_has_permissions(kick_members=True)
+    @commands.guild_only()
+    async def masskick(self, ctx: commands.Context, *, flags: MassActionFlags):
+        """Kick members given by ID/mention or matched by join time, account age or name.
+        
+        Usage:
+            !masskick --joined 5 --name "free.*nitro"
+        
+        Args:
+            ctx: The command context
+            flags: Target selection and reason
+        """
+        targets = [target for target in self._collect_mass_targets(ctx, flags) if ctx.guild.get_member(target.id)]
+        message = await self._confirm_mass_action(ctx, "kick", targets)
+        if message is None:
+            return
+        
+        reason = f"{ctx.author} - {flags.reason}"
+        progress = ProgressReporter(message, "🚪 Mass Kick", len(targets))
+        concurrency = getattr(self.bot, "config", {}).get("mass_action_concurrency", 5)
+        succeeded, _ = await run_pool(
+            targets,
+            lambda target: ctx.guild.kick(target, reason=reason),
+            concurrency=concurrency,
+            progress=progress
+        )
+        await progress.finish()
+        await self._record_mass_cases(ctx, "kick", [target.id for target in succeeded], flags.reason)
+    
     # ==================== ERROR HANDLER ====================
     @kick.error
     @ban.error
     @unban.error
     @timeout.error
     @untimeout.error
+    @tempban.error
+    @temprole.error
     @purge.error
     @slowmode.error
+    @lock.error
+    @unlock.error
+    @lockdown.error
+    @unlockdown.error
+    @warn.error
+    @warnings.error
+    @cases.error
+    @clearwarns.error
+    @massban.error
+    @masskick.error
     async def moderation_error(self, ctx: commands.Context, error):
         """Error handler for moderation commands."""
         if isinstance(error, commands.MissingPermissions):
@@ -4,6 +4,9 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 
+from utils.cache_profile import cache_report
+from utils.counters import BotCounters
+
 logger = logging.getLogger(__name__)
 
 class Utility(commands.Cog):
@@ -34,12 +37,118 @@ class Utility(commands.Cog):
             )
             embed.add_field(name="Python", value=platform.python_version(), inline=True)
             embed.add_field(name="discord.py", value=discord.__version__, inline=True)
+            if hasattr(self.bot, "total_counts"):
+                totals = await self.bot.total_counts()
+                embed.add_field(name="Servers", value=f"{totals['guilds']:,}", inline=True)
+                embed.add_field(name="Members", value=f"{totals['members']:,}", inline=True)
             embed.set_footer(text=f"Requested by {interaction.user}")
             await interaction.response.send_message(embed=embed, ephemeral=True)
         except Exception:
             logger.exception("Error in about command")
             await interaction.response.send_message("Unable to fetch about info right now.", ephemeral=True)
 
+    @app_commands.command(name="prefix", description="Change the command prefix for this server.")
+    @app_commands.describe(prefix="The new prefix (1-10 characters)")
+    @app_commands.guild_only()
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def prefix(self, interaction: discord.Interaction, prefix: str):
+        try:
+            prefix = prefix.strip()
+            if not 1 <= len(prefix) <= 10:
+                return await interaction.response.send_message("Prefix must be between 1 and 10 characters.", ephemeral=True)
+            await self.bot.guild_config.update(interaction.guild.id, prefix=prefix)
+            await interaction.response.send_message(f"✅ Prefix set to `{prefix}`", ephemeral=True)
+            logger.info("Prefix changed to %r in guild %s by %s", prefix, interaction.guild.id, interaction.user)
+        except Exception:
+            logger.exception("Error in prefix command")
+            await interaction.response.send_message("Unable to update the prefix right now.", ephemeral=True)
+
+    @app_commands.command(name="memory", description="Show what the bot caches and how much memory it uses.")
+    async def memory(self, interaction: discord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
+            return await interaction.response.send_message("Only the bot owner can use this command.", ephemeral=True)
+        try:
+            report = cache_report(self.bot)
+            profile = getattr(self.bot, "cache_profile", None)
+            embed = discord.Embed(
+                title="Memory report",
+                description=f"Cache profile: **{profile.name}** ({profile.description})" if profile else None,
+                color=discord.Color.blurple()
+            )
+            embed.add_field(name="Resident memory", value=f"{report['rss_bytes'] / 2**20:,.1f} MiB", inline=True)
+            embed.add_field(name="Guilds", value=f"{report['guilds']:,}", inline=True)
+            embed.add_field(name="Members", value=f"{report['members']:,}", inline=True)
+            embed.add_field(name="Users", value=f"{report['users']:,}", inline=True)
+            embed.add_field(name="Presences", value=f"{report['presences']:,}", inline=True)
+            embed.add_field(name="Messages", value=f"{report['messages']:,}", inline=True)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception:
+            logger.exception("Error in memory command")
+            await interaction.response.send_message("Unable to build the memory report right now.", ephemeral=True)
+
+    async def _cluster_stats(self):
+        """Return the stats of every cluster, or just this process when not clustered."""
+        ipc = getattr(self.bot, "ipc", None)
+        if ipc is None:
+            return [{"cluster": 0, "result": await self.bot.ipc_stats()}]
+        return await ipc.request("stats")
+
+    @app_commands.command(name="clusters", description="Show the status of every cluster.")
+    async def clusters(self, interaction: discord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
+            return await interaction.response.send_message("Only the bot owner can use this command.", ephemeral=True)
+        await interaction.response.defer(ephemeral=True)
+        try:
+            results = await self._cluster_stats()
+            embed = discord.Embed(title="Clusters", color=discord.Color.blurple())
+            for entry in sorted(results, key=lambda entry: entry["cluster"]):
+                stats = entry.get("result")
+                if stats is None:
+                    embed.add_field(name=f"Cluster {entry['cluster']}", value=f"⚠️ {entry.get('error')}", inline=False)
+                    continue
+                shards = stats["shards"]
+                embed.add_field(
+                    name=f"Cluster {entry['cluster']} · shards {shards[0]}-{shards[-1]}" if shards else f"Cluster {entry['cluster']}",
+                    value=(
+                        f"{stats['guilds']:,} guilds · {stats['members']:,} members · {stats['users']:,} users\n"
+                        f"latency {stats['latency_ms']}ms · {(stats['rss_bytes'] or 0) / 2**20:,.0f} MiB · "
+                        f"up {stats['uptime'] / 3600:.1f}h"
+                    ),
+                    inline=False
+                )
+            responding = [entry["result"] for entry in results if entry.get("result")]
+            totals = BotCounters.combine(responding)
+            embed.description = (
+                f"**{totals['guilds']:,}** guilds and **{totals['members']:,}** members across "
+                f"**{len(responding)}/{len(results)}** responding cluster(s)"
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        except Exception:
+            logger.exception("Error in clusters command")
+            await interaction.followup.send("Unable to reach the clusters right now.", ephemeral=True)
+
+    @app_commands.command(name="reload", description="Reload an extension on every cluster.")
+    @app_commands.describe(extension="Extension to reload, e.g. cogs.moderation")
+    async def reload(self, interaction: discord.Interaction, extension: str):
+        if not await self.bot.is_owner(interaction.user):
+            return await interaction.response.send_message("Only the bot owner can use this command.", ephemeral=True)
+        await interaction.response.defer(ephemeral=True)
+        try:
+            ipc = getattr(self.bot, "ipc", None)
+            if ipc is None:
+                await self.bot.reload_extension(extension)
+                results = [{"cluster": 0, "result": "reloaded"}]
+            else:
+                results = await ipc.request("reload", extension)
+            lines = [
+                f"Cluster {entry['cluster']}: " + ("✅ reloaded" if "result" in entry else f"❌ {entry.get('error')}")
+                for entry in sorted(results, key=lambda entry: entry["cluster"])
+            ]
+            await interaction.followup.send("\n".join(lines) or "No clusters responded.", ephemeral=True)
+        except Exception as e:
+            logger.exception("Error in reload command")
+            await interaction.followup.send(f"Reload failed: {e}", ephemeral=True)
+
 async def setup(bot: commands.Bot):
     """Load the Utility cog."""
     await bot.add_cog(Utility(bot))
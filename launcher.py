@@ -0,0 +1,196 @@
+"""
+Cluster launcher.
+
+Runs the bot as several processes ("clusters"), each one an independent
+``DiscordBot`` with its own event loop handling a slice of the shards, so
+the bot can use more than one CPU core.
+
+The launcher asks Discord for the recommended shard count, splits the
+shards into clusters of ``shards_per_cluster``, and starts one cluster at a
+time, waiting for each to report ready so identifies never exceed the
+gateway's session start rate. It then supervises the clusters, restarting
+any that exit with a growing back-off, and runs the IPC server they use to
+talk to each other.
+
+Usage:
+    python launcher.py
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+# Importing main also configures logging
+from main import load_config
+from utils.log_pipeline import setup_logging
+from utils.ipc import IPCServer
+
+logger = logging.getLogger('Launcher')
+
+GATEWAY_URL = 'https://discord.com/api/v10/gateway/bot'
+# A cluster that stays up this long has its restart back-off reset
+STABLE_UPTIME = 300.0
+MAX_BACKOFF = 300.0
+
+
+async def fetch_gateway(token: str) -> Tuple[int, int]:
+    """Return the recommended shard count and the identify concurrency.
+
+    Raises:
+        RuntimeError: If Discord rejects the request
+    """
+    headers = {'Authorization': f'Bot {token}'}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers=headers) as response:
+            if response.status != 200:
+                raise RuntimeError(f'GET /gateway/bot failed with {response.status}: {await response.text()}')
+            data = await response.json()
+    return data['shards'], data['session_start_limit']['max_concurrency']
+
+
+def plan_clusters(shard_count: int, shards_per_cluster: int) -> List[List[int]]:
+    """Split shard IDs into consecutive groups of at most ``shards_per_cluster``."""
+    shards_per_cluster = max(1, shards_per_cluster)
+    return [
+        list(range(start, min(start + shards_per_cluster, shard_count)))
+        for start in range(0, shard_count, shards_per_cluster)
+    ]
+
+
+class Cluster:
+    """One supervised bot process."""
+
+    def __init__(self, cluster_id: int, shard_ids: List[int], shard_count: int, ipc_path: str) -> None:
+        self.id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.ipc_path = ipc_path
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.ready = asyncio.Event()
+        self.started_at = 0.0
+        self.restarts = 0
+        self.backoff = 5.0
+
+    @property
+    def name(self) -> str:
+        return f'Cluster {self.id} (shards {self.shard_ids[0]}-{self.shard_ids[-1]})'
+
+    async def start(self) -> None:
+        self.ready.clear()
+        self.started_at = time.monotonic()
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'),
+            '--cluster-id', str(self.id),
+            '--shard-ids', ','.join(map(str, self.shard_ids)),
+            '--shard-count', str(self.shard_count),
+            '--ipc-path', self.ipc_path
+        )
+        logger.info(f'Started {self.name} as PID {self.process.pid}')
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f'{self.name} did not stop in {timeout:.0f}s, killing it')
+            self.process.kill()
+            await self.process.wait()
+
+
+class Launcher:
+    """Starts, supervises and stops the clusters."""
+
+    def __init__(self, config: dict) -> None:
+        self.config = config
+        self.ipc = IPCServer(config.get('ipc_path') or os.path.join(tempfile.gettempdir(), f'discord-bot-{os.getuid()}.sock'))
+        self.ipc.on_event = self._on_event
+        self.ready_timeout = config.get('cluster_ready_timeout', 600.0)
+        self.clusters: Dict[int, Cluster] = {}
+        self._stopping = asyncio.Event()
+
+    async def _on_event(self, cluster_id: int, name: str, data) -> None:
+        cluster = self.clusters.get(cluster_id)
+        if cluster is not None and name == 'ready':
+            logger.info(f'{cluster.name} is ready')
+            cluster.ready.set()
+
+    async def run(self, token: str) -> None:
+        shard_count = self.config.get('shard_count')
+        if not shard_count:
+            shard_count, concurrency = await fetch_gateway(token)
+            logger.info(f'Discord recommends {shard_count} shard(s), identify concurrency {concurrency}')
+        groups = plan_clusters(shard_count, self.config.get('shards_per_cluster', 8))
+        logger.info(f'Running {shard_count} shard(s) in {len(groups)} cluster(s)')
+
+        await self.ipc.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._stopping.set)
+
+        supervisors = []
+        try:
+            for cluster_id, shard_ids in enumerate(groups):
+                cluster = self.clusters[cluster_id] = Cluster(cluster_id, shard_ids, shard_count, self.ipc.path)
+                await cluster.start()
+                supervisors.append(asyncio.create_task(self._supervise(cluster)))
+                # Identifies are rate limited per bot, so let each cluster finish before the next starts
+                await self._wait_ready(cluster)
+                if self._stopping.is_set():
+                    break
+            await self._stopping.wait()
+        finally:
+            logger.info('Stopping clusters...')
+            for task in supervisors:
+                task.cancel()
+            await asyncio.gather(*supervisors, return_exceptions=True)
+            await asyncio.gather(*(cluster.stop() for cluster in self.clusters.values()))
+            await self.ipc.close()
+            logger.info('All clusters stopped')
+
+    async def _wait_ready(self, cluster: Cluster) -> None:
+        ready = asyncio.create_task(cluster.ready.wait())
+        stopping = asyncio.create_task(self._stopping.wait())
+        done, pending = await asyncio.wait({ready, stopping}, timeout=self.ready_timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if not done:
+            logger.warning(f'{cluster.name} was not ready after {self.ready_timeout:.0f}s, starting the next cluster')
+
+    async def _supervise(self, cluster: Cluster) -> None:
+        while True:
+            code = await cluster.process.wait()
+            if self._stopping.is_set():
+                return
+            uptime = time.monotonic() - cluster.started_at
+            if uptime >= STABLE_UPTIME:
+                cluster.backoff = 5.0
+            logger.error(f'{cluster.name} exited with code {code} after {uptime:.0f}s, restarting in {cluster.backoff:.0f}s')
+            await asyncio.sleep(cluster.backoff)
+            cluster.backoff = min(cluster.backoff * 2, MAX_BACKOFF)
+            cluster.restarts += 1
+            await cluster.start()
+
+
+async def main() -> None:
+    config = load_config()
+    log_options = dict(config.get('logging') or {})
+    log_options['file'] = log_options.pop('launcher_file', 'launcher.log')
+    setup_logging(log_options)
+    token = os.getenv('DISCORD_BOT_TOKEN') or config.get('token')
+    if not token:
+        logger.error('No bot token found! Set DISCORD_BOT_TOKEN env var or add to config.json')
+        sys.exit(1)
+    await Launcher(config).run(token)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -6,46 +6,84 @@ Version: 1.0.0
 """
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+import argparse
 import asyncio
 import logging
 import json
 import os
+import signal
 import sys
-from typing import Optional, List
+import time
+from typing import Any, Dict, Optional, List
 import aiohttp
 import asyncpg
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] %(name)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler('bot.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from utils.cache_profile import DEFAULT_PROFILE, get_profile, process_memory
+from utils.case_log import CaseLog
+from utils.channel_index import ChannelIndex
+from utils.counters import BotCounters
+from utils.dm_dispatcher import DMDispatcher
+from utils.guild_config import GuildConfigService
+from utils.log_pipeline import setup_logging
+from utils.ipc import IPCClient
+from utils.member_chunker import MemberChunker
+from utils.scheduler import Scheduler
+from utils.snapshot import SnapshotStore
+
+# Console only until the config (and with it the log file) is known
+setup_logging({'file': None})
 
 logger = logging.getLogger('DiscordBot')
 
 
+def load_config(path: str = 'config/config.json') -> dict:
+    """Load bot configuration from config.json.
+    
+    The gateway cache profile depends on it, so it is read before the bot is constructed.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        logger.info('Configuration loaded successfully')
+        return config
+    except FileNotFoundError:
+        logger.error('config.json not found! Please create one from config.example.json')
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        logger.error(f'Invalid JSON in config.json: {e}')
+        sys.exit(1)
+
+
 class DiscordBot(commands.AutoShardedBot):
     """Professional Discord Bot with advanced features."""
     
-    def __init__(self) -> None:
-        """Initialize the bot with necessary intents and configuration."""
-        # Configure intents
-        intents = discord.Intents.default()
-        intents.members = True
-        intents.message_content = True
-        intents.presences = True
-        intents.guilds = True
+    def __init__(
+        self,
+        config: Optional[dict] = None,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+        cluster_id: Optional[int] = None,
+        ipc_path: Optional[str] = None
+    ) -> None:
+        """Initialize the bot with necessary intents and configuration.
+        
+        Args:
+            config: The loaded configuration; its cache profile decides intents and caching
+            shard_ids: Shards this process runs when started by the cluster launcher
+            shard_count: Total number of shards across all clusters
+            cluster_id: This process's cluster ID
+            ipc_path: Unix socket of the launcher's IPC server
+        """
+        config = config or {}
+        self.cache_profile = get_profile(config.get('cache_profile', DEFAULT_PROFILE))
         
         super().__init__(
             command_prefix=self.get_prefix,
-            intents=intents,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            **self.cache_profile.client_options(config.get('max_messages')),
             help_command=None,
             owner_ids=set(),
             strip_after_prefix=True,
@@ -53,16 +91,34 @@ class DiscordBot(commands.AutoShardedBot):
             allowed_mentions=discord.AllowedMentions(roles=False, everyone=False, users=True)
         )
         
-        self.config: dict = {}
+        self.config: dict = config
         self.db_pool: Optional[asyncpg.Pool] = None
         self.session: Optional[aiohttp.ClientSession] = None
         self.start_time: datetime = datetime.utcnow()
+        self.cluster_id: Optional[int] = cluster_id
+        self.ipc: Optional[IPCClient] = IPCClient(ipc_path, cluster_id) if ipc_path else None
+        self.counters: BotCounters = BotCounters()
+        self._totals: Optional[Dict[str, int]] = None
+        self._totals_at = 0.0
+        self.guild_config: GuildConfigService = GuildConfigService()
+        self.channel_index: ChannelIndex = ChannelIndex(self)
+        self.snapshots: SnapshotStore = SnapshotStore()
+        self.dm_dispatcher: DMDispatcher = DMDispatcher()
+        self.scheduler: Scheduler = Scheduler()
+        self.cases: CaseLog = CaseLog()
+        # Guilds are chunked when a command first needs their member list
+        self.member_chunker: MemberChunker = MemberChunker(
+            self.get_guild,
+            lazy=not self.cache_profile.chunk_guilds_at_startup,
+            max_guilds=config.get('member_cache_guilds', 100)
+        )
         self.cogs_list: List[str] = [
             'cogs.moderation',
             'cogs.antinuke',
             'cogs.fun',
             'cogs.utility',
             'cogs.logging',
+            'cogs.automod',
             'cogs.help'
         ]
         
@@ -80,35 +136,17 @@ class DiscordBot(commands.AutoShardedBot):
         if not message.guild:
             return commands.when_mentioned_or(default_prefix)(self, message)
         
-        try:
-            if self.db_pool:
-                guild_prefix = await self.db_pool.fetchval(
-                    'SELECT prefix FROM guild_config WHERE guild_id = $1',
-                    message.guild.id
-                )
-                if guild_prefix:
-                    return commands.when_mentioned_or(guild_prefix)(self, message)
-        except Exception as e:
-            logger.error(f'Error fetching prefix for guild {message.guild.id}: {e}')
-        
-        return commands.when_mentioned_or(default_prefix)(self, message)
-    
-    async def load_config(self) -> None:
-        """Load bot configuration from config.json file."""
-        try:
-            with open('config/config.json', 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
-            logger.info('Configuration loaded successfully')
-        except FileNotFoundError:
-            logger.error('config.json not found! Please create one from config.example.json')
-            sys.exit(1)
-        except json.JSONDecodeError as e:
-            logger.error(f'Invalid JSON in config.json: {e}')
-            sys.exit(1)
+        config = await self.guild_config.fetch(message.guild.id)
+        return commands.when_mentioned_or(config.prefix)(self, message)
     
     async def setup_database(self) -> None:
         """Setup PostgreSQL database connection pool."""
         try:
+            self.guild_config = GuildConfigService(
+                default_prefix=self.config.get('default_prefix', '!'),
+                maxsize=self.config.get('guild_config_cache_size', 10000)
+            )
+            
             database_url = self.config.get('database_url')
             if not database_url:
                 logger.warning('No database URL configured, database features will be disabled')
@@ -131,10 +169,15 @@ class DiscordBot(commands.AutoShardedBot):
                         mod_role BIGINT,
                         mute_role BIGINT,
                         antinuke_enabled BOOLEAN DEFAULT FALSE,
+                        automod_enabled BOOLEAN DEFAULT FALSE,
                         created_at TIMESTAMP DEFAULT NOW()
                     )
                 ''')
                 
+                await conn.execute('''
+                    ALTER TABLE guild_config ADD COLUMN IF NOT EXISTS automod_enabled BOOLEAN DEFAULT FALSE
+                ''')
+                
                 await conn.execute('''
                     CREATE TABLE IF NOT EXISTS warnings (
                         id SERIAL PRIMARY KEY,
@@ -146,6 +189,11 @@ class DiscordBot(commands.AutoShardedBot):
                     )
                 ''')
                 
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_warnings_guild_user
+                    ON warnings (guild_id, user_id, id DESC)
+                ''')
+                
                 await conn.execute('''
                     CREATE TABLE IF NOT EXISTS antinuke_whitelist (
                         guild_id BIGINT NOT NULL,
@@ -156,6 +204,92 @@ class DiscordBot(commands.AutoShardedBot):
                     )
                 ''')
                 
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS guild_snapshots (
+                        guild_id BIGINT PRIMARY KEY,
+                        data BYTEA NOT NULL,
+                        codec VARCHAR(16) NOT NULL,
+                        updated_at TIMESTAMP DEFAULT NOW()
+                    )
+                ''')
+                
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS antinuke_thresholds (
+                        guild_id BIGINT NOT NULL,
+                        action VARCHAR(32) NOT NULL,
+                        max_actions INTEGER NOT NULL,
+                        window_seconds INTEGER NOT NULL,
+                        PRIMARY KEY (guild_id, action)
+                    )
+                ''')
+                
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS scheduled_actions (
+                        id BIGSERIAL PRIMARY KEY,
+                        guild_id BIGINT NOT NULL,
+                        action VARCHAR(32) NOT NULL,
+                        due_at TIMESTAMP NOT NULL,
+                        payload JSONB NOT NULL DEFAULT '{}',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        created_at TIMESTAMP DEFAULT NOW()
+                    )
+                ''')
+                
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_scheduled_actions_due
+                    ON scheduled_actions (due_at)
+                ''')
+                
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS automod_blocklist (
+                        guild_id BIGINT NOT NULL,
+                        term VARCHAR(100) NOT NULL,
+                        added_by BIGINT NOT NULL,
+                        added_at TIMESTAMP DEFAULT NOW(),
+                        PRIMARY KEY (guild_id, term)
+                    )
+                ''')
+                
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS mod_cases (
+                        guild_id BIGINT NOT NULL,
+                        case_number INTEGER NOT NULL,
+                        action VARCHAR(32) NOT NULL,
+                        user_id BIGINT NOT NULL,
+                        moderator_id BIGINT NOT NULL,
+                        reason TEXT,
+                        duration_seconds INTEGER,
+                        created_at TIMESTAMP DEFAULT NOW(),
+                        PRIMARY KEY (guild_id, case_number)
+                    )
+                ''')
+                
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_mod_cases_user
+                    ON mod_cases (guild_id, user_id, case_number DESC)
+                ''')
+                
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_mod_cases_moderator
+                    ON mod_cases (guild_id, moderator_id, case_number DESC)
+                ''')
+                
+                await conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_mod_cases_created
+                    ON mod_cases (guild_id, created_at DESC)
+                ''')
+                
+                await conn.execute('''
+                    CREATE TABLE IF NOT EXISTS channel_lockdowns (
+                        guild_id BIGINT NOT NULL,
+                        channel_id BIGINT NOT NULL,
+                        allow BIGINT,
+                        deny BIGINT,
+                        locked_at TIMESTAMP DEFAULT NOW(),
+                        PRIMARY KEY (guild_id, channel_id)
+                    )
+                ''')
+                
             logger.info('Database connection established and tables initialized')
         except Exception as e:
             logger.error(f'Failed to setup database: {e}')
@@ -174,15 +308,53 @@ class DiscordBot(commands.AutoShardedBot):
         # Create aiohttp session
         self.session = aiohttp.ClientSession()
         
-        # Load configuration
-        await self.load_config()
+        logger.info(f'Cache profile: {self.cache_profile.name} ({self.cache_profile.description})')
         
         # Setup database
         await self.setup_database()
         
+        # Load guild configuration into memory
+        await self.guild_config.start(self.db_pool)
+        
+        # Restore stored structure snapshots before guilds become available, then persist in the background
+        loaded = await self.snapshots.load(self.db_pool, (self.shard_ids, self.shard_count) if self.shard_ids is not None else None)
+        if loaded:
+            logger.info(f'Loaded {loaded} guild snapshot(s)')
+        self.snapshots.persist_interval = self.config.get('snapshot_interval', 300)
+        self.snapshots.start(self.db_pool)
+        
+        # Deliver moderation DMs in the background
+        self.dm_dispatcher = DMDispatcher(
+            workers=self.config.get('dm_workers', 3),
+            max_queue=self.config.get('dm_queue_size', 500)
+        )
+        self.dm_dispatcher.start()
+        
+        # Write moderation cases in batches
+        self.cases = CaseLog(
+            flush_interval=self.config.get('case_flush_interval', 2.0),
+            batch_size=self.config.get('case_batch_size', 500)
+        )
+        self.cases.start(self.db_pool)
+        
         # Load all cogs
         await self.load_cogs()
         
+        # Fire scheduled actions once cogs have registered their handlers; a
+        # cluster only fires the jobs of guilds on its own shards
+        shards = (self.shard_ids, self.shard_count) if self.shard_ids is not None else None
+        self.scheduler.start(self.db_pool, ready=self.wait_until_ready, shards=shards)
+        
+        # Keep the presence text current without recounting on every join
+        self.refresh_presence.change_interval(seconds=self.config.get('presence_interval', 600))
+        self.refresh_presence.start()
+        
+        # Answer other clusters over IPC
+        if self.ipc:
+            self.ipc.register('stats', self.ipc_stats)
+            self.ipc.register('reload', self.ipc_reload)
+            self.ipc.start()
+        
         # Sync slash commands
         try:
             synced = await self.tree.sync()
@@ -192,17 +364,67 @@ class DiscordBot(commands.AutoShardedBot):
     
     async def on_ready(self) -> None:
         """Event handler for when bot is ready."""
+        counts = self.local_counts()
         logger.info(f'Logged in as {self.user.name} (ID: {self.user.id})')
-        logger.info(f'Connected to {len(self.guilds)} guild(s)')
-        logger.info(f'Watching {len(self.users)} user(s)')
+        logger.info(f'Connected to {counts["guilds"]} guild(s) with {counts["members"]} member(s)')
+        logger.info(f'Watching {counts["users"]} user(s)')
         logger.info('Bot is ready!')
         
-        # Set bot presence
-        activity = discord.Activity(
-            type=discord.ActivityType.watching,
-            name=f'{len(self.guilds)} servers | !help'
-        )
-        await self.change_presence(status=discord.Status.online, activity=activity)
+        if self.ipc:
+            await self.ipc.send_event('ready')
+    
+    def local_counts(self) -> Dict[str, int]:
+        """Return this process's guild, member and user totals without walking any cache."""
+        return self.counters.snapshot(users=len(self._connection._users))
+    
+    async def total_counts(self, max_age: float = 60.0) -> Dict[str, int]:
+        """Return the totals of every cluster, cached for ``max_age`` seconds.
+        
+        Clusters that do not answer are left out; without IPC these are the local totals.
+        """
+        if self.ipc is None:
+            return self.local_counts()
+        if self._totals is None or time.monotonic() - self._totals_at > max_age:
+            try:
+                results = await self.ipc.request('stats')
+                self._totals = BotCounters.combine(entry['result'] for entry in results if entry.get('result'))
+                self._totals_at = time.monotonic()
+            except (ConnectionError, asyncio.TimeoutError) as e:
+                logger.warning(f'Failed to collect cluster totals: {e}')
+                return self._totals or self.local_counts()
+        return self._totals
+    
+    @tasks.loop(minutes=10)
+    async def refresh_presence(self) -> None:
+        """Show the server count across all clusters in the bot's presence."""
+        try:
+            totals = await self.total_counts()
+            activity = discord.Activity(
+                type=discord.ActivityType.watching,
+                name=f'{totals["guilds"]:,} servers | !help'
+            )
+            await self.change_presence(status=discord.Status.online, activity=activity)
+        except Exception as e:
+            logger.error(f'Failed to update presence: {e}')
+    
+    @refresh_presence.before_loop
+    async def before_refresh_presence(self) -> None:
+        await self.wait_until_ready()
+    
+    async def ipc_stats(self, data: Any = None) -> Dict[str, Any]:
+        """Describe this process for the aggregated stats of all clusters."""
+        return {
+            'shards': sorted(self.shards),
+            **self.local_counts(),
+            'latency_ms': round(self.latency * 1000) if self.is_ready() else None,
+            'rss_bytes': process_memory(),
+            'uptime': (datetime.utcnow() - self.start_time).total_seconds(),
+        }
+    
+    async def ipc_reload(self, data: Any) -> str:
+        """Reload an extension on request of another cluster."""
+        await self.reload_extension(data)
+        return 'reloaded'
     
     async def on_guild_join(self, guild: discord.Guild) -> None:
         """Event handler for when bot joins a guild.
@@ -211,16 +433,14 @@ class DiscordBot(commands.AutoShardedBot):
             guild: The guild that was joined
         """
         logger.info(f'Joined guild: {guild.name} (ID: {guild.id})')
+        self.counters.guild_added(guild)
+        self.snapshots.build(guild)
         
         # Initialize guild config in database
-        if self.db_pool:
-            try:
-                await self.db_pool.execute(
-                    'INSERT INTO guild_config (guild_id) VALUES ($1) ON CONFLICT DO NOTHING',
-                    guild.id
-                )
-            except Exception as e:
-                logger.error(f'Failed to initialize guild config: {e}')
+        try:
+            await self.guild_config.ensure(guild.id)
+        except Exception as e:
+            logger.error(f'Failed to initialize guild config: {e}')
     
     async def on_guild_remove(self, guild: discord.Guild) -> None:
         """Event handler for when bot leaves a guild.
@@ -229,6 +449,56 @@ class DiscordBot(commands.AutoShardedBot):
             guild: The guild that was left
         """
         logger.info(f'Left guild: {guild.name} (ID: {guild.id})')
+        self.counters.guild_removed(guild.id)
+        self.guild_config.evict(guild.id)
+        self.channel_index.forget_guild(guild.id)
+        self.snapshots.forget_guild(guild.id)
+        self.cases.forget_guild(guild.id)
+        self.member_chunker.forget_guild(guild.id)
+    
+    async def on_guild_available(self, guild: discord.Guild) -> None:
+        """Capture a structure baseline whenever a guild becomes available.
+        
+        Args:
+            guild: The guild that became available
+        """
+        self.counters.guild_added(guild)
+        self.snapshots.build(guild)
+    
+    async def on_member_join(self, member: discord.Member) -> None:
+        """Count a new member."""
+        self.counters.member_joined(member.guild.id)
+    
+    async def on_member_remove(self, member: discord.Member) -> None:
+        """Count a member leaving."""
+        self.counters.member_left(member.guild.id)
+    
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        """Keep the log channel index and snapshots current when a channel is created."""
+        self.channel_index.channel_created(channel)
+        self.snapshots.channel_changed(channel)
+    
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        """Keep the log channel index and snapshots current when a channel is deleted."""
+        self.channel_index.channel_deleted(channel)
+        self.snapshots.channel_deleted(channel)
+    
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        """Keep the log channel index and snapshots current when a channel changes."""
+        self.channel_index.channel_updated(before, after)
+        self.snapshots.channel_changed(after)
+    
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        """Record a new role in the guild snapshot."""
+        self.snapshots.role_changed(role)
+    
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        """Record a deleted role in the guild snapshot."""
+        self.snapshots.role_deleted(role)
+    
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        """Record a role change in the guild snapshot."""
+        self.snapshots.role_changed(after)
     
     async def on_command_error(self, ctx: commands.Context, error: commands.CommandError) -> None:
         """Global error handler for command errors.
@@ -268,12 +538,25 @@ class DiscordBot(commands.AutoShardedBot):
     async def close(self) -> None:
         """Cleanup before bot shutdown."""
         logger.info('Shutting down bot...')
+        logger.info(f'Guild config cache stats: {self.guild_config.stats()}')
+        logger.info(f'DM dispatcher stats: {self.dm_dispatcher.stats()}')
+        logger.info(f'Case log stats: {self.cases.stats()}')
+        logger.info(f'Member chunker stats: {self.member_chunker.stats()}')
+        
+        self.refresh_presence.cancel()
+        if self.ipc:
+            await self.ipc.close()
+        await self.scheduler.close()
+        await self.dm_dispatcher.close()
+        await self.cases.close()
         
         # Close aiohttp session
         if self.session:
             await self.session.close()
         
-        # Close database pool
+        # Flush snapshots and close database pool
+        await self.snapshots.close()
+        await self.guild_config.close()
         if self.db_pool:
             await self.db_pool.close()
         
@@ -281,25 +564,51 @@ class DiscordBot(commands.AutoShardedBot):
         logger.info('Bot shutdown complete')
 
 
-async def main() -> None:
-    """Main entry point for the bot."""
-    bot = DiscordBot()
+async def main(
+    cluster_id: Optional[int] = None,
+    shard_ids: Optional[List[int]] = None,
+    shard_count: Optional[int] = None,
+    ipc_path: Optional[str] = None
+) -> None:
+    """Main entry point for the bot.
+    
+    Without arguments the bot runs every shard in this process. The cluster
+    launcher passes the shards and IPC socket of one cluster instead.
+    """
+    config = load_config()
+    log_options = dict(config.get('logging') or {})
+    if cluster_id is not None and log_options.get('file', 'bot.log'):
+        # Rotation is per process, so every cluster writes its own file
+        root, ext = os.path.splitext(log_options.get('file', 'bot.log'))
+        log_options['file'] = f'{root}-cluster{cluster_id}{ext}'
+    setup_logging(log_options)
+    try:
+        bot = DiscordBot(config, shard_ids, shard_count, cluster_id, ipc_path)
+    except ValueError as e:
+        logger.error(f'Invalid configuration: {e}')
+        sys.exit(1)
     
     try:
         # Get token from environment or config
-        token = os.getenv('DISCORD_BOT_TOKEN')
-        if not token:
-            # Load config first to get token
-            with open('config/config.json', 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            token = config.get('token')
-        
+        token = os.getenv('DISCORD_BOT_TOKEN') or config.get('token')
         if not token:
             logger.error('No bot token found! Set DISCORD_BOT_TOKEN env var or add to config.json')
             sys.exit(1)
         
+        # The launcher stops clusters with SIGTERM
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        
         async with bot:
-            await bot.start(token)
+            runner = asyncio.create_task(bot.start(token))
+            stopper = asyncio.create_task(stop.wait())
+            await asyncio.wait((runner, stopper), return_when=asyncio.FIRST_COMPLETED)
+            stopper.cancel()
+            if stop.is_set():
+                logger.info('Received SIGTERM, shutting down')
+                await bot.close()
+            # Re-raises anything bot.start() failed with
+            await runner
     except KeyboardInterrupt:
         logger.info('Received keyboard interrupt')
     except Exception as e:
@@ -310,7 +619,14 @@ async def main() -> None:
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the bot, or one cluster of it (see launcher.py)')
+    parser.add_argument('--cluster-id', type=int, default=None)
+    parser.add_argument('--shard-ids', type=lambda value: [int(shard) for shard in value.split(',')], default=None)
+    parser.add_argument('--shard-count', type=int, default=None)
+    parser.add_argument('--ipc-path', default=None)
+    args = parser.parse_args()
+    
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.cluster_id, args.shard_ids, args.shard_count, args.ipc_path))
     except KeyboardInterrupt:
         logger.info('Bot stopped by user')
@@ -0,0 +1,116 @@
+"""
+Consistency of the in-memory anti-nuke whitelist with the antinuke_whitelist table.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.whitelist import WhitelistIndex  # noqa: E402
+
+
+class FakePool:
+    """Just enough of asyncpg.Pool for WhitelistIndex, backed by a set of (guild_id, user_id)."""
+
+    def __init__(self, rows=()):
+        self.rows = set(rows)
+        self.fail = False
+
+    async def fetch(self, query, *args):
+        return [{'guild_id': guild_id, 'user_id': user_id} for guild_id, user_id in self.rows]
+
+    async def execute(self, query, *args):
+        if self.fail:
+            raise ConnectionError('database unavailable')
+        if query.lstrip().startswith('INSERT'):
+            self.rows.add((args[0], args[1]))
+        elif query.lstrip().startswith('DELETE'):
+            self.rows.discard((args[0], args[1]))
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def table_of(pool, guild_id):
+    return frozenset(user_id for row_guild, user_id in pool.rows if row_guild == guild_id)
+
+
+def test_load_matches_table():
+    pool = FakePool({(1, 10), (1, 11), (2, 20)})
+    index = WhitelistIndex()
+    run(index.load(pool))
+
+    assert index.members(1) == table_of(pool, 1) == {10, 11}
+    assert index.members(2) == {20}
+    assert index.contains(1, 10)
+    assert not index.contains(2, 10)
+
+
+def test_add_and_remove_keep_index_and_table_in_sync():
+    pool = FakePool()
+    index = WhitelistIndex()
+    run(index.load(pool))
+
+    assert run(index.add(1, 10, added_by=99))
+    assert run(index.add(1, 11, added_by=99))
+    assert not run(index.add(1, 10, added_by=99))
+    assert index.members(1) == table_of(pool, 1) == {10, 11}
+
+    assert run(index.remove(1, 10))
+    assert not run(index.remove(1, 10))
+    assert index.members(1) == table_of(pool, 1) == {11}
+
+    assert run(index.remove(1, 11))
+    assert index.members(1) == table_of(pool, 1) == frozenset()
+
+
+def test_reload_after_changes_gives_same_index():
+    pool = FakePool({(1, 10)})
+    index = WhitelistIndex()
+    run(index.load(pool))
+    run(index.add(1, 11, added_by=99))
+    run(index.remove(1, 10))
+
+    reloaded = WhitelistIndex()
+    run(reloaded.load(pool))
+    assert reloaded.members(1) == index.members(1) == {11}
+
+
+def test_failed_add_leaves_index_unchanged():
+    pool = FakePool({(1, 10)})
+    index = WhitelistIndex()
+    run(index.load(pool))
+    pool.fail = True
+
+    with pytest.raises(ConnectionError):
+        run(index.add(1, 11, added_by=99))
+    assert not index.contains(1, 11)
+    assert index.members(1) == table_of(pool, 1) == {10}
+
+
+def test_failed_remove_leaves_index_unchanged():
+    pool = FakePool({(1, 10)})
+    index = WhitelistIndex()
+    run(index.load(pool))
+    pool.fail = True
+
+    with pytest.raises(ConnectionError):
+        run(index.remove(1, 10))
+    assert index.contains(1, 10)
+    assert index.members(1) == table_of(pool, 1) == {10}
+
+
+def test_members_is_a_snapshot():
+    pool = FakePool({(1, 10)})
+    index = WhitelistIndex()
+    run(index.load(pool))
+
+    listed = index.members(1)
+    run(index.add(1, 11, added_by=99))
+    assert listed == {10}
+    assert index.members(1) == {10, 11}
@@ -0,0 +1 @@
+"""Shared helpers and services used by the bot core and its cogs."""
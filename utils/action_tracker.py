@@ -0,0 +1,154 @@
+"""
+Sliding-window rate detector for destructive moderator actions.
+
+Every (guild, actor, action) key owns a fixed-size ring buffer holding the
+timestamps of its last ``limit`` actions. Recording an action overwrites the
+oldest slot, and the threshold is crossed when that oldest timestamp is still
+inside the window, so each event costs O(1) regardless of how many arrive.
+Keys are kept in LRU order and capped, and idle keys are evicted on a timer,
+so memory stays bounded across thousands of guilds.
+"""
+
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+CHANNEL_DELETE = 'channel_delete'
+ROLE_DELETE = 'role_delete'
+BAN = 'ban'
+KICK = 'kick'
+WEBHOOK_CREATE = 'webhook_create'
+
+# action -> (maximum actions, window in seconds)
+DEFAULT_THRESHOLDS: Dict[str, Tuple[int, float]] = {
+    CHANNEL_DELETE: (3, 10.0),
+    ROLE_DELETE: (3, 10.0),
+    BAN: (5, 10.0),
+    KICK: (5, 10.0),
+    WEBHOOK_CREATE: (5, 30.0),
+}
+
+TrackerKey = Tuple[int, int, str]
+
+
+class TimestampRing:
+    """Fixed-size ring buffer of action timestamps."""
+
+    __slots__ = ('times', 'index', 'count', 'last_seen')
+
+    def __init__(self, size: int) -> None:
+        self.times = array('d', bytes(8 * size))
+        self.index = 0
+        self.count = 0
+        self.last_seen = 0.0
+
+    def push(self, now: float) -> float:
+        """Store ``now`` and return the oldest timestamp still in the buffer."""
+        size = len(self.times)
+        self.times[self.index] = now
+        self.index = (self.index + 1) % size
+        self.count = min(self.count + 1, size)
+        self.last_seen = now
+        return self.times[self.index] if self.count == size else self.times[0]
+
+
+class ActionTracker:
+    """Detects actors exceeding per-guild action thresholds."""
+
+    def __init__(self, max_keys: int = 50000) -> None:
+        """Create an empty tracker.
+
+        Args:
+            max_keys: Maximum number of (guild, actor, action) keys kept in memory
+        """
+        self.max_keys = max_keys
+        self._rings: 'OrderedDict[TrackerKey, TimestampRing]' = OrderedDict()
+        self._overrides: Dict[int, Dict[str, Tuple[int, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def threshold(self, guild_id: int, action: str) -> Tuple[int, float]:
+        """Return the (limit, window) pair in force for a guild and action."""
+        overrides = self._overrides.get(guild_id)
+        if overrides and action in overrides:
+            return overrides[action]
+        return DEFAULT_THRESHOLDS[action]
+
+    def set_threshold(self, guild_id: int, action: str, limit: int, window: float) -> None:
+        """Override the threshold for one action in one guild.
+
+        Raises:
+            ValueError: If the action is unknown or the values are out of range
+        """
+        if action not in DEFAULT_THRESHOLDS:
+            raise ValueError(f'Unknown action: {action}')
+        if limit < 1 or window <= 0:
+            raise ValueError('limit must be at least 1 and window must be positive')
+        self._overrides.setdefault(guild_id, {})[action] = (limit, window)
+        # Buffers sized for the old limit are rebuilt on the next event.
+        for key in [key for key in self._rings if key[0] == guild_id and key[2] == action]:
+            del self._rings[key]
+
+    def record(self, guild_id: int, actor_id: int, action: str, now: Optional[float] = None) -> bool:
+        """Record one action and report whether the actor crossed the threshold.
+
+        Args:
+            guild_id: The guild the action happened in
+            actor_id: The user who performed it
+            action: One of the action constants in this module
+            now: Monotonic timestamp of the action, defaults to the current time
+
+        Returns:
+            True if the actor performed ``limit`` actions within ``window`` seconds
+        """
+        if now is None:
+            now = time.monotonic()
+        limit, window = self.threshold(guild_id, action)
+
+        key = (guild_id, actor_id, action)
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = TimestampRing(limit)
+            if len(self._rings) > self.max_keys:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(key)
+
+        oldest = ring.push(now)
+        return ring.count >= limit and now - oldest <= window
+
+    def reset(self, guild_id: int, actor_id: int, action: str) -> None:
+        """Forget an actor's history for one action, e.g. after responding to it."""
+        self._rings.pop((guild_id, actor_id, action), None)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop keys whose newest action is older than their window.
+
+        Returns:
+            The number of evicted keys
+        """
+        if now is None:
+            now = time.monotonic()
+        idle = [
+            key for key, ring in self._rings.items()
+            if now - ring.last_seen > self.threshold(key[0], key[2])[1]
+        ]
+        for key in idle:
+            del self._rings[key]
+        return len(idle)
+
+    def forget_guild(self, guild_id: int) -> None:
+        """Drop all state for a guild."""
+        self._overrides.pop(guild_id, None)
+        for key in [key for key in self._rings if key[0] == guild_id]:
+            del self._rings[key]
+
+    def load_overrides(self, rows) -> None:
+        """Bulk load thresholds from ``antinuke_thresholds`` rows."""
+        for row in rows:
+            if row['action'] in DEFAULT_THRESHOLDS:
+                self._overrides.setdefault(row['guild_id'], {})[row['action']] = (
+                    row['max_actions'], float(row['window_seconds'])
+                )
@@ -0,0 +1,220 @@
+"""
+Coalescing audit-log fetcher used to attribute destructive actions.
+
+Asking for ``audit_logs(limit=1)`` once per event costs one REST call per
+event and often returns the wrong entry when several actions land at the
+same time. The fetcher instead debounces concurrent lookups for the same
+guild and action into a single paged fetch of everything newer than the
+last entry it has seen, caches the entries by target id for a short TTL,
+and answers each lookup from that cache.
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[int, discord.AuditLogAction]
+
+
+class AuditLogFetcher:
+    """Per-guild, per-action audit log cache with request coalescing."""
+
+    def __init__(self, ttl: float = 60.0, debounce: float = 0.5, max_entries: int = 500) -> None:
+        """Create an empty fetcher.
+
+        Args:
+            ttl: Seconds an entry stays cached after it was fetched
+            debounce: Seconds to wait for more lookups before fetching
+            max_entries: Maximum number of entries read in one fetch
+        """
+        self.ttl = ttl
+        self.debounce = debounce
+        self.max_entries = max_entries
+        self._entries: Dict[CacheKey, Dict[int, Tuple[discord.AuditLogEntry, float]]] = {}
+        self._last_id: Dict[CacheKey, int] = {}
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._pulled: Dict[CacheKey, int] = {}
+        # Strong references to running fetches; a collected task would leave its waiters hanging
+        self._tasks: Set[asyncio.Task] = set()
+        self.fetches = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(
+        self,
+        guild: discord.Guild,
+        action: discord.AuditLogAction,
+        target_id: int
+    ) -> Optional[discord.AuditLogEntry]:
+        """Return the audit log entry for an action on ``target_id``.
+
+        Args:
+            guild: The guild the action happened in
+            action: The audit log action type
+            target_id: The id of the affected channel, role, member or webhook
+
+        Returns:
+            The matching entry, or None if it could not be found
+
+        Raises:
+            discord.Forbidden: If the bot cannot view the audit log
+        """
+        key = (guild.id, action)
+        entry = self._lookup(key, target_id)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        # The entry may be written after a fetch already started, so allow one retry.
+        for _ in range(2):
+            await self._refresh(guild, action)
+            entry = self._lookup(key, target_id)
+            if entry is not None:
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def pull(self, guild: discord.Guild, action: discord.AuditLogAction) -> List[discord.AuditLogEntry]:
+        """Return entries for an action that earlier calls to ``pull`` have not returned.
+
+        Used for events that do not identify their target, such as
+        ``on_webhooks_update``.
+
+        Args:
+            guild: The guild to read
+            action: The audit log action type
+
+        Returns:
+            New entries, oldest first
+        """
+        key = (guild.id, action)
+        await self._refresh(guild, action)
+        last = self._pulled.get(key, 0)
+        entries = sorted(
+            (entry for entry, _ in self._entries.get(key, {}).values() if entry.id > last),
+            key=lambda entry: entry.id
+        )
+        if entries:
+            self._pulled[key] = entries[-1].id
+        return entries
+
+    def _lookup(self, key: CacheKey, target_id: int) -> Optional[discord.AuditLogEntry]:
+        cached = self._entries.get(key, {}).get(target_id)
+        if cached is None:
+            return None
+        entry, expires = cached
+        if expires < asyncio.get_running_loop().time():
+            return None
+        return entry
+
+    async def _refresh(self, guild: discord.Guild, action: discord.AuditLogAction) -> None:
+        """Join the pending fetch for this guild and action, or schedule one."""
+        key = (guild.id, action)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            task = asyncio.create_task(self._fetch(guild, action, future))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        await asyncio.shield(future)
+
+    async def _fetch(self, guild: discord.Guild, action: discord.AuditLogAction, future: asyncio.Future) -> None:
+        """Read every entry newer than the last one seen, after a short debounce."""
+        key = (guild.id, action)
+        try:
+            await asyncio.sleep(self.debounce)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            # Lookups arriving from here on need a fetch that starts after them.
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        loop = asyncio.get_running_loop()
+        try:
+            # Never look further back than the TTL, even after a long quiet period.
+            floor_id = discord.utils.time_snowflake(discord.utils.utcnow() - timedelta(seconds=self.ttl))
+            after = discord.Object(id=max(self._last_id.get(key, 0), floor_id))
+
+            self.fetches += 1
+            expires = loop.time() + self.ttl
+            cache = self._entries.setdefault(key, {})
+            async for entry in guild.audit_logs(limit=self.max_entries, action=action, after=after):
+                if entry.target is not None:
+                    cache[entry.target.id] = (entry, expires)
+                if entry.id > self._last_id.get(key, 0):
+                    self._last_id[key] = entry.id
+
+            self._expire(key)
+            future.set_result(None)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case every waiter was cancelled.
+            future.exception()
+
+    def _expire(self, key: CacheKey) -> None:
+        """Drop cached entries whose TTL has passed."""
+        now = asyncio.get_running_loop().time()
+        cache = self._entries.get(key)
+        if not cache:
+            return
+        for target_id in [target_id for target_id, (_, expires) in cache.items() if expires < now]:
+            del cache[target_id]
+        if not cache:
+            del self._entries[key]
+
+    def evict_idle(self) -> int:
+        """Drop expired entries and the read positions of actions that have gone quiet.
+
+        A position older than the TTL no longer changes where the next fetch
+        starts, and once a key has no cached entries left nothing can be
+        pulled twice, so neither needs to be kept.
+
+        Returns:
+            The number of keys dropped
+        """
+        floor_id = discord.utils.time_snowflake(discord.utils.utcnow() - timedelta(seconds=self.ttl))
+        for key in list(self._entries):
+            self._expire(key)
+        idle = [key for key, last_id in self._last_id.items() if last_id < floor_id and key not in self._inflight]
+        for key in idle:
+            del self._last_id[key]
+        for key in [key for key, last_id in self._pulled.items() if last_id < floor_id and key not in self._entries]:
+            del self._pulled[key]
+        return len(idle)
+
+    async def close(self) -> None:
+        """Cancel running fetches; their waiters see the cancellation."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def forget_guild(self, guild_id: int) -> None:
+        """Drop all cached entries for a guild."""
+        for key in [key for key in self._entries if key[0] == guild_id]:
+            del self._entries[key]
+        for key in [key for key in self._last_id if key[0] == guild_id]:
+            del self._last_id[key]
+        for key in [key for key in self._pulled if key[0] == guild_id]:
+            del self._pulled[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return fetch and lookup counters."""
+        return {
+            'fetches': self.fetches,
+            'hits': self.hits,
+            'misses': self.misses,
+            'cached': sum(len(entries) for entries in self._entries.values()),
+        }
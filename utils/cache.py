@@ -0,0 +1,105 @@
+"""
+In-memory caching primitives shared across the bot.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss accounting.
+    
+    Lookups and inserts are O(1). Once ``maxsize`` entries are stored, the
+    least recently used entry is evicted to make room for a new one.
+    """
+    
+    __slots__ = ('maxsize', 'hits', 'misses', 'evictions', '_data')
+    
+    def __init__(self, maxsize: int = 10000) -> None:
+        """Create an empty cache.
+        
+        Args:
+            maxsize: Maximum number of entries kept in memory
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for ``key`` and mark it as recently used.
+        
+        Args:
+            key: The cache key
+            default: Value returned when the key is not cached
+            
+        Returns:
+            The cached value, or ``default`` on a miss
+        """
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value without touching recency or counters."""
+        return self._data.get(key, default)
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or replace ``key``, evicting the oldest entry if full.
+        
+        Args:
+            key: The cache key
+            value: The value to store
+        """
+        data = self._data
+        if key in data:
+            data.move_to_end(key)
+        elif len(data) >= self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+        data[key] = value
+    
+    def update(self, items: Iterable[Tuple[Hashable, Any]]) -> None:
+        """Bulk insert ``(key, value)`` pairs."""
+        for key, value in items:
+            self.set(key, value)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove ``key`` and return its value, if present."""
+        return self._data.pop(key, default)
+    
+    def clear(self) -> None:
+        """Drop every entry. Counters are kept."""
+        self._data.clear()
+    
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Return a snapshot of the cache counters.
+        
+        Returns:
+            Dictionary with size, capacity, hits, misses, evictions and hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': (self.hits / lookups) if lookups else None,
+        }
@@ -0,0 +1,155 @@
+"""
+Named gateway cache profiles.
+
+Intents, the member cache flags, startup chunking and the message cache
+all decide how much state each shard keeps, and they only make sense
+together: caching members without the members intent keeps nothing, and
+chunking every guild with presences on keeps everything. A profile sets
+all four at once:
+
+- ``minimal``: no member or presence events and no member cache. Commands
+  still work; join/leave listeners (raid gate, join logs) do not fire.
+- ``moderation``: member events and a cache of members the bot has seen,
+  without presences or startup chunking. Guilds are chunked on demand by
+  ``utils.member_chunker`` when a command needs their full member list.
+- ``full``: every intent, every member and presence cached, every guild
+  chunked at startup. This is what the bot did before profiles existed.
+
+``benchmarks/bench_cache_profiles.py`` measures what each profile costs.
+"""
+
+import os
+import sys
+from typing import Any, Callable, Dict, Optional
+
+import discord
+
+
+class CacheProfile:
+    """The client options that decide how much gateway state is cached."""
+
+    __slots__ = ('name', 'description', 'intents', 'member_cache_flags', 'chunk_guilds_at_startup', 'max_messages')
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        intents: Callable[[], discord.Intents],
+        member_cache_flags: Callable[[discord.Intents], discord.MemberCacheFlags],
+        chunk_guilds_at_startup: bool,
+        max_messages: Optional[int]
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.intents = intents
+        self.member_cache_flags = member_cache_flags
+        self.chunk_guilds_at_startup = chunk_guilds_at_startup
+        self.max_messages = max_messages
+
+    def client_options(self, max_messages: Optional[int] = None) -> Dict[str, Any]:
+        """Return keyword arguments for ``commands.Bot``.
+
+        Args:
+            max_messages: Message cache size overriding the profile's own; 0 disables it
+        """
+        intents = self.intents()
+        if max_messages is None:
+            max_messages = self.max_messages
+        return {
+            'intents': intents,
+            'member_cache_flags': self.member_cache_flags(intents),
+            'chunk_guilds_at_startup': self.chunk_guilds_at_startup,
+            'max_messages': max_messages or None,
+        }
+
+
+def _minimal_intents() -> discord.Intents:
+    intents = discord.Intents.default()
+    intents.message_content = True
+    # Typing and voice events are frequent and nothing reads them
+    intents.typing = False
+    intents.voice_states = False
+    return intents
+
+
+def _moderation_intents() -> discord.Intents:
+    intents = _minimal_intents()
+    intents.members = True
+    return intents
+
+
+PROFILES: Dict[str, CacheProfile] = {
+    profile.name: profile for profile in (
+        CacheProfile(
+            'minimal',
+            'No member events or member cache',
+            _minimal_intents,
+            lambda intents: discord.MemberCacheFlags.none(),
+            chunk_guilds_at_startup=False,
+            max_messages=None
+        ),
+        CacheProfile(
+            'moderation',
+            'Member events, members cached as they are seen, no presences',
+            _moderation_intents,
+            discord.MemberCacheFlags.from_intents,
+            chunk_guilds_at_startup=False,
+            max_messages=1000
+        ),
+        CacheProfile(
+            'full',
+            'Every intent, all members and presences, chunked at startup',
+            discord.Intents.all,
+            lambda intents: discord.MemberCacheFlags.all(),
+            chunk_guilds_at_startup=True,
+            max_messages=1000
+        ),
+    )
+}
+
+DEFAULT_PROFILE = 'moderation'
+
+
+def get_profile(name: str) -> CacheProfile:
+    """Look up a profile by name.
+
+    Raises:
+        ValueError: If there is no profile with that name
+    """
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f'Unknown cache profile {name!r}; expected one of {", ".join(PROFILES)}') from None
+
+
+def process_memory() -> Optional[int]:
+    """Return the resident set size of this process in bytes, if it can be read."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; reported in bytes on macOS, kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def cache_report(client: discord.Client) -> Dict[str, int]:
+    """Count what the client is currently caching."""
+    members = 0
+    presences = 0
+    for guild in client.guilds:
+        members += len(guild.members)
+        presences += sum(1 for member in guild.members if member.activities or member.raw_status != 'offline')
+    return {
+        'guilds': len(client.guilds),
+        'members': members,
+        'presences': presences,
+        'users': len(client.users),
+        'messages': len(client.cached_messages),
+        'rss_bytes': process_memory() or 0,
+    }
@@ -0,0 +1,231 @@
+"""
+Moderation case log backed by the ``mod_cases`` table.
+
+Every moderation action becomes a case with a number that is sequential
+within its guild. Numbers are handed out from an in-memory counter, seeded
+once per guild from the primary key index, so recording a case does not
+touch the database. Rows are queued and written by a single background
+task: small batches with one ``INSERT ... SELECT FROM unnest(...)``, large
+ones (after a mass ban, say) with ``COPY``.
+
+A guild is only ever handled by the process that owns its shard, so the
+per-guild counters never race with another writer.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('guild_id', 'case_number', 'action', 'user_id', 'moderator_id', 'reason', 'duration_seconds', 'created_at')
+CaseRow = Tuple[int, int, str, int, int, Optional[str], Optional[int], datetime]
+
+# One statement per batch; RETURNING tells which rows were skipped as duplicates
+INSERT_SQL = f'''
+    INSERT INTO mod_cases ({', '.join(COLUMNS)})
+    SELECT * FROM unnest(
+        $1::BIGINT[], $2::INTEGER[], $3::VARCHAR[], $4::BIGINT[],
+        $5::BIGINT[], $6::TEXT[], $7::INTEGER[], $8::TIMESTAMP[]
+    )
+    ON CONFLICT (guild_id, case_number) DO NOTHING
+    RETURNING guild_id, case_number
+'''
+
+
+class CaseLog:
+    """Numbers moderation cases and writes them in batches."""
+
+    def __init__(
+        self,
+        flush_interval: float = 2.0,
+        batch_size: int = 500,
+        copy_threshold: int = 200,
+        max_pending: int = 50000
+    ) -> None:
+        """Create a case log. Call :meth:`start` once the database is ready.
+
+        Args:
+            flush_interval: Seconds to wait for more cases before writing a partial batch
+            batch_size: Queued cases that trigger an immediate write
+            copy_threshold: Batches at least this large are written with COPY
+            max_pending: Cases kept queued while the database is failing
+        """
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.copy_threshold = copy_threshold
+        self.max_pending = max_pending
+        self.pool: Optional[asyncpg.Pool] = None
+        self._last: Dict[int, int] = {}
+        self._loading: Dict[int, asyncio.Task] = {}
+        self._pending: List[CaseRow] = []
+        # Rows taken off the queue by a flush that is still writing them
+        self._in_flight: List[CaseRow] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.conflicts = 0
+
+    @property
+    def available(self) -> bool:
+        return self.pool is not None
+
+    def start(self, pool: Optional[asyncpg.Pool]) -> None:
+        self.pool = pool
+        if pool and self._task is None:
+            self._task = asyncio.create_task(self._worker())
+
+    async def _load_last(self, guild_id: int) -> int:
+        return await self.pool.fetchval(
+            'SELECT COALESCE(MAX(case_number), 0) FROM mod_cases WHERE guild_id = $1',
+            guild_id
+        )
+
+    async def _reserve(self, guild_id: int, count: int) -> int:
+        """Reserve ``count`` case numbers and return the first."""
+        if guild_id not in self._last:
+            task = self._loading.get(guild_id)
+            if task is None:
+                task = self._loading[guild_id] = asyncio.create_task(self._load_last(guild_id))
+            try:
+                last = await asyncio.shield(task)
+            finally:
+                if task.done():
+                    self._loading.pop(guild_id, None)
+            self._last.setdefault(guild_id, last)
+        first = self._last[guild_id] + 1
+        self._last[guild_id] += count
+        return first
+
+    async def record(
+        self,
+        guild_id: int,
+        action: str,
+        user_id: int,
+        moderator_id: int,
+        reason: Optional[str] = None,
+        duration_seconds: Optional[int] = None
+    ) -> Optional[int]:
+        """Queue a case.
+
+        Returns:
+            The case number, or None if no database is configured
+        """
+        numbers = await self.record_many(guild_id, action, [user_id], moderator_id, reason, duration_seconds)
+        return numbers[0] if numbers else None
+
+    async def record_many(
+        self,
+        guild_id: int,
+        action: str,
+        user_ids: Iterable[int],
+        moderator_id: int,
+        reason: Optional[str] = None,
+        duration_seconds: Optional[int] = None
+    ) -> List[int]:
+        """Queue one case per user for an action applied to many users at once.
+
+        Returns:
+            The case numbers, in the order of ``user_ids``
+        """
+        if not self.pool:
+            return []
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        first = await self._reserve(guild_id, len(user_ids))
+        now = datetime.utcnow()
+        self._pending.extend(
+            (guild_id, first + i, action, user_id, moderator_id, reason, duration_seconds, now)
+            for i, user_id in enumerate(user_ids)
+        )
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return list(range(first, first + len(user_ids)))
+
+    async def _worker(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f'Failed to write moderation cases: {e}')
+
+    async def flush(self) -> None:
+        """Write every queued case now.
+
+        Cases that could not be written stay queued, up to ``max_pending``.
+        """
+        async with self._write_lock:
+            if not self._pending or not self.pool:
+                return
+            rows, self._pending = self._pending, []
+            self._in_flight = rows
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    batch = rows[start:start + self.batch_size]
+                    self.written += await self._write(batch)
+            except Exception:
+                unwritten = rows[start:] + self._pending
+                overflow = len(unwritten) - self.max_pending
+                if overflow > 0:
+                    unwritten = unwritten[overflow:]
+                    self.dropped += overflow
+                self._pending = unwritten
+                raise
+            finally:
+                self._in_flight = []
+
+    async def _write(self, rows: List[CaseRow]) -> int:
+        """Insert a batch and return the number of rows written."""
+        if len(rows) >= self.copy_threshold:
+            try:
+                await self.pool.copy_records_to_table('mod_cases', records=rows, columns=COLUMNS)
+                return len(rows)
+            except asyncpg.UniqueViolationError:
+                # COPY is all or nothing; insert again, skipping and counting the duplicates
+                pass
+        inserted = await self.pool.fetch(INSERT_SQL, *zip(*rows))
+        if len(inserted) < len(rows):
+            stored = {(row['guild_id'], row['case_number']) for row in inserted}
+            skipped = [(row[0], row[1]) for row in rows if (row[0], row[1]) not in stored]
+            self.conflicts += len(skipped)
+            logger.warning(f'Dropped {len(skipped)} moderation case(s) whose number was already taken: {skipped[:10]}')
+        return len(inserted)
+
+    def forget_guild(self, guild_id: int) -> None:
+        # Only safe once nothing for the guild is queued or being written, or numbers would repeat
+        if not any(row[0] == guild_id for row in self._pending) and not any(row[0] == guild_id for row in self._in_flight):
+            self._last.pop(guild_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'guilds': len(self._last),
+            'pending': len(self._pending),
+            'written': self.written,
+            'dropped': self.dropped,
+            'conflicts': self.conflicts,
+        }
+
+    async def close(self) -> None:
+        """Stop the writer and write what is left."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f'Failed to write {len(self._pending)} moderation case(s) on shutdown: {e}')
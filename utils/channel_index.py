@@ -0,0 +1,94 @@
+"""
+Per-guild index of well-known log channels.
+
+Resolving a log channel used to scan ``guild.text_channels`` (which sorts a
+fresh list on every access) for each event. The index keeps a
+``name -> channel id`` map per guild for the fallback channel names and is
+maintained from channel create/delete/update events, so every lookup is a
+dictionary access followed by ``guild.get_channel``.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_CHANNEL_NAMES = ('mod-logs', 'anti-nuke-logs')
+
+
+class ChannelIndex:
+    """Tracks the ids of named log channels for every guild."""
+
+    def __init__(self, bot, names: Iterable[str] = DEFAULT_LOG_CHANNEL_NAMES) -> None:
+        """Create an empty index.
+
+        Args:
+            bot: The bot instance, used to read the guild configuration service
+            names: Channel names used as fallbacks when no log channel is configured
+        """
+        self.bot = bot
+        self.names = frozenset(names)
+        self._by_name: Dict[int, Dict[str, int]] = {}
+
+    def _build(self, guild: discord.Guild) -> Dict[str, int]:
+        """Index a guild's channels once, the first time it is needed."""
+        index: Dict[str, int] = {}
+        for channel in guild.channels:
+            if isinstance(channel, discord.TextChannel) and channel.name in self.names:
+                index.setdefault(channel.name, channel.id)
+        self._by_name[guild.id] = index
+        return index
+
+    def resolve(self, guild: discord.Guild, fallback_name: str) -> Optional[discord.TextChannel]:
+        """Return the log channel for a guild.
+
+        The configured ``log_channel`` wins; otherwise the channel named
+        ``fallback_name`` is used if the guild has one.
+
+        Args:
+            guild: The guild to resolve the channel for
+            fallback_name: Channel name used when no log channel is configured
+
+        Returns:
+            The log channel, or None if the guild has none
+        """
+        config = self.bot.guild_config.get(guild.id)
+        if config.log_channel:
+            channel = guild.get_channel(config.log_channel)
+            if isinstance(channel, discord.TextChannel):
+                return channel
+
+        index = self._by_name.get(guild.id)
+        if index is None:
+            index = self._build(guild)
+        channel_id = index.get(fallback_name)
+        return guild.get_channel(channel_id) if channel_id else None
+
+    def channel_created(self, channel: discord.abc.GuildChannel) -> None:
+        """Record a new channel if it carries one of the indexed names."""
+        index = self._by_name.get(channel.guild.id)
+        if index is not None and isinstance(channel, discord.TextChannel) and channel.name in self.names:
+            index.setdefault(channel.name, channel.id)
+
+    def channel_deleted(self, channel: discord.abc.GuildChannel) -> None:
+        """Forget a deleted channel, picking another channel with the same name if any."""
+        index = self._by_name.get(channel.guild.id)
+        if index is None or index.get(channel.name) != channel.id:
+            return
+        del index[channel.name]
+        for other in channel.guild.channels:
+            if isinstance(other, discord.TextChannel) and other.name == channel.name and other.id != channel.id:
+                index[channel.name] = other.id
+                break
+
+    def channel_updated(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        """Follow channel renames."""
+        if before.name != after.name:
+            self.channel_deleted(before)
+            self.channel_created(after)
+
+    def forget_guild(self, guild_id: int) -> None:
+        """Drop a guild's index, e.g. after the bot leaves it."""
+        self._by_name.pop(guild_id, None)
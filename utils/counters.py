@@ -0,0 +1,66 @@
+"""
+Incrementally maintained guild and member totals.
+
+Counting members by walking ``get_all_members()`` is a pass over every
+cached member and stalls the event loop on large bots. Instead each
+guild's member count is recorded when the guild becomes available and
+adjusted on member joins and leaves, so the totals are always one lookup
+away. Clusters report their own totals over IPC and :meth:`combine` adds
+them up.
+"""
+
+from typing import Dict, Iterable
+
+import discord
+
+
+class BotCounters:
+    """Guild, member and user totals of one process."""
+
+    def __init__(self) -> None:
+        self._member_counts: Dict[int, int] = {}
+        self.members = 0
+
+    @property
+    def guilds(self) -> int:
+        return len(self._member_counts)
+
+    def guild_added(self, guild: discord.Guild) -> None:
+        """Record a joined or (re)available guild, resyncing its member count."""
+        count = guild.member_count or 0
+        self.members += count - self._member_counts.get(guild.id, 0)
+        self._member_counts[guild.id] = count
+
+    def guild_removed(self, guild_id: int) -> None:
+        self.members -= self._member_counts.pop(guild_id, 0)
+
+    def member_joined(self, guild_id: int) -> None:
+        if guild_id in self._member_counts:
+            self._member_counts[guild_id] += 1
+            self.members += 1
+
+    def member_left(self, guild_id: int) -> None:
+        if self._member_counts.get(guild_id, 0) > 0:
+            self._member_counts[guild_id] -= 1
+            self.members -= 1
+
+    def snapshot(self, users: int) -> Dict[str, int]:
+        """Return the totals.
+
+        Args:
+            users: Distinct users this process knows of, e.g. the size of the user cache
+        """
+        return {'guilds': self.guilds, 'members': self.members, 'users': users}
+
+    @staticmethod
+    def combine(snapshots: Iterable[Dict[str, int]]) -> Dict[str, int]:
+        """Add up the totals of several clusters.
+
+        Guilds and members add up exactly. Users are only distinct per
+        cluster, so someone sharing servers on two clusters counts twice.
+        """
+        total = {'guilds': 0, 'members': 0, 'users': 0}
+        for snapshot in snapshots:
+            for key in total:
+                total[key] += snapshot.get(key, 0)
+        return total
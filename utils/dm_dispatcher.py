@@ -0,0 +1,174 @@
+"""
+Background delivery of direct messages for moderation notices.
+
+DMs are slow and frequently fail because many users have them closed, so
+they are handed to a small pool of workers instead of being awaited inline.
+Callers that must notify the user before acting on them (kick, ban) wait on
+the returned future with a strict deadline; when the deadline passes the
+notice is cancelled, whether it is still queued or already being sent. Users
+whose DMs were rejected recently are kept in a negative cache and skipped.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class DMDispatcher:
+    """Bounded queue of DMs delivered by a fixed worker pool."""
+
+    def __init__(
+        self,
+        workers: int = 3,
+        max_queue: int = 500,
+        send_timeout: float = 5.0,
+        negative_ttl: float = 3600.0,
+        max_negative: int = 50000
+    ) -> None:
+        """Create a dispatcher. Call :meth:`start` from a running event loop.
+
+        Args:
+            workers: Number of concurrent senders
+            max_queue: Maximum number of queued DMs before new ones are dropped
+            send_timeout: Seconds a single send may take
+            negative_ttl: Seconds a user is skipped after a rejected DM
+            max_negative: Maximum number of users kept in the negative cache
+        """
+        self.workers = workers
+        self.send_timeout = send_timeout
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._tasks: List[asyncio.Task] = []
+        self._negative: 'OrderedDict[int, float]' = OrderedDict()
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.cancelled = 0
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _is_blocked(self, user_id: int) -> bool:
+        expires = self._negative.get(user_id)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._negative[user_id]
+            return False
+        return True
+
+    def _block(self, user_id: int) -> None:
+        self._negative[user_id] = time.monotonic() + self.negative_ttl
+        self._negative.move_to_end(user_id)
+        if len(self._negative) > self.max_negative:
+            self._negative.popitem(last=False)
+
+    def notify(self, user: discord.abc.User, **kwargs: Any) -> Optional[asyncio.Future]:
+        """Queue a DM without waiting for it.
+
+        Args:
+            user: The recipient
+            **kwargs: Arguments forwarded to ``user.send``
+
+        Returns:
+            A future resolving to True if the DM was delivered, or None if it
+            was skipped because the user rejects DMs or the queue is full
+        """
+        if self._is_blocked(user.id):
+            self.skipped += 1
+            return None
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((user, kwargs, future))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return None
+        return future
+
+    async def notify_before(self, user: discord.abc.User, deadline: float = 3.0, **kwargs: Any) -> bool:
+        """Queue a DM and wait until it is delivered or ``deadline`` seconds pass.
+
+        Use this before actions that remove the user's ability to receive the
+        DM. If the deadline passes first the DM is cancelled, including a send
+        already in progress, so it is not delivered after the action (short of
+        a request Discord has already accepted).
+
+        Returns:
+            True if the DM was delivered in time
+        """
+        future = self.notify(user, **kwargs)
+        if future is None:
+            return False
+        try:
+            return await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            return False
+
+    async def _worker(self) -> None:
+        while True:
+            user, kwargs, future = await self._queue.get()
+            try:
+                if future.done():
+                    continue
+                # Race the send against the caller giving up, so a deadline also stops a send in flight
+                send = asyncio.create_task(user.send(**kwargs))
+                try:
+                    done, _ = await asyncio.wait({send, future}, timeout=self.send_timeout, return_when=asyncio.FIRST_COMPLETED)
+                except asyncio.CancelledError:
+                    send.cancel()
+                    raise
+                if send not in done:
+                    send.cancel()
+                    await asyncio.gather(send, return_exceptions=True)
+                    if future.done():
+                        self.cancelled += 1
+                    else:
+                        logger.debug(f'Timed out sending a DM to {user.id}')
+                        self.failed += 1
+                        future.set_result(False)
+                    continue
+                try:
+                    send.result()
+                    self.sent += 1
+                    delivered = True
+                except discord.Forbidden:
+                    # Only trust the rejection if the caller still wanted the DM; a late send
+                    # fails just because the user already left the guild
+                    if not future.done():
+                        self._block(user.id)
+                    self.failed += 1
+                    delivered = False
+                except discord.HTTPException as e:
+                    logger.debug(f'Failed to DM {user.id}: {e}')
+                    self.failed += 1
+                    delivered = False
+                if not future.done():
+                    future.set_result(delivered)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            'queued': self._queue.qsize(),
+            'sent': self.sent,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'dropped': self.dropped,
+            'cancelled': self.cancelled,
+            'blocked_users': len(self._negative),
+        }
@@ -0,0 +1,288 @@
+"""
+Shared per-guild configuration service backed by the ``guild_config`` table.
+
+Every row is loaded with one bulk query at startup and served from memory
+afterwards. Updates are written through to Postgres and announced with
+``NOTIFY`` so other shard processes refresh their copy of the row.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from typing import Any, Dict, Optional, Set
+
+import asyncpg
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'guild_config_changed'
+
+
+class GuildConfig:
+    """Compact in-memory copy of one ``guild_config`` row."""
+
+    __slots__ = ('guild_id', 'prefix', 'log_channel', 'mod_role', 'mute_role', 'antinuke_enabled', 'automod_enabled')
+
+    COLUMNS = ('prefix', 'log_channel', 'mod_role', 'mute_role', 'antinuke_enabled', 'automod_enabled')
+
+    def __init__(
+        self,
+        guild_id: int,
+        prefix: str = '!',
+        log_channel: Optional[int] = None,
+        mod_role: Optional[int] = None,
+        mute_role: Optional[int] = None,
+        antinuke_enabled: bool = False,
+        automod_enabled: bool = False
+    ) -> None:
+        self.guild_id = guild_id
+        self.prefix = prefix
+        self.log_channel = log_channel
+        self.mod_role = mod_role
+        self.mute_role = mute_role
+        self.antinuke_enabled = antinuke_enabled
+        self.automod_enabled = automod_enabled
+
+    @classmethod
+    def from_record(cls, record: asyncpg.Record, default_prefix: str = '!') -> 'GuildConfig':
+        """Build a config object from a ``guild_config`` row."""
+        return cls(
+            guild_id=record['guild_id'],
+            prefix=record['prefix'] or default_prefix,
+            log_channel=record['log_channel'],
+            mod_role=record['mod_role'],
+            mute_role=record['mute_role'],
+            antinuke_enabled=bool(record['antinuke_enabled']),
+            automod_enabled=bool(record['automod_enabled'])
+        )
+
+    def __repr__(self) -> str:
+        fields = ' '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'<GuildConfig {fields}>'
+
+
+class GuildConfigService:
+    """Read-mostly cache of guild configuration shared by the bot and its cogs.
+
+    Reads through :meth:`get` never touch the database, which makes it safe
+    to call from hot event handlers. :meth:`fetch` is the async variant used
+    where a single round-trip on a cold miss is acceptable.
+    """
+
+    SELECT_COLUMNS = 'guild_id, prefix, log_channel, mod_role, mute_role, antinuke_enabled, automod_enabled'
+
+    def __init__(self, default_prefix: str = '!', maxsize: int = 10000) -> None:
+        """Create an empty service. Call :meth:`start` once a pool exists.
+
+        Args:
+            default_prefix: Prefix used for guilds without a stored prefix
+            maxsize: Maximum number of guild records kept in memory
+        """
+        self.default_prefix = default_prefix
+        self.pool: Optional[asyncpg.Pool] = None
+        self._cache = LRUCache(maxsize)
+        self._complete = False
+        self._pending: Set[int] = set()
+        # Strong references to background reloads; the loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+        self._listen_conn: Optional[asyncpg.Connection] = None
+        self._instance_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+    async def start(self, pool: Optional[asyncpg.Pool]) -> None:
+        """Bulk load every config row and subscribe to change notifications.
+
+        Args:
+            pool: The bot's database pool, or None when running without a database
+        """
+        self.pool = pool
+        if not pool:
+            self._complete = True
+            return
+
+        try:
+            rows = await pool.fetch(
+                f'SELECT {self.SELECT_COLUMNS} FROM guild_config LIMIT $1',
+                self._cache.maxsize + 1
+            )
+            self._complete = len(rows) <= self._cache.maxsize
+            self._cache.update(
+                (row['guild_id'], GuildConfig.from_record(row, self.default_prefix))
+                for row in rows[:self._cache.maxsize]
+            )
+            logger.info(f'Loaded configuration for {len(self._cache)} guild(s)')
+        except Exception as e:
+            logger.error(f'Failed to load guild configuration: {e}')
+
+        try:
+            self._listen_conn = await pool.acquire()
+            await self._listen_conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        except Exception as e:
+            logger.error(f'Failed to subscribe to guild config notifications: {e}')
+            if self._listen_conn:
+                await pool.release(self._listen_conn)
+                self._listen_conn = None
+
+    async def close(self) -> None:
+        """Stop listening for notifications and release the listener connection."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._listen_conn and self.pool:
+            try:
+                await self._listen_conn.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+            finally:
+                await self.pool.release(self._listen_conn)
+                self._listen_conn = None
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _is_authoritative(self) -> bool:
+        """Whether a cache miss means the guild has no stored row."""
+        return not self.pool or (self._complete and self._cache.evictions == 0)
+
+    def _default(self, guild_id: int) -> GuildConfig:
+        return GuildConfig(guild_id, prefix=self.default_prefix)
+
+    def get(self, guild_id: int) -> GuildConfig:
+        """Return the cached config for a guild without awaiting the database.
+
+        On a cold miss the defaults are returned immediately and the row is
+        loaded in the background for the next caller.
+
+        Args:
+            guild_id: The guild to look up
+
+        Returns:
+            The guild's configuration
+        """
+        config = self._cache.get(guild_id)
+        if config is not None:
+            return config
+
+        config = self._default(guild_id)
+        if self._is_authoritative():
+            self._cache.set(guild_id, config)
+        elif guild_id not in self._pending:
+            self._pending.add(guild_id)
+            self._spawn(self._reload(guild_id))
+        return config
+
+    async def fetch(self, guild_id: int) -> GuildConfig:
+        """Return the config for a guild, loading it from the database on a miss.
+
+        Args:
+            guild_id: The guild to look up
+
+        Returns:
+            The guild's configuration
+        """
+        config = self._cache.get(guild_id)
+        if config is not None:
+            return config
+        if self._is_authoritative():
+            return self.get(guild_id)
+        return await self._reload(guild_id)
+
+    async def _reload(self, guild_id: int) -> GuildConfig:
+        """Refresh a single guild from the database and cache the result."""
+        try:
+            row = await self.pool.fetchrow(
+                f'SELECT {self.SELECT_COLUMNS} FROM guild_config WHERE guild_id = $1',
+                guild_id
+            )
+            config = GuildConfig.from_record(row, self.default_prefix) if row else self._default(guild_id)
+            self._cache.set(guild_id, config)
+            return config
+        except Exception as e:
+            logger.error(f'Failed to load config for guild {guild_id}: {e}')
+            return self._default(guild_id)
+        finally:
+            self._pending.discard(guild_id)
+
+    async def update(self, guild_id: int, **fields: Any) -> GuildConfig:
+        """Write config fields through to the database and the cache.
+
+        Args:
+            guild_id: The guild to update
+            **fields: Column names and their new values
+
+        Returns:
+            The updated configuration
+
+        Raises:
+            ValueError: If an unknown column name is passed
+        """
+        unknown = set(fields) - set(GuildConfig.COLUMNS)
+        if unknown:
+            raise ValueError(f'Unknown guild config field(s): {", ".join(sorted(unknown))}')
+
+        if not self.pool:
+            config = self.get(guild_id)
+            for name, value in fields.items():
+                setattr(config, name, value)
+            return config
+
+        names = list(fields)
+        columns = ', '.join(names)
+        placeholders = ', '.join(f'${i}' for i in range(2, len(names) + 2))
+        assignments = ', '.join(f'{name} = EXCLUDED.{name}' for name in names)
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                row = await conn.fetchrow(
+                    f'''
+                    INSERT INTO guild_config (guild_id, {columns}) VALUES ($1, {placeholders})
+                    ON CONFLICT (guild_id) DO UPDATE SET {assignments}
+                    RETURNING {self.SELECT_COLUMNS}
+                    ''',
+                    guild_id, *fields.values()
+                )
+                await conn.execute(
+                    'SELECT pg_notify($1, $2)',
+                    NOTIFY_CHANNEL, f'{self._instance_id}:{guild_id}'
+                )
+
+        config = GuildConfig.from_record(row, self.default_prefix)
+        self._cache.set(guild_id, config)
+        return config
+
+    async def ensure(self, guild_id: int) -> GuildConfig:
+        """Create the default row for a guild if it does not exist yet, and load it.
+
+        A guild the bot rejoins keeps its old row, and after :meth:`evict` a
+        cache miss no longer means there is none, so the row is always read back.
+        """
+        if not self.pool:
+            return self.get(guild_id)
+        await self.pool.execute(
+            'INSERT INTO guild_config (guild_id) VALUES ($1) ON CONFLICT DO NOTHING',
+            guild_id
+        )
+        return await self._reload(guild_id)
+
+    def evict(self, guild_id: int) -> None:
+        """Drop a guild from the cache, e.g. after the bot leaves it."""
+        self._cache.pop(guild_id)
+
+    def _on_notify(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        """Refresh a guild after another process changed its configuration."""
+        instance_id, _, guild_id = payload.rpartition(':')
+        if instance_id == self._instance_id:
+            return
+        try:
+            guild_id = int(guild_id)
+        except ValueError:
+            logger.warning(f'Ignoring malformed guild config notification: {payload!r}')
+            return
+        if guild_id in self._cache or self._is_authoritative():
+            self._spawn(self._reload(guild_id))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters for diagnostics."""
+        return {**self._cache.stats(), 'complete': self._complete, 'listening': self._listen_conn is not None}
@@ -0,0 +1,295 @@
+"""
+Inter-cluster messaging over a local Unix socket.
+
+The launcher runs an :class:`IPCServer`; every cluster process connects an
+:class:`IPCClient` and identifies with its cluster ID. Messages are JSON
+objects, one per line.
+
+A cluster sends a request naming a command and a target (one cluster or
+all of them). The server forwards it to each target, collects the answers
+until a timeout, and replies with one result per cluster, so a command
+like "stats" answered by every cluster reaches the requester as a single
+list. Clients can also send events (e.g. "ready") to the launcher.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+# Largest single message; aggregated stats of many clusters fit comfortably
+MAX_MESSAGE = 4 * 1024 * 1024
+
+Handler = Callable[[Any], Awaitable[Any]]
+EventHandler = Callable[[int, str, Any], Awaitable[None]]
+Target = Union[str, int]
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(',', ':'), default=str).encode() + b'\n'
+
+
+def _spawn(tasks: Set[asyncio.Task], coro: Awaitable[Any]) -> None:
+    """Run ``coro`` in the background, holding a reference until it finishes."""
+    task = asyncio.ensure_future(coro)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+
+
+class IPCServer:
+    """Routes requests between cluster processes."""
+
+    def __init__(self, path: str, timeout: float = 10.0) -> None:
+        """Create a server. Call :meth:`start` to listen.
+
+        Args:
+            path: Filesystem path of the Unix socket
+            timeout: Seconds to wait for a cluster to answer a request
+        """
+        self.path = path
+        self.timeout = timeout
+        self.on_event: Optional[EventHandler] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clusters: Dict[int, asyncio.StreamWriter] = {}
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._nonce = 0
+
+    @property
+    def clusters(self) -> List[int]:
+        return sorted(self._clusters)
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=MAX_MESSAGE)
+        os.chmod(self.path, 0o600)
+        logger.info(f'IPC server listening on {self.path}')
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in self._clusters.values():
+            writer.close()
+        self._clusters.clear()
+        for future in self._waiting.values():
+            future.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        cluster_id: Optional[int] = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    op = message['op']
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f'Dropping malformed IPC message from cluster {cluster_id}')
+                    continue
+
+                if op == 'identify':
+                    cluster_id = int(message['cluster'])
+                    previous = self._clusters.get(cluster_id)
+                    if previous is not None and previous is not writer:
+                        previous.close()
+                    self._clusters[cluster_id] = writer
+                    logger.info(f'Cluster {cluster_id} connected to IPC')
+                elif op == 'response':
+                    future = self._waiting.get(message.get('nonce'))
+                    if future is not None and not future.done():
+                        future.set_result(message)
+                elif op == 'request':
+                    _spawn(self._tasks, self._route(writer, message))
+                elif op == 'event' and cluster_id is not None and self.on_event:
+                    _spawn(self._tasks, self.on_event(cluster_id, message.get('name'), message.get('data')))
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            logger.warning(f'IPC connection of cluster {cluster_id} failed: {e}')
+        finally:
+            if cluster_id is not None and self._clusters.get(cluster_id) is writer:
+                del self._clusters[cluster_id]
+                logger.info(f'Cluster {cluster_id} disconnected from IPC')
+            writer.close()
+
+    async def _route(self, writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+        results = await self.request(message.get('command'), message.get('data'), message.get('target', 'all'))
+        try:
+            writer.write(_encode({'op': 'response', 'nonce': message.get('nonce'), 'results': results}))
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def request(self, command: str, data: Any = None, target: Target = 'all') -> List[Dict[str, Any]]:
+        """Send a command to one or all clusters and collect their answers.
+
+        Returns:
+            One ``{'cluster', 'result'}`` or ``{'cluster', 'error'}`` dict per target cluster
+        """
+        targets = self.clusters if target == 'all' else [int(target)]
+        return list(await asyncio.gather(*(self._ask(cluster_id, command, data) for cluster_id in targets)))
+
+    async def _ask(self, cluster_id: int, command: str, data: Any) -> Dict[str, Any]:
+        writer = self._clusters.get(cluster_id)
+        if writer is None:
+            return {'cluster': cluster_id, 'error': 'not connected'}
+        self._nonce += 1
+        nonce = self._nonce
+        future = self._waiting[nonce] = asyncio.get_running_loop().create_future()
+        try:
+            writer.write(_encode({'op': 'request', 'nonce': nonce, 'command': command, 'data': data}))
+            await writer.drain()
+            reply = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return {'cluster': cluster_id, 'error': 'timed out'}
+        except ConnectionError as e:
+            return {'cluster': cluster_id, 'error': str(e)}
+        finally:
+            self._waiting.pop(nonce, None)
+        if reply.get('error'):
+            return {'cluster': cluster_id, 'error': reply['error']}
+        return {'cluster': cluster_id, 'result': reply.get('result')}
+
+
+class IPCClient:
+    """A cluster's connection to the launcher, reconnecting when it drops."""
+
+    def __init__(self, path: str, cluster_id: int, timeout: float = 15.0, reconnect_delay: float = 5.0) -> None:
+        """Create a client. Call :meth:`start` to connect.
+
+        Args:
+            path: Filesystem path of the launcher's Unix socket
+            cluster_id: This process's cluster ID
+            timeout: Seconds to wait for the answer to a request
+            reconnect_delay: Seconds between connection attempts
+        """
+        self.path = path
+        self.cluster_id = cluster_id
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self._handlers: Dict[str, Handler] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._nonce = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def register(self, command: str, handler: Handler) -> None:
+        """Answer requests for ``command`` with ``handler(data)``."""
+        self._handlers[command] = handler
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE)
+            except OSError as e:
+                logger.warning(f'IPC connect to {self.path} failed: {e}')
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            try:
+                writer.write(_encode({'op': 'identify', 'cluster': self.cluster_id}))
+                await writer.drain()
+                self._connected.set()
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self._dispatch(json.loads(line))
+            except (ConnectionError, ValueError, asyncio.LimitOverrunError) as e:
+                logger.warning(f'IPC connection lost: {e}')
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+                for future in self._waiting.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError('IPC connection lost'))
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        op = message.get('op')
+        if op == 'request':
+            _spawn(self._tasks, self._answer(message))
+        elif op == 'response':
+            future = self._waiting.get(message.get('nonce'))
+            if future is not None and not future.done():
+                future.set_result(message.get('results', []))
+
+    async def _answer(self, message: Dict[str, Any]) -> None:
+        reply: Dict[str, Any] = {'op': 'response', 'nonce': message.get('nonce')}
+        handler = self._handlers.get(message.get('command'))
+        if handler is None:
+            reply['error'] = f'unknown command {message.get("command")!r}'
+        else:
+            try:
+                reply['result'] = await handler(message.get('data'))
+            except Exception as e:
+                logger.error(f'IPC handler for {message.get("command")!r} failed: {e}', exc_info=True)
+                reply['error'] = str(e) or type(e).__name__
+        await self._send(reply)
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if self._writer is None:
+            raise ConnectionError('Not connected to the launcher')
+        self._writer.write(_encode(message))
+        await self._writer.drain()
+
+    async def request(self, command: str, data: Any = None, target: Target = 'all') -> List[Dict[str, Any]]:
+        """Run a command on one or all clusters, including this one.
+
+        Returns:
+            One ``{'cluster', 'result'}`` or ``{'cluster', 'error'}`` dict per target cluster
+
+        Raises:
+            ConnectionError: If the launcher is not reachable
+            asyncio.TimeoutError: If the answers do not arrive in time
+        """
+        self._nonce += 1
+        nonce = self._nonce
+        future = self._waiting[nonce] = asyncio.get_running_loop().create_future()
+        try:
+            await self._send({'op': 'request', 'nonce': nonce, 'command': command, 'data': data, 'target': target})
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        finally:
+            self._waiting.pop(nonce, None)
+
+    async def send_event(self, name: str, data: Any = None) -> None:
+        """Tell the launcher something happened; errors are logged, not raised."""
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=self.timeout)
+            await self._send({'op': 'event', 'name': name, 'data': data})
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.warning(f'Failed to send IPC event {name!r}: {e}')
@@ -0,0 +1,199 @@
+"""
+Non-blocking logging.
+
+A plain ``FileHandler`` writes (and flushes) on the thread that logs, so
+every ``logger.info`` in an event handler waits on the disk. Here the root
+logger only has a ``QueueHandler``: records are formatted into the queue
+in memory and a ``QueueListener`` thread writes them to the console and a
+rotating file.
+
+Before a record is queued it passes a :class:`RateLimitFilter`, which lets
+each call site log at most ``burst`` records below WARNING per ``period``
+and drops the rest, reporting how many were dropped with the next record
+it lets through. Loggers can also be sampled to a fraction of their
+records, e.g. ``{"cogs.yues": 0.1}``.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TEXT_FORMAT = '[%(asctime)s] [%(levelname)s] %(name)s: %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_listener: Optional[QueueListener] = None
+
+
+class SizedTimedRotatingFileHandler(RotatingFileHandler):
+    """Rotates the log file when it reaches ``maxBytes`` or is ``interval`` seconds old."""
+
+    def __init__(self, filename: str, max_bytes: int = 0, backup_count: int = 0, interval: Optional[float] = None, encoding: str = 'utf-8') -> None:
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.interval = interval
+        self.rollover_at = self._next_rollover()
+
+    def _next_rollover(self) -> float:
+        return time.time() + self.interval if self.interval else float('inf')
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.rollover_at = self._next_rollover()
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """Limits how often any one call site may log below WARNING."""
+
+    def __init__(self, burst: int = 20, period: float = 10.0, sample: Optional[Dict[str, float]] = None) -> None:
+        """Create a filter.
+
+        Args:
+            burst: Records let through per call site and period; 0 disables the limit
+            period: Length of a period in seconds
+            sample: Fraction of records to keep, by logger name (children included)
+        """
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.sample = sample or {}
+        # (pathname, lineno) -> [period start, records in period, records dropped]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self.dropped = 0
+
+    def _sample_rate(self, name: str) -> float:
+        while name:
+            if name in self.sample:
+                return self.sample[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample and random.random() >= self._sample_rate(record.name):
+            return False
+        if not self.burst:
+            return True
+
+        key = (record.pathname, record.lineno)
+        site = self._sites.get(key)
+        if site is None:
+            if len(self._sites) >= 10000:
+                self._sites.clear()
+            site = self._sites[key] = [record.created, 0, 0]
+        elif record.created - site[0] >= self.period:
+            site[0] = record.created
+            site[1] = 0
+        if site[1] >= self.burst:
+            site[2] += 1
+            self.dropped += 1
+            return False
+        site[1] += 1
+        if site[2]:
+            record.msg = f'{record.getMessage()} ({site[2]} similar message(s) suppressed)'
+            record.args = None
+            site[2] = 0
+        return True
+
+
+def setup_logging(options: Optional[Dict[str, Any]] = None) -> QueueListener:
+    """Route all logging through a queue to a background writer thread.
+
+    Calling it again replaces the previous setup, so logging can start with
+    the defaults and be reconfigured once the config file is read.
+
+    Args:
+        options: The ``logging`` section of the config. Keys: ``level``, ``file``
+            (None for console only), ``max_bytes``, ``backup_count``,
+            ``rotate_interval`` (seconds), ``json`` (JSON lines in the file),
+            ``rate_limit_burst``, ``rate_limit_period`` and ``sample``
+
+    Returns:
+        The running listener
+    """
+    global _listener
+    options = options or {}
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+    handlers = [console]
+    path = options.get('file', 'bot.log')
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = SizedTimedRotatingFileHandler(
+            path,
+            max_bytes=options.get('max_bytes', 10 * 1024 * 1024),
+            backup_count=options.get('backup_count', 5),
+            interval=options.get('rotate_interval', 86400)
+        )
+        file_handler.setFormatter(JSONFormatter() if options.get('json') else logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+        handlers.append(file_handler)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(RateLimitFilter(
+        burst=options.get('rate_limit_burst', 20),
+        period=options.get('rate_limit_period', 10.0),
+        sample=options.get('sample')
+    ))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(options.get('level', 'INFO'))
+
+    previous, _listener = _listener, QueueListener(records, *handlers, respect_handler_level=True)
+    if previous is not None:
+        _stop(previous)
+    _listener.start()
+    return _listener
+
+
+def _stop(listener: QueueListener) -> None:
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+@atexit.register
+def shutdown_logging() -> None:
+    """Write out everything still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _stop(_listener)
+        _listener = None
@@ -0,0 +1,173 @@
+"""
+Batched, rate-limit-aware delivery of log embeds.
+
+Each log channel gets its own bounded queue and a single worker task. The
+worker waits until a full message worth of embeds (10) is queued or the
+flush interval elapses, then sends them together. When the backlog is full,
+new entries are not queued; they are counted per kind and reported as a
+summary embed ("+340 more joins") with the next flush.
+"""
+
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import Deque, Dict, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+EMBEDS_PER_MESSAGE = 10
+
+
+class ChannelLogQueue:
+    """Pending log embeds for a single channel."""
+
+    __slots__ = ('channel', 'embeds', 'dropped', 'wakeup', 'task', 'sent_messages', 'sent_embeds')
+
+    def __init__(self, channel: discord.abc.Messageable) -> None:
+        self.channel = channel
+        self.embeds: Deque[discord.Embed] = deque()
+        self.dropped: Counter = Counter()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.sent_messages = 0
+        self.sent_embeds = 0
+
+
+class LogSink:
+    """Coalesces log embeds into as few channel messages as possible."""
+
+    def __init__(self, flush_interval: float = 2.0, max_backlog: int = 100, idle_timeout: float = 300.0) -> None:
+        """Create an empty sink.
+
+        Args:
+            flush_interval: Seconds to wait for more embeds before sending a partial batch
+            max_backlog: Maximum number of embeds queued per channel before dropping
+            idle_timeout: Seconds after which an empty channel queue is torn down
+        """
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self.idle_timeout = idle_timeout
+        self._queues: Dict[int, ChannelLogQueue] = {}
+        self._closed = False
+
+    def push(self, channel: discord.abc.Messageable, embed: discord.Embed, kind: str = 'events') -> bool:
+        """Queue an embed for delivery to ``channel``.
+
+        Args:
+            channel: The log channel
+            embed: The embed to send
+            kind: Plural noun used in the overflow summary, e.g. "joins"
+
+        Returns:
+            True if the embed was queued, False if it was dropped
+        """
+        if self._closed:
+            return False
+
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = ChannelLogQueue(channel)
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._worker(queue))
+
+        if len(queue.embeds) >= self.max_backlog:
+            queue.dropped[kind] += 1
+            return False
+
+        queue.embeds.append(embed)
+        if len(queue.embeds) >= EMBEDS_PER_MESSAGE:
+            queue.wakeup.set()
+        return True
+
+    async def _worker(self, queue: ChannelLogQueue) -> None:
+        """Flush a channel's queue until it stays idle."""
+        loop = asyncio.get_running_loop()
+        idle_since = loop.time()
+        try:
+            while not self._closed:
+                if len(queue.embeds) < EMBEDS_PER_MESSAGE:
+                    queue.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(queue.wakeup.wait(), timeout=self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+                if not queue.embeds and not queue.dropped:
+                    if loop.time() - idle_since >= self.idle_timeout:
+                        break
+                    continue
+
+                await self._flush(queue)
+                idle_since = loop.time()
+        finally:
+            if self._queues.get(queue.channel.id) is queue and not queue.embeds:
+                del self._queues[queue.channel.id]
+
+    async def _flush(self, queue: ChannelLogQueue) -> None:
+        """Send one message with up to ten queued embeds."""
+        batch = [queue.embeds.popleft() for _ in range(min(EMBEDS_PER_MESSAGE, len(queue.embeds)))]
+
+        if queue.dropped and len(batch) < EMBEDS_PER_MESSAGE:
+            summary = ', '.join(f'+{count} more {kind}' for kind, count in queue.dropped.items())
+            batch.append(discord.Embed(
+                description=f'⚠️ Log backlog full: {summary}',
+                color=discord.Color.orange()
+            ))
+            queue.dropped.clear()
+
+        try:
+            await queue.channel.send(embeds=batch)
+            queue.sent_messages += 1
+            queue.sent_embeds += len(batch)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                retry_after = getattr(e, 'retry_after', None) or self.flush_interval
+                logger.warning(f'Rate limited sending logs to channel {queue.channel.id}, retrying in {retry_after:.2f}s')
+                queue.embeds.extendleft(reversed(batch))
+                while len(queue.embeds) > self.max_backlog:
+                    queue.embeds.pop()
+                    queue.dropped['events'] += 1
+                await asyncio.sleep(retry_after)
+            else:
+                logger.error(f'Failed to send {len(batch)} log embed(s) to channel {queue.channel.id}: {e}')
+
+    def depth(self, channel_id: Optional[int] = None) -> int:
+        """Return the number of queued embeds for one channel or for all channels."""
+        if channel_id is not None:
+            queue = self._queues.get(channel_id)
+            return len(queue.embeds) if queue else 0
+        return sum(len(queue.embeds) for queue in self._queues.values())
+
+    def stats(self) -> Dict[int, Dict[str, int]]:
+        """Return per-channel queue depth, pending drops and send counters."""
+        return {
+            channel_id: {
+                'depth': len(queue.embeds),
+                'dropped': sum(queue.dropped.values()),
+                'messages': queue.sent_messages,
+                'embeds': queue.sent_embeds,
+            }
+            for channel_id, queue in self._queues.items()
+        }
+
+    async def close(self) -> None:
+        """Flush what is left and stop all workers."""
+        self._closed = True
+        queues = list(self._queues.values())
+        # Let each worker finish the send it is in the middle of, so no batch is lost or sent twice
+        tasks = [queue.task for queue in queues if queue.task and not queue.task.done()]
+        for queue in queues:
+            queue.wakeup.set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.flush_interval * 2)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for queue in queues:
+            for _ in range(len(queue.embeds) // EMBEDS_PER_MESSAGE + 1):
+                if not queue.embeds and not queue.dropped:
+                    break
+                await self._flush(queue)
+        self._queues.clear()
@@ -0,0 +1,114 @@
+"""
+Helpers for moderation actions applied to many users at once.
+
+Work is spread over a small, fixed pool of workers pulling from a queue.
+discord.py already serialises requests that share a rate-limit bucket and
+sleeps through 429s, so the pool size only bounds how many requests wait on
+a bucket at once; throughput ends up at whatever the route's limit allows.
+Progress is reported by editing a single message at most every few seconds.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """Edits one status message with throttled progress updates."""
+
+    def __init__(self, message: discord.Message, title: str, total: int, interval: float = 2.0) -> None:
+        """Create a reporter.
+
+        Args:
+            message: The message to edit
+            title: Heading shown above the progress line
+            total: Number of items that will be processed
+            interval: Minimum seconds between edits
+        """
+        self.message = message
+        self.title = title
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self._last_edit = 0.0
+
+    def render(self, final: bool = False) -> discord.Embed:
+        processed = self.done + self.failed
+        embed = discord.Embed(
+            title=self.title,
+            description=f"{'Finished' if final else 'Working'}: **{processed}/{self.total}**",
+            color=discord.Color.green() if final else discord.Color.orange()
+        )
+        embed.add_field(name="Succeeded", value=str(self.done))
+        embed.add_field(name="Failed", value=str(self.failed))
+        return embed
+
+    async def advance(self, succeeded: bool, count: int = 1) -> None:
+        """Record finished items and refresh the message if the interval has passed."""
+        if succeeded:
+            self.done += count
+        else:
+            self.failed += count
+        now = asyncio.get_running_loop().time()
+        if now - self._last_edit >= self.interval:
+            self._last_edit = now
+            try:
+                await self.message.edit(embed=self.render())
+            except discord.HTTPException:
+                pass
+
+    async def finish(self, embed: Optional[discord.Embed] = None) -> None:
+        """Replace the progress message with the final summary."""
+        try:
+            await self.message.edit(embed=embed or self.render(final=True))
+        except discord.HTTPException:
+            pass
+
+
+async def run_pool(
+    items: Iterable[Any],
+    action: Callable[[Any], Awaitable[None]],
+    concurrency: int = 5,
+    progress: Optional[ProgressReporter] = None
+) -> Tuple[List[Any], List[Tuple[Any, Exception]]]:
+    """Apply ``action`` to every item using a bounded pool of workers.
+
+    Args:
+        items: The items to process
+        action: Coroutine function called once per item
+        concurrency: Number of workers
+        progress: Optional reporter updated after every item
+
+    Returns:
+        The items that succeeded and ``(item, error)`` pairs for the ones that failed
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    succeeded: List[Any] = []
+    failed: List[Tuple[Any, Exception]] = []
+
+    async def worker() -> None:
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await action(item)
+                succeeded.append(item)
+                ok = True
+            except Exception as e:
+                failed.append((item, e))
+                ok = False
+            if progress:
+                await progress.advance(ok)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, queue.qsize())))))
+    return succeeded, failed
@@ -0,0 +1,125 @@
+"""
+On-demand member chunking.
+
+Requesting every guild's member list at startup is most of the bot's time
+to ready and most of its memory, yet only a few commands need a guild's
+full member list. This chunks a guild the first time something asks for
+its members. Concurrent requests for the same guild share one chunk
+request, and once more than ``max_guilds`` guilds are chunked the least
+recently used one has its member cache dropped again.
+
+Single members are still available without a chunk: member converters
+query the gateway by ID or name, and events carry their own member.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class MemberChunker:
+    """Chunks guilds lazily and evicts the member caches of idle ones."""
+
+    def __init__(
+        self,
+        get_guild: Callable[[int], Optional[discord.Guild]],
+        lazy: bool = True,
+        max_guilds: int = 100,
+        timeout: float = 60.0
+    ) -> None:
+        """Create a chunker.
+
+        Args:
+            get_guild: Looks a guild up by ID, e.g. ``bot.get_guild``
+            lazy: False when guilds are chunked at startup; nothing is evicted then
+            max_guilds: Chunked guilds kept before the least recently used is evicted
+            timeout: Seconds to wait for a chunk request
+        """
+        self.get_guild = get_guild
+        self.lazy = lazy
+        self.max_guilds = max_guilds
+        self.timeout = timeout
+        self._chunked: 'OrderedDict[int, float]' = OrderedDict()
+        self._pending: Dict[int, asyncio.Task] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def ensure(self, guild: discord.Guild) -> bool:
+        """Make sure ``guild.members`` is complete, chunking the guild if needed.
+
+        Returns:
+            True if the member cache is complete, False if it could not be filled
+        """
+        if not guild._state._intents.members:
+            return False
+        if guild.chunked:
+            self._touch(guild.id)
+            return True
+
+        task = self._pending.get(guild.id)
+        if task is None:
+            task = self._pending[guild.id] = asyncio.create_task(self._chunk(guild))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _chunk(self, guild: discord.Guild) -> bool:
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(guild.chunk(cache=True), timeout=max(self.timeout, (guild.member_count or 0) / 10000))
+        except asyncio.TimeoutError:
+            logger.warning(f'Timed out chunking guild {guild.id} ({guild.member_count} members)')
+            return False
+        except (discord.ClientException, discord.HTTPException) as e:
+            logger.warning(f'Failed to chunk guild {guild.id}: {e}')
+            return False
+        finally:
+            self._pending.pop(guild.id, None)
+        logger.debug(f'Chunked guild {guild.id} ({len(guild.members)} members) in {time.perf_counter() - start:.2f}s')
+        self._touch(guild.id)
+        return True
+
+    def _touch(self, guild_id: int) -> None:
+        if not self.lazy:
+            return
+        self._chunked[guild_id] = time.monotonic()
+        self._chunked.move_to_end(guild_id)
+        while len(self._chunked) > self.max_guilds:
+            oldest, _ = self._chunked.popitem(last=False)
+            guild = self.get_guild(oldest)
+            if guild is not None:
+                self.evict(guild)
+
+    def evict(self, guild: discord.Guild) -> int:
+        """Drop a guild's cached members, keeping the bot's own member.
+
+        Returns:
+            The number of members dropped
+        """
+        self._chunked.pop(guild.id, None)
+        me = guild.me
+        dropped = len(guild._members)
+        guild._members = {me.id: me} if me is not None else {}
+        dropped -= len(guild._members)
+        self.evictions += 1
+        return dropped
+
+    def forget_guild(self, guild_id: int) -> None:
+        self._chunked.pop(guild_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'chunked': len(self._chunked),
+            'pending': len(self._pending),
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,52 @@
+"""
+Lightweight counters for code that runs on every event.
+
+Recording a sample is a handful of integer operations, so these can be left
+on in production and read back by diagnostic commands.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List
+
+# Upper bounds of the latency histogram buckets, in nanoseconds
+LATENCY_BOUNDS_NS = (1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000, 500_000, 1_000_000, 10_000_000)
+
+
+class LatencyStats:
+    """Count, mean, max and a coarse histogram of observed durations."""
+
+    __slots__ = ('count', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: List[int] = [0] * (len(LATENCY_BOUNDS_NS) + 1)
+
+    def observe(self, elapsed_ns: int) -> None:
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[bisect_left(LATENCY_BOUNDS_NS, elapsed_ns)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Return the bucket bound below which ``fraction`` of samples fall, in microseconds."""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BOUNDS_NS, self.buckets):
+            seen += count
+            if seen >= wanted:
+                return bound / 1000
+        return self.max_ns / 1000
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1000 if self.count else 0.0,
+            'p50_us': self.percentile(0.5),
+            'p99_us': self.percentile(0.99),
+            'max_us': self.max_ns / 1000,
+        }
@@ -0,0 +1,234 @@
+"""
+Near-duplicate message detection with MinHash and locality-sensitive hashing.
+
+Each message is reduced to a MinHash signature of its character shingles.
+The signature is split into bands, and each band is a key into a
+per-guild bucket table. Messages sharing any band are candidates, and
+candidates are confirmed by comparing full signatures. A lookup only
+touches the few messages in the same buckets, not the whole index.
+
+Each guild's index is a time-ordered ring: entries older than ``ttl`` or
+beyond ``max_entries`` are dropped from the front together with their
+bucket keys, and idle guilds are evicted least recently used first, so
+memory is capped per guild and overall.
+"""
+
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set
+
+import numpy as np
+
+from utils.metrics import LatencyStats
+from utils.word_filter import normalize
+
+SHINGLE_SIZE = 5
+MAX_TEXT_LENGTH = 500
+_PRIME = (1 << 31) - 1
+_MASK = (1 << 31) - 1
+_WHITESPACE = re.compile(r'\s+')
+
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures of texts."""
+
+    def __init__(self, num_perm: int = 32, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Return the signature of ``text``, or None if it is too short to shingle."""
+        text = _WHITESPACE.sub(' ', normalize(text[:MAX_TEXT_LENGTH])).strip()
+        count = len(text) - SHINGLE_SIZE + 1
+        if count < 1:
+            return None
+        shingles = np.fromiter(
+            (hash(text[i:i + SHINGLE_SIZE]) & _MASK for i in range(count)),
+            dtype=np.uint64,
+            count=count
+        )
+        return ((self._a * shingles + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+class IndexedMessage:
+    """One message in a guild's index."""
+
+    __slots__ = ('seq', 'user_id', 'channel_id', 'message_id', 'created', 'signature', 'keys', 'flagged')
+
+    def __init__(
+        self,
+        seq: int,
+        user_id: int,
+        channel_id: int,
+        message_id: int,
+        created: float,
+        signature: np.ndarray,
+        keys: List[bytes]
+    ) -> None:
+        self.seq = seq
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.created = created
+        self.signature = signature
+        self.keys = keys
+        self.flagged = False
+
+
+class GuildIndex:
+    """LSH buckets over a time-ordered ring of recent messages."""
+
+    __slots__ = ('entries', 'by_seq', 'buckets')
+
+    def __init__(self, bands: int) -> None:
+        self.entries: Deque[IndexedMessage] = deque()
+        self.by_seq: Dict[int, IndexedMessage] = {}
+        self.buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+
+    def pop_oldest(self) -> None:
+        entry = self.entries.popleft()
+        del self.by_seq[entry.seq]
+        for band, key in enumerate(entry.keys):
+            bucket = self.buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry.seq)
+                if not bucket:
+                    del self.buckets[band][key]
+
+
+class NearDuplicateIndex:
+    """Flags messages that closely match recent messages from other users."""
+
+    def __init__(
+        self,
+        num_perm: int = 32,
+        bands: int = 8,
+        threshold: float = 0.7,
+        min_users: int = 3,
+        min_length: int = 20,
+        ttl: float = 300.0,
+        max_entries: int = 2000,
+        max_guilds: int = 1000
+    ) -> None:
+        """Create an empty index.
+
+        Args:
+            num_perm: MinHash signature length; must be divisible by ``bands``
+            bands: Number of LSH bands; more bands find less similar pairs
+            threshold: Estimated Jaccard similarity at which messages match
+            min_users: Distinct users posting matching messages before they are flagged
+            min_length: Messages shorter than this are ignored
+            ttl: Seconds a message stays in the index
+            max_entries: Messages kept per guild
+            max_guilds: Guilds kept before the least recently used is dropped
+        """
+        if num_perm % bands:
+            raise ValueError('num_perm must be divisible by bands')
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.min_users = min_users
+        self.min_length = min_length
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_guilds = max_guilds
+        self._guilds: 'OrderedDict[int, GuildIndex]' = OrderedDict()
+        self._seq = 0
+        self.latency = LatencyStats()
+        self.flagged = 0
+
+    def _expire(self, index: GuildIndex, now: float) -> None:
+        cutoff = now - self.ttl
+        while index.entries and (index.entries[0].created < cutoff or len(index.entries) > self.max_entries):
+            index.pop_oldest()
+
+    def check(
+        self,
+        guild_id: int,
+        user_id: int,
+        channel_id: int,
+        message_id: int,
+        content: str,
+        now: Optional[float] = None
+    ) -> List[IndexedMessage]:
+        """Index a message and return the matching messages if it completes a near-duplicate cluster.
+
+        Returns:
+            Matching messages from the cluster that were not returned before,
+            or an empty list when the message is not flagged
+        """
+        if len(content) < self.min_length:
+            return []
+        start = time.perf_counter_ns()
+        now = time.monotonic() if now is None else now
+
+        signature = self.hasher.signature(content)
+        if signature is None:
+            return []
+
+        index = self._guilds.get(guild_id)
+        if index is None:
+            index = self._guilds[guild_id] = GuildIndex(self.bands)
+            if len(self._guilds) > self.max_guilds:
+                self._guilds.popitem(last=False)
+        else:
+            self._guilds.move_to_end(guild_id)
+        self._expire(index, now)
+
+        rows = self.rows
+        keys = [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+        candidates: Set[int] = set()
+        for band, key in enumerate(keys):
+            bucket = index.buckets[band].get(key)
+            if bucket:
+                candidates |= bucket
+
+        matches: List[IndexedMessage] = []
+        if candidates:
+            entries = [index.by_seq[seq] for seq in candidates]
+            similarity = (np.stack([entry.signature for entry in entries]) == signature).mean(axis=1)
+            matches = [entry for entry, score in zip(entries, similarity) if score >= self.threshold]
+
+        self._seq += 1
+        entry = IndexedMessage(self._seq, user_id, channel_id, message_id, now, signature, keys)
+        index.entries.append(entry)
+        index.by_seq[entry.seq] = entry
+        for band, key in enumerate(keys):
+            index.buckets[band].setdefault(key, set()).add(entry.seq)
+        self._expire(index, now)
+
+        flagged: List[IndexedMessage] = []
+        if matches and len({match.user_id for match in matches} | {user_id}) >= self.min_users:
+            entry.flagged = True
+            flagged = [match for match in matches if not match.flagged]
+            for match in flagged:
+                match.flagged = True
+            self.flagged += 1
+            flagged.append(entry)
+
+        self.latency.observe(time.perf_counter_ns() - start)
+        return flagged
+
+    def forget_guild(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by signatures and bucket entries."""
+        entries = sum(len(index.entries) for index in self._guilds.values())
+        # ndarray header + data, one bytes key and one set slot per band, the entry object
+        signature = 112 + self.hasher.num_perm * 4
+        keys = self.bands * (33 + self.rows * 4 + 16)
+        return entries * (signature + keys + 120)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'guilds': len(self._guilds),
+            'entries': sum(len(index.entries) for index in self._guilds.values()),
+            'memory_bytes': self.memory_usage(),
+            'flagged': self.flagged,
+            **self.latency.summary(),
+        }
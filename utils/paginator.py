@@ -0,0 +1,73 @@
+"""
+Button-driven paginator for keyset-paginated queries.
+
+Pages are fetched lazily: the view only remembers the cursor each visited
+page started from, so moving forward costs one indexed query per page and
+moving back re-runs the query from a stored cursor instead of using OFFSET.
+"""
+
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+# Given the cursor a page starts from, return the page embed and the cursor of the next page
+PageFetcher = Callable[[Optional[Any]], Awaitable[Tuple[discord.Embed, Optional[Any]]]]
+
+
+class KeysetPaginator(discord.ui.View):
+    """Previous/next navigation over a keyset-paginated result."""
+
+    def __init__(self, author_id: int, fetch_page: PageFetcher, timeout: float = 120.0) -> None:
+        """Create a paginator.
+
+        Args:
+            author_id: The only user allowed to press the buttons
+            fetch_page: Coroutine returning ``(embed, next_cursor)`` for a start cursor
+            timeout: Seconds of inactivity before the buttons are disabled
+        """
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.fetch_page = fetch_page
+        self.message: Optional[discord.Message] = None
+        self._cursors: List[Optional[Any]] = [None]
+        self._next: Optional[Any] = None
+
+    async def start(self, ctx: commands.Context) -> None:
+        """Send the first page."""
+        embed = await self._load(0)
+        self.message = await ctx.send(embed=embed, view=self)
+
+    async def _load(self, index: int) -> discord.Embed:
+        embed, self._next = await self.fetch_page(self._cursors[index])
+        del self._cursors[index + 1:]
+        embed.set_footer(text=f"Page {index + 1}")
+        self.previous_page.disabled = index == 0
+        self.next_page.disabled = self._next is None
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ These buttons aren't for you.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = await self._load(len(self._cursors) - 2)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self._cursors.append(self._next)
+        embed = await self._load(len(self._cursors) - 1)
+        await interaction.response.edit_message(embed=embed, view=self)
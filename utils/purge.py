@@ -0,0 +1,133 @@
+"""
+Streaming message purge with filters.
+
+History is read lazily page by page and matching messages are collected
+into chunks of at most 100, so memory stays constant no matter how many
+messages are scanned. Messages younger than 14 days are removed with the
+bulk-delete endpoint; older ones can only be deleted one at a time, so they
+go through a throttled single-delete path.
+"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+import discord
+
+from utils.mass_action import ProgressReporter
+
+BULK_DELETE_CHUNK = 100
+# Bulk delete rejects messages older than 14 days; keep a margin for clock skew
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+
+class PurgeFilter:
+    """Predicate over messages built from purge options."""
+
+    __slots__ = ('author_id', 'pattern', 'attachments', 'bots')
+
+    def __init__(
+        self,
+        author_id: Optional[int] = None,
+        pattern: Optional[str] = None,
+        attachments: bool = False,
+        bots: bool = False
+    ) -> None:
+        """Create a filter; every option given must match.
+
+        Raises:
+            re.error: If ``pattern`` is not a valid regular expression
+        """
+        self.author_id = author_id
+        self.pattern = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.attachments = attachments
+        self.bots = bots
+
+    def __call__(self, message: discord.Message) -> bool:
+        if self.author_id is not None and message.author.id != self.author_id:
+            return False
+        if self.bots and not message.author.bot:
+            return False
+        if self.attachments and not message.attachments:
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        return True
+
+
+async def purge_channel(
+    channel: discord.TextChannel,
+    limit: int,
+    check: Callable[[discord.Message], bool],
+    before: Optional[discord.abc.Snowflake] = None,
+    after: Optional[datetime] = None,
+    max_scan: int = 10000,
+    single_delete_delay: float = 1.0,
+    progress: Optional[ProgressReporter] = None
+) -> Tuple[int, int]:
+    """Delete up to ``limit`` messages matching ``check``, newest first.
+
+    Args:
+        channel: The channel to purge
+        limit: Maximum number of messages to delete
+        check: Predicate selecting messages to delete
+        before: Only consider messages older than this message
+        after: Only consider messages newer than this time
+        max_scan: Maximum number of messages read from history
+        single_delete_delay: Seconds to wait between deletes of old messages
+        progress: Optional reporter updated as messages are deleted
+
+    Returns:
+        The number of deleted messages and the number of scanned messages
+    """
+    bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+    chunk: List[discord.Message] = []
+    deleted = 0
+    scanned = 0
+    matched = 0
+
+    async def flush() -> None:
+        nonlocal deleted
+        if not chunk:
+            return
+        try:
+            await channel.delete_messages(chunk)
+            deleted += len(chunk)
+            if progress:
+                await progress.advance(True, len(chunk))
+        except discord.HTTPException:
+            if progress:
+                await progress.advance(False, len(chunk))
+        chunk.clear()
+
+    async for message in channel.history(limit=max_scan, before=before, after=after, oldest_first=False):
+        scanned += 1
+        if not check(message):
+            continue
+        matched += 1
+
+        if message.created_at > bulk_cutoff:
+            chunk.append(message)
+            if len(chunk) >= BULK_DELETE_CHUNK:
+                await flush()
+        else:
+            # History is newest first, so everything from here on is too old to bulk delete
+            await flush()
+            try:
+                await message.delete()
+                deleted += 1
+                ok = True
+            except discord.NotFound:
+                ok = True
+            except discord.HTTPException:
+                ok = False
+            if progress:
+                await progress.advance(ok)
+            await asyncio.sleep(single_delete_delay)
+
+        if matched >= limit:
+            break
+
+    await flush()
+    return deleted, scanned
@@ -0,0 +1,252 @@
+"""
+Join-raid detection with batch risk scoring.
+
+Every guild keeps a ring of its recent joins as NumPy columns (join time,
+account creation time, default avatar flag and a hashed character-bigram
+vector of the name). The columns start small and double as joins arrive,
+up to the configured capacity, so quiet guilds stay cheap. A burst of joins
+switches the guild into raid mode; suspects are then picked by scoring the
+whole window at once with array operations, so a 1000-join burst is scored
+in a few milliseconds instead of once per member in a Python loop.
+
+Score components, each in [0, 1]:
+
+- account age: 1 for brand new accounts, falling to 0 at ``young_days``
+- default avatar: 1 if the account never set an avatar
+- name similarity: cosine similarity to the closest other recent joiner
+- join rate: how many joins landed within ``burst_seconds`` of this one
+"""
+
+import time
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+import numpy as np
+
+NAME_DIM = 64
+# Rows allocated for a guild's first join; doubled until the window's capacity
+INITIAL_ROWS = 16
+DEFAULT_WEIGHTS = {'age': 0.35, 'avatar': 0.15, 'name': 0.25, 'rate': 0.25}
+
+
+def name_vector(name: str) -> np.ndarray:
+    """Hash the character bigrams of a name into a unit vector.
+
+    Digits are folded together so that ``raider123`` and ``raider987``
+    come out identical.
+    """
+    text = ''.join('#' if c.isdigit() else c for c in name.lower())
+    vector = np.zeros(NAME_DIM, dtype=np.float32)
+    if len(text) < 2:
+        text = f'^{text}$'
+    for i in range(len(text) - 1):
+        vector[zlib.crc32(text[i:i + 2].encode()) % NAME_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class JoinWindow:
+    """Ring buffer of a guild's recent joins, one NumPy array per column."""
+
+    __slots__ = (
+        'capacity', 'size', 'head', 'user_ids', 'joined', 'created',
+        'default_avatar', 'names', 'raid_since', 'last_burst', 'actioned'
+    )
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0
+        rows = min(INITIAL_ROWS, capacity)
+        self.user_ids = np.zeros(rows, dtype=np.int64)
+        self.joined = np.zeros(rows, dtype=np.float64)
+        self.created = np.zeros(rows, dtype=np.float64)
+        self.default_avatar = np.zeros(rows, dtype=bool)
+        self.names = np.zeros((rows, NAME_DIM), dtype=np.float32)
+        self.raid_since: Optional[float] = None
+        self.last_burst = 0.0
+        self.actioned: Set[int] = set()
+
+    def _grow(self) -> None:
+        # Only called before the ring first wraps, so rows 0..size-1 are in order
+        rows = min(len(self.joined) * 2, self.capacity)
+        for name in ('user_ids', 'joined', 'created', 'default_avatar', 'names'):
+            column = getattr(self, name)
+            grown = np.zeros((rows,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def add(self, user_id: int, joined: float, created: float, default_avatar: bool, name: str) -> None:
+        if self.size == len(self.joined) < self.capacity:
+            self._grow()
+        i = self.head
+        self.user_ids[i] = user_id
+        self.joined[i] = joined
+        self.created[i] = created
+        self.default_avatar[i] = default_avatar
+        self.names[i] = name_vector(name)
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def count_since(self, since: float) -> int:
+        return int(np.count_nonzero(self.joined[:self.size] >= since))
+
+    def latest(self) -> float:
+        return float(self.joined[:self.size].max()) if self.size else 0.0
+
+
+class RaidGate:
+    """Detects join bursts and scores the joiners behind them."""
+
+    def __init__(
+        self,
+        window: float = 120.0,
+        burst_joins: int = 10,
+        burst_seconds: float = 10.0,
+        threshold: float = 0.6,
+        raid_cooldown: float = 300.0,
+        capacity: int = 1000,
+        young_days: float = 7.0,
+        name_floor: float = 0.5,
+        weights: Optional[Dict[str, float]] = None
+    ) -> None:
+        """Create a gate.
+
+        Args:
+            window: Seconds of joins scored when picking suspects
+            burst_joins: Joins within ``burst_seconds`` that start raid mode
+            burst_seconds: Length of the burst detection window
+            threshold: Score at or above which a joiner is a suspect
+            raid_cooldown: Seconds without a burst before raid mode ends
+            capacity: Joins remembered per guild
+            young_days: Account age at which the age component reaches 0
+            name_floor: Similarity below which names are not considered alike
+            weights: Weight of each score component, see ``DEFAULT_WEIGHTS``
+        """
+        self.window = window
+        self.burst_joins = burst_joins
+        self.burst_seconds = burst_seconds
+        self.threshold = threshold
+        self.raid_cooldown = raid_cooldown
+        self.capacity = capacity
+        self.young_days = young_days
+        self.name_floor = name_floor
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self._weights = np.array(
+            [weights['age'], weights['avatar'], weights['name'], weights['rate']], dtype=np.float32
+        )
+        self._windows: Dict[int, JoinWindow] = {}
+
+    def record(self, member: discord.Member, now: Optional[float] = None) -> bool:
+        """Add a join to its guild's window.
+
+        Returns:
+            True if this join started raid mode in the guild
+        """
+        now = time.time() if now is None else now
+        window = self._windows.get(member.guild.id)
+        if window is None:
+            window = self._windows[member.guild.id] = JoinWindow(self.capacity)
+        window.add(
+            member.id,
+            now,
+            member.created_at.timestamp(),
+            member.avatar is None,
+            member.name
+        )
+
+        if window.count_since(now - self.burst_seconds) < self.burst_joins:
+            return False
+        window.last_burst = now
+        if window.raid_since is None:
+            window.raid_since = now
+            return True
+        return False
+
+    def is_raid(self, guild_id: int, now: Optional[float] = None) -> bool:
+        window = self._windows.get(guild_id)
+        if window is None or window.raid_since is None:
+            return False
+        now = time.time() if now is None else now
+        if now - window.last_burst > self.raid_cooldown:
+            self.end_raid(guild_id)
+            return False
+        return True
+
+    def start_raid(self, guild_id: int, now: Optional[float] = None) -> None:
+        """Force raid mode on, for example from a moderator command."""
+        now = time.time() if now is None else now
+        window = self._windows.get(guild_id)
+        if window is None:
+            window = self._windows[guild_id] = JoinWindow(self.capacity)
+        window.raid_since = window.raid_since or now
+        window.last_burst = now
+
+    def end_raid(self, guild_id: int) -> None:
+        window = self._windows.get(guild_id)
+        if window is not None:
+            window.raid_since = None
+            window.actioned.clear()
+
+    def score(self, guild_id: int, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every join of the last ``window`` seconds.
+
+        Returns:
+            Parallel arrays of user ids and scores
+        """
+        window = self._windows.get(guild_id)
+        if window is None or not window.size:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        now = time.time() if now is None else now
+
+        n = window.size
+        recent = window.joined[:n] >= now - self.window
+        user_ids = window.user_ids[:n][recent]
+        joined = window.joined[:n][recent]
+        if not len(joined):
+            return user_ids, np.empty(0, dtype=np.float32)
+
+        age_days = (joined - window.created[:n][recent]) / 86400.0
+        age = np.clip(1.0 - age_days / self.young_days, 0.0, 1.0)
+
+        avatar = window.default_avatar[:n][recent].astype(np.float32)
+
+        names = window.names[:n][recent]
+        similarity = names @ names.T
+        np.fill_diagonal(similarity, 0.0)
+        closest = similarity.max(axis=1) if len(joined) > 1 else np.zeros(1, dtype=np.float32)
+        name = np.clip((closest - self.name_floor) / (1.0 - self.name_floor), 0.0, 1.0)
+
+        ordered = np.sort(joined)
+        half = self.burst_seconds / 2
+        nearby = np.searchsorted(ordered, joined + half, 'right') - np.searchsorted(ordered, joined - half, 'left')
+        rate = np.clip((nearby - 1) / self.burst_joins, 0.0, 1.0)
+
+        components = np.stack([age, avatar, name, rate]).astype(np.float32)
+        return user_ids, self._weights @ components
+
+    def suspects(self, guild_id: int, now: Optional[float] = None) -> List[int]:
+        """Return joiners at or above the threshold that were not returned before."""
+        user_ids, scores = self.score(guild_id, now)
+        window = self._windows.get(guild_id)
+        if window is None:
+            return []
+        found = [user_id for user_id in user_ids[scores >= self.threshold].tolist() if user_id not in window.actioned]
+        window.actioned.update(found)
+        return found
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop windows whose last join is older than the score window and raid cooldown."""
+        now = time.time() if now is None else now
+        horizon = max(self.window, self.raid_cooldown)
+        stale = [
+            guild_id for guild_id, window in self._windows.items()
+            if now - max(window.latest(), window.last_burst) > horizon
+        ]
+        for guild_id in stale:
+            del self._windows[guild_id]
+        return len(stale)
+
+    def forget_guild(self, guild_id: int) -> None:
+        self._windows.pop(guild_id, None)
@@ -0,0 +1,66 @@
+"""
+Token buckets for rate limiting hot paths such as message handling.
+
+Buckets are refilled lazily when they are hit, so there is no timer per
+key; a bounded LRU keeps memory flat no matter how many users or channels
+are seen.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class TokenBucket:
+    """Remaining tokens of one key and when they were last refilled."""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Allows ``rate`` hits per ``per`` seconds for every key, with bursts up to ``rate``."""
+
+    def __init__(self, rate: int, per: float, max_keys: int = 50000) -> None:
+        """Create a limiter.
+
+        Args:
+            rate: Hits allowed per period, also the burst size
+            per: Period length in seconds
+            max_keys: Maximum number of buckets kept before the least recently used is dropped
+        """
+        self.capacity = float(rate)
+        self.refill = rate / per
+        self.max_keys = max_keys
+        self._buckets: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """Take a token for ``key``.
+
+        Returns:
+            True if the hit is allowed, False if the bucket is empty
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = TokenBucket(self.capacity - 1.0, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return True
+
+        self._buckets.move_to_end(key)
+        bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.refill)
+        bucket.updated = now
+        if bucket.tokens < 1.0:
+            return False
+        bucket.tokens -= 1.0
+        return True
+
+    def reset(self, key: Hashable) -> None:
+        self._buckets.pop(key, None)
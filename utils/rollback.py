@@ -0,0 +1,224 @@
+"""
+Parallel restoration of deleted roles and channels after a nuke.
+
+The offending actor is banned before anything else so they cannot keep
+deleting while the restore runs. Roles are then recreated, followed by
+categories and finally the remaining channels, because channel overwrites
+and parents refer to roles and categories by id. Within each stage the REST
+calls run concurrently under a bounded semaphore. discord.py already
+serialises requests per rate-limit bucket and waits out 429s, so the
+semaphore only stops a large restore from exhausting the global limit.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import discord
+
+from utils.snapshot import ChannelSnapshot, RoleSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class RollbackResult:
+    """Outcome of a rollback run."""
+
+    __slots__ = ('actor_banned', 'roles_restored', 'channels_restored', 'failures', 'elapsed')
+
+    def __init__(self) -> None:
+        self.actor_banned = False
+        self.roles_restored = 0
+        self.channels_restored = 0
+        self.failures = 0
+        self.elapsed = 0.0
+
+
+class RollbackEngine:
+    """Recreates deleted guild structure from snapshots."""
+
+    def __init__(self, concurrency: int = 5) -> None:
+        """Create an engine.
+
+        Args:
+            concurrency: Maximum number of REST calls in flight per rollback
+        """
+        self.concurrency = concurrency
+
+    async def rollback(
+        self,
+        guild: discord.Guild,
+        actor: Optional[discord.abc.Snowflake],
+        roles: Iterable[RoleSnapshot] = (),
+        channels: Iterable[ChannelSnapshot] = (),
+        reason: str = 'Anti-nuke rollback',
+        role_map: Optional[Dict[int, discord.Role]] = None,
+        category_map: Optional[Dict[int, discord.CategoryChannel]] = None
+    ) -> RollbackResult:
+        """Ban the actor and restore the given roles and channels.
+
+        Args:
+            guild: The guild to restore
+            actor: The user to ban before restoring, if any
+            roles: Snapshots of deleted roles
+            channels: Snapshots of deleted channels
+            reason: Audit log reason for every action
+            role_map: Roles restored earlier in the same incident by old id; the
+                roles restored here are added to it
+            category_map: Likewise for categories, so channels deleted after their
+                category was restored still get their overwrites and parent back
+
+        Returns:
+            Counters describing what was restored
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = RollbackResult()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        if actor is not None:
+            try:
+                await guild.ban(actor, reason=reason, delete_message_days=0)
+                result.actor_banned = True
+            except discord.HTTPException as e:
+                logger.error(f'Failed to ban {actor.id} during rollback in {guild.id}: {e}')
+
+        role_map = {} if role_map is None else role_map
+        category_map = {} if category_map is None else category_map
+        role_map.update(await self._restore_roles(guild, list(roles), semaphore, reason, result))
+
+        channels = list(channels)
+        categories = [snapshot for snapshot in channels if snapshot.is_category]
+        others = [snapshot for snapshot in channels if not snapshot.is_category]
+        category_map.update(await self._restore_channels(guild, categories, role_map, category_map, semaphore, reason, result))
+        await self._restore_channels(guild, others, role_map, category_map, semaphore, reason, result)
+
+        result.elapsed = loop.time() - started
+        logger.info(
+            f'Rollback in {guild.id}: {result.roles_restored} role(s), {result.channels_restored} channel(s), '
+            f'{result.failures} failure(s) in {result.elapsed:.2f}s'
+        )
+        return result
+
+    async def _restore_roles(
+        self,
+        guild: discord.Guild,
+        roles: List[RoleSnapshot],
+        semaphore: asyncio.Semaphore,
+        reason: str,
+        result: RollbackResult
+    ) -> Dict[int, discord.Role]:
+        """Recreate roles concurrently, then restore their order in one request."""
+        async def create(snapshot: RoleSnapshot) -> Optional[discord.Role]:
+            async with semaphore:
+                try:
+                    return await guild.create_role(
+                        name=snapshot.name,
+                        permissions=discord.Permissions(snapshot.permissions),
+                        colour=discord.Colour(snapshot.colour),
+                        hoist=snapshot.hoist,
+                        mentionable=snapshot.mentionable,
+                        reason=reason
+                    )
+                except discord.HTTPException as e:
+                    logger.error(f'Failed to restore role {snapshot.name!r} in {guild.id}: {e}')
+                    return None
+
+        created = await asyncio.gather(*(create(snapshot) for snapshot in roles))
+        role_map: Dict[int, discord.Role] = {}
+        positions: Dict[discord.Role, int] = {}
+        for snapshot, role in zip(roles, created):
+            if role is None:
+                result.failures += 1
+                continue
+            role_map[snapshot.id] = role
+            positions[role] = snapshot.position
+            result.roles_restored += 1
+
+        if positions:
+            try:
+                await guild.edit_role_positions(positions, reason=reason)
+            except discord.HTTPException as e:
+                logger.error(f'Failed to restore role positions in {guild.id}: {e}')
+        return role_map
+
+    async def _restore_channels(
+        self,
+        guild: discord.Guild,
+        channels: List[ChannelSnapshot],
+        role_map: Dict[int, discord.Role],
+        category_map: Dict[int, discord.CategoryChannel],
+        semaphore: asyncio.Semaphore,
+        reason: str,
+        result: RollbackResult
+    ) -> Dict[int, discord.abc.GuildChannel]:
+        """Recreate channels concurrently with their overwrites, parent and position."""
+        async def create(snapshot: ChannelSnapshot) -> Optional[discord.abc.GuildChannel]:
+            overwrites = self._overwrites(guild, snapshot, role_map)
+            category = category_map.get(snapshot.category_id) or (
+                guild.get_channel(snapshot.category_id) if snapshot.category_id else None
+            )
+            channel_type = discord.ChannelType(snapshot.type)
+            async with semaphore:
+                try:
+                    if channel_type is discord.ChannelType.category:
+                        return await guild.create_category(
+                            snapshot.name, overwrites=overwrites, position=snapshot.position, reason=reason
+                        )
+                    if channel_type in (discord.ChannelType.voice, discord.ChannelType.stage_voice):
+                        create_voice = (
+                            guild.create_stage_channel if channel_type is discord.ChannelType.stage_voice
+                            else guild.create_voice_channel
+                        )
+                        options = {}
+                        if snapshot.bitrate:
+                            options['bitrate'] = min(snapshot.bitrate, int(guild.bitrate_limit))
+                        if snapshot.user_limit is not None:
+                            options['user_limit'] = snapshot.user_limit
+                        return await create_voice(
+                            snapshot.name, category=category, overwrites=overwrites,
+                            position=snapshot.position, reason=reason, **options
+                        )
+                    if channel_type is discord.ChannelType.forum:
+                        return await guild.create_forum(
+                            snapshot.name, category=category, overwrites=overwrites, position=snapshot.position,
+                            topic=snapshot.topic or '', nsfw=snapshot.nsfw, reason=reason
+                        )
+                    return await guild.create_text_channel(
+                        snapshot.name, category=category, overwrites=overwrites, position=snapshot.position,
+                        topic=snapshot.topic or '', nsfw=snapshot.nsfw, slowmode_delay=snapshot.slowmode_delay,
+                        news=channel_type is discord.ChannelType.news, reason=reason
+                    )
+                except discord.HTTPException as e:
+                    logger.error(f'Failed to restore channel {snapshot.name!r} in {guild.id}: {e}')
+                    return None
+
+        created = await asyncio.gather(*(create(snapshot) for snapshot in channels))
+        channel_map: Dict[int, discord.abc.GuildChannel] = {}
+        for snapshot, channel in zip(channels, created):
+            if channel is None:
+                result.failures += 1
+                continue
+            channel_map[snapshot.id] = channel
+            result.channels_restored += 1
+        return channel_map
+
+    @staticmethod
+    def _overwrites(
+        guild: discord.Guild,
+        snapshot: ChannelSnapshot,
+        role_map: Dict[int, discord.Role]
+    ) -> Dict[discord.abc.Snowflake, discord.PermissionOverwrite]:
+        """Translate stored overwrites, pointing deleted roles at their replacements."""
+        overwrites = {}
+        for target_id, is_role, allow, deny in snapshot.overwrites:
+            if is_role:
+                target = role_map.get(target_id) or guild.get_role(target_id)
+            else:
+                target = discord.Object(id=target_id, type=discord.Member)
+            if target is None:
+                continue
+            overwrites[target] = discord.PermissionOverwrite.from_pair(
+                discord.Permissions(allow), discord.Permissions(deny)
+            )
+        return overwrites
@@ -0,0 +1,293 @@
+"""
+Durable scheduler for delayed moderation actions.
+
+Jobs live in the ``scheduled_actions`` table so they survive restarts. Only
+the jobs due within the next window are loaded into an in-memory heap, and a
+single timer task sleeps until the earliest of them, so the number of
+pending jobs does not affect memory or the number of running tasks. Handlers
+are registered by action name; a job is deleted once its handler has run and
+retried a few times if the handler raises.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob:
+    """A pending row of ``scheduled_actions``."""
+
+    __slots__ = ('id', 'guild_id', 'action', 'due_at', 'payload', 'attempts')
+
+    def __init__(
+        self,
+        id: int,
+        guild_id: int,
+        action: str,
+        due_at: datetime,
+        payload: Dict[str, Any],
+        attempts: int = 0
+    ) -> None:
+        self.id = id
+        self.guild_id = guild_id
+        self.action = action
+        self.due_at = due_at
+        self.payload = payload
+        self.attempts = attempts
+
+    @classmethod
+    def from_record(cls, record: asyncpg.Record) -> 'ScheduledJob':
+        return cls(
+            record['id'],
+            record['guild_id'],
+            record['action'],
+            record['due_at'],
+            json.loads(record['payload']),
+            record['attempts']
+        )
+
+
+JobHandler = Callable[[ScheduledJob], Awaitable[None]]
+
+
+class Scheduler:
+    """Fires scheduled actions from a heap of the next window of jobs."""
+
+    def __init__(
+        self,
+        window: timedelta = timedelta(hours=1),
+        batch_size: int = 5000,
+        max_attempts: int = 5,
+        retry_delay: timedelta = timedelta(minutes=1)
+    ) -> None:
+        """Create a scheduler. Call :meth:`start` once the database is ready.
+
+        Args:
+            window: How far ahead jobs are loaded into memory
+            batch_size: Maximum number of jobs loaded per window
+            max_attempts: Attempts before a failing job is dropped
+            retry_delay: Delay before a failed job is retried
+        """
+        self.window = window
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._pool: Optional[asyncpg.Pool] = None
+        self._shards: Optional[Tuple[List[int], int]] = None
+        self._handlers: Dict[str, JobHandler] = {}
+        self._heap: List[Tuple[datetime, int, ScheduledJob]] = []
+        self._cancelled: Set[int] = set()
+        self._running: Dict[int, asyncio.Task] = {}
+        self._horizon: datetime = datetime.min
+        # Horizon of a refill whose query is still running
+        self._refilling_to: datetime = datetime.min
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.fired = 0
+        self.failed = 0
+
+    def register(self, action: str, handler: JobHandler) -> None:
+        """Route jobs named ``action`` to ``handler``."""
+        self._handlers[action] = handler
+
+    def unregister(self, action: str) -> None:
+        self._handlers.pop(action, None)
+
+    def start(
+        self,
+        pool: Optional[asyncpg.Pool],
+        ready: Optional[Callable[[], Awaitable[Any]]] = None,
+        shards: Optional[Tuple[List[int], int]] = None
+    ) -> None:
+        """Start the timer.
+
+        Args:
+            pool: Database pool; without one scheduling is unavailable
+            ready: Optional coroutine function awaited before the first job fires
+            shards: ``(shard_ids, shard_count)`` of this process; only jobs of
+                guilds on these shards are loaded. None loads every job.
+        """
+        self._pool = pool
+        self._shards = shards
+        if pool is not None and self._task is None:
+            self._task = asyncio.create_task(self._run(ready))
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    @property
+    def available(self) -> bool:
+        return self._pool is not None
+
+    async def schedule(self, guild_id: int, action: str, due_at: datetime, **payload: Any) -> int:
+        """Persist a job and return its id.
+
+        Args:
+            guild_id: The guild the job belongs to
+            action: Name of the registered handler
+            due_at: When the job should fire, as naive UTC
+            **payload: JSON-serialisable arguments for the handler
+
+        Raises:
+            RuntimeError: If no database is configured
+        """
+        if self._pool is None:
+            raise RuntimeError('Scheduled actions require a configured database')
+
+        job_id = await self._pool.fetchval(
+            'INSERT INTO scheduled_actions (guild_id, action, due_at, payload) '
+            'VALUES ($1, $2, $3, $4::jsonb) RETURNING id',
+            guild_id, action, due_at, json.dumps(payload)
+        )
+        # A refill in flight may not see this row, so anything inside its horizon is pushed too
+        if due_at <= max(self._horizon, self._refilling_to):
+            job = ScheduledJob(job_id, guild_id, action, due_at, payload)
+            heapq.heappush(self._heap, (due_at, job_id, job))
+            if self._heap[0][1] == job_id:
+                self._wake.set()
+        return job_id
+
+    async def cancel(self, guild_id: int, action: str, **match: Any) -> int:
+        """Delete pending jobs whose payload contains ``match``.
+
+        Returns:
+            The number of cancelled jobs
+        """
+        if self._pool is None:
+            return 0
+        rows = await self._pool.fetch(
+            'DELETE FROM scheduled_actions WHERE guild_id = $1 AND action = $2 AND payload @> $3::jsonb RETURNING id',
+            guild_id, action, json.dumps(match)
+        )
+        self._cancelled.update(row['id'] for row in rows)
+        return len(rows)
+
+    async def pending(self, guild_id: int, action: str, **match: Any) -> List[ScheduledJob]:
+        """Return pending jobs of a guild, soonest first."""
+        if self._pool is None:
+            return []
+        rows = await self._pool.fetch(
+            'SELECT id, guild_id, action, due_at, payload, attempts FROM scheduled_actions '
+            'WHERE guild_id = $1 AND action = $2 AND payload @> $3::jsonb ORDER BY due_at',
+            guild_id, action, json.dumps(match)
+        )
+        return [ScheduledJob.from_record(row) for row in rows]
+
+    async def _refill(self) -> None:
+        """Replace the heap with the jobs due before the next horizon."""
+        horizon = datetime.utcnow() + self.window
+        shard_ids, shard_count = self._shards or (None, 1)
+        self._refilling_to = horizon
+        try:
+            # A guild's shard is (guild_id >> 22) % shard_count
+            rows = await self._pool.fetch(
+                'SELECT id, guild_id, action, due_at, payload, attempts FROM scheduled_actions '
+                'WHERE due_at <= $1 AND ($3::INTEGER[] IS NULL OR (guild_id >> 22) % $4 = ANY($3)) '
+                'ORDER BY due_at LIMIT $2',
+                horizon, self.batch_size, shard_ids, shard_count
+            )
+        finally:
+            self._refilling_to = datetime.min
+        if len(rows) >= self.batch_size:
+            # More jobs than fit in one batch; load the rest once these have fired
+            horizon = max(rows[-1]['due_at'], datetime.utcnow() + self.retry_delay)
+
+        heap = []
+        for row in rows:
+            if row['id'] not in self._running:
+                job = ScheduledJob.from_record(row)
+                heap.append((job.due_at, job.id, job))
+        # Keep jobs scheduled while the query was running
+        loaded = {entry[1] for entry in heap}
+        heap.extend(entry for entry in self._heap if entry[1] not in loaded and entry[0] <= horizon)
+        heapq.heapify(heap)
+        self._heap = heap
+        # Keep cancellations that may have raced with the query above
+        self._cancelled.intersection_update(entry[1] for entry in heap)
+        self._horizon = horizon
+
+    async def _run(self, ready: Optional[Callable[[], Awaitable[Any]]]) -> None:
+        if ready is not None:
+            await ready()
+        while True:
+            try:
+                now = datetime.utcnow()
+                if now >= self._horizon:
+                    await self._refill()
+
+                while self._heap and self._heap[0][0] <= now:
+                    _, job_id, job = heapq.heappop(self._heap)
+                    if job_id in self._cancelled:
+                        self._cancelled.discard(job_id)
+                        continue
+                    self._running[job_id] = asyncio.create_task(self._fire(job))
+
+                until = self._horizon
+                if self._heap:
+                    until = min(until, self._heap[0][0])
+                delay = max((until - datetime.utcnow()).total_seconds(), 0.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'Scheduler loop failed: {e}', exc_info=True)
+                delay = self.retry_delay.total_seconds()
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, job: ScheduledJob) -> None:
+        try:
+            handler = self._handlers.get(job.action)
+            if handler is None:
+                # Left in the table so it fires once the owning cog is loaded again
+                logger.warning(f'No handler registered for scheduled action {job.action!r} (job {job.id})')
+                return
+
+            try:
+                await handler(job)
+                self.fired += 1
+            except Exception as e:
+                self.failed += 1
+                if job.attempts + 1 < self.max_attempts:
+                    logger.warning(f'Scheduled {job.action} job {job.id} failed, retrying: {e}')
+                    job.attempts += 1
+                    job.due_at = datetime.utcnow() + self.retry_delay
+                    await self._pool.execute(
+                        'UPDATE scheduled_actions SET attempts = $2, due_at = $3 WHERE id = $1',
+                        job.id, job.attempts, job.due_at
+                    )
+                    if job.due_at <= self._horizon:
+                        heapq.heappush(self._heap, (job.due_at, job.id, job))
+                        self._wake.set()
+                    return
+                logger.error(f'Giving up on scheduled {job.action} job {job.id}: {e}', exc_info=e)
+
+            await self._pool.execute('DELETE FROM scheduled_actions WHERE id = $1', job.id)
+        except Exception as e:
+            logger.error(f'Failed to finish scheduled job {job.id}: {e}')
+        finally:
+            self._running.pop(job.id, None)
+
+    def stats(self) -> dict:
+        return {
+            'loaded': len(self._heap),
+            'running': len(self._running),
+            'horizon': self._horizon.isoformat() if self._horizon != datetime.min else None,
+            'fired': self.fired,
+            'failed': self.failed,
+        }
@@ -0,0 +1,469 @@
+"""
+Compact, detached copies of guild structure (roles and channels).
+
+Snapshots are plain slotted objects holding ids and integers only, so they
+stay valid after the live object is deleted and can be used to recreate it.
+:class:`SnapshotStore` keeps one baseline per guild, built from the gateway
+cache at ready time and patched from channel and role events, and writes
+changed guilds to Postgres as compact blobs on a timer. The stored blobs are
+read back at startup, so recently deleted objects, and objects deleted while
+the bot was offline, can still be restored after a restart.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import time
+import zlib
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+import asyncpg
+import discord
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# (target id, target is a role, allow bits, deny bits)
+Overwrite = Tuple[int, bool, int, int]
+
+# Deleted objects are kept for rollback for this many seconds
+DELETION_RETENTION = 300.0
+
+
+class RoleSnapshot:
+    """Everything needed to recreate a role."""
+
+    __slots__ = ('id', 'name', 'permissions', 'colour', 'hoist', 'mentionable', 'position')
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        permissions: int,
+        colour: int,
+        hoist: bool,
+        mentionable: bool,
+        position: int
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.permissions = permissions
+        self.colour = colour
+        self.hoist = hoist
+        self.mentionable = mentionable
+        self.position = position
+
+    @classmethod
+    def from_role(cls, role: discord.Role) -> 'RoleSnapshot':
+        return cls(
+            id=role.id,
+            name=role.name,
+            permissions=role.permissions.value,
+            colour=role.colour.value,
+            hoist=role.hoist,
+            mentionable=role.mentionable,
+            position=role.position
+        )
+
+    @classmethod
+    def from_tuple(cls, values) -> 'RoleSnapshot':
+        return cls(*values)
+
+    def to_tuple(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+class ChannelSnapshot:
+    """Everything needed to recreate a guild channel with its overwrites."""
+
+    __slots__ = (
+        'id', 'name', 'type', 'position', 'category_id', 'overwrites',
+        'topic', 'nsfw', 'slowmode_delay', 'bitrate', 'user_limit'
+    )
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        type: int,
+        position: int,
+        category_id: Optional[int],
+        overwrites: Tuple[Overwrite, ...],
+        topic: Optional[str] = None,
+        nsfw: bool = False,
+        slowmode_delay: int = 0,
+        bitrate: Optional[int] = None,
+        user_limit: Optional[int] = None
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.type = type
+        self.position = position
+        self.category_id = category_id
+        self.overwrites = overwrites
+        self.topic = topic
+        self.nsfw = nsfw
+        self.slowmode_delay = slowmode_delay
+        self.bitrate = bitrate
+        self.user_limit = user_limit
+
+    @classmethod
+    def from_channel(cls, channel: discord.abc.GuildChannel) -> 'ChannelSnapshot':
+        overwrites = []
+        for target, overwrite in channel.overwrites.items():
+            allow, deny = overwrite.pair()
+            # Targets missing from the cache come back as typed discord.Object instances
+            is_role = isinstance(target, discord.Role) or getattr(target, 'type', None) is discord.Role
+            overwrites.append((target.id, is_role, allow.value, deny.value))
+        return cls(
+            id=channel.id,
+            name=channel.name,
+            type=channel.type.value,
+            position=channel.position,
+            category_id=channel.category_id,
+            overwrites=tuple(overwrites),
+            topic=getattr(channel, 'topic', None),
+            nsfw=bool(getattr(channel, 'nsfw', False)),
+            slowmode_delay=getattr(channel, 'slowmode_delay', 0) or 0,
+            bitrate=getattr(channel, 'bitrate', None),
+            user_limit=getattr(channel, 'user_limit', None)
+        )
+
+    @property
+    def is_category(self) -> bool:
+        return self.type == discord.ChannelType.category.value
+
+    def to_tuple(self) -> Tuple[Any, ...]:
+        return tuple(
+            [list(overwrite) for overwrite in self.overwrites] if name == 'overwrites' else getattr(self, name)
+            for name in self.__slots__
+        )
+
+    @classmethod
+    def from_tuple(cls, values) -> 'ChannelSnapshot':
+        snapshot = cls(*values)
+        snapshot.overwrites = tuple(tuple(overwrite) for overwrite in snapshot.overwrites)
+        return snapshot
+
+
+Snapshot = Union[ChannelSnapshot, RoleSnapshot]
+
+
+def _sizeof(snapshot: Snapshot) -> int:
+    """Approximate resident size of a snapshot in bytes."""
+    size = sys.getsizeof(snapshot) + sys.getsizeof(snapshot.name)
+    if isinstance(snapshot, ChannelSnapshot):
+        size += sys.getsizeof(snapshot.overwrites) + sum(sys.getsizeof(o) for o in snapshot.overwrites)
+        if snapshot.topic:
+            size += sys.getsizeof(snapshot.topic)
+    return size
+
+
+class GuildSnapshot:
+    """Current roles and channels of one guild plus recently deleted objects."""
+
+    __slots__ = ('roles', 'channels', 'deleted', 'dirty', 'digest', 'updated_at')
+
+    def __init__(self) -> None:
+        self.roles: Dict[int, RoleSnapshot] = {}
+        self.channels: Dict[int, ChannelSnapshot] = {}
+        # (monotonic deletion time, snapshot), newest last
+        self.deleted: Deque[Tuple[float, Snapshot]] = deque(maxlen=500)
+        self.dirty = True
+        self.digest = 0
+        self.updated_at = 0.0
+
+    def to_payload(self) -> Dict[str, Any]:
+        # Deletion times are monotonic, which does not survive a restart; store whole wall-clock
+        # seconds so an unchanged guild still encodes to the same bytes
+        offset = time.time() - time.monotonic()
+        return {
+            'v': 2,
+            'roles': [role.to_tuple() for role in self.roles.values()],
+            'channels': [channel.to_tuple() for channel in self.channels.values()],
+            'deleted': [
+                [isinstance(deleted, RoleSnapshot), round(deleted_at + offset), deleted.to_tuple()]
+                for deleted_at, deleted in self.deleted
+            ],
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> 'GuildSnapshot':
+        """Inverse of :meth:`to_payload`."""
+        snapshot = cls()
+        snapshot.roles = {values[0]: RoleSnapshot.from_tuple(values) for values in payload.get('roles', ())}
+        snapshot.channels = {values[0]: ChannelSnapshot.from_tuple(values) for values in payload.get('channels', ())}
+        offset = time.time() - time.monotonic()
+        for is_role, deleted_at, values in payload.get('deleted', ()):
+            deleted = RoleSnapshot.from_tuple(values) if is_role else ChannelSnapshot.from_tuple(values)
+            snapshot.deleted.append((deleted_at - offset, deleted))
+        snapshot.dirty = False
+        return snapshot
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by this guild's snapshots."""
+        size = sys.getsizeof(self.roles) + sys.getsizeof(self.channels) + sys.getsizeof(self.deleted)
+        size += sum(_sizeof(role) for role in self.roles.values())
+        size += sum(_sizeof(channel) for channel in self.channels.values())
+        size += sum(_sizeof(snapshot) for _, snapshot in self.deleted)
+        return size
+
+
+def encode_payload(payload: Dict[str, Any]) -> Tuple[bytes, str]:
+    """Serialise a snapshot payload with the most compact codec available.
+
+    Returns:
+        The encoded bytes and the codec name stored alongside them
+    """
+    if msgpack is not None:
+        return msgpack.packb(payload, use_bin_type=True), 'msgpack'
+    if orjson is not None:
+        return orjson.dumps(payload), 'json'
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8'), 'json'
+
+
+def decode_payload(data: bytes, codec: str) -> Dict[str, Any]:
+    """Inverse of :func:`encode_payload`."""
+    if codec == 'msgpack':
+        return msgpack.unpackb(data, raw=False)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class SnapshotStore:
+    """Incrementally maintained structure snapshots for every guild."""
+
+    def __init__(self, persist_interval: float = 300.0, deleted_retention: float = DELETION_RETENTION) -> None:
+        """Create an empty store.
+
+        Args:
+            persist_interval: Seconds between writes of changed guilds to Postgres
+            deleted_retention: Seconds deleted objects are kept for rollback
+        """
+        self.persist_interval = persist_interval
+        self.deleted_retention = deleted_retention
+        self.pool: Optional[asyncpg.Pool] = None
+        self._guilds: Dict[int, GuildSnapshot] = {}
+        # Snapshots read back from Postgres, consumed by the first build of each guild
+        self._stored: Dict[int, GuildSnapshot] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+        self.bytes_written = 0
+        self.skipped_writes = 0
+
+    def start(self, pool: Optional[asyncpg.Pool]) -> None:
+        """Start persisting changed guilds to Postgres on a schedule."""
+        self.pool = pool
+        if pool and self._task is None:
+            self._task = asyncio.create_task(self._persist_loop())
+
+    async def load(self, pool: Optional[asyncpg.Pool], shards: Optional[Tuple[List[int], int]] = None) -> int:
+        """Read the stored snapshots back; call before guilds become available.
+
+        Args:
+            pool: The database pool
+            shards: ``(shard_ids, shard_count)`` of this process; only guilds on
+                these shards are loaded. None loads every guild.
+
+        Returns:
+            The number of snapshots loaded
+        """
+        if not pool:
+            return 0
+        shard_ids, shard_count = shards or (None, 1)
+        try:
+            rows = await pool.fetch(
+                'SELECT guild_id, data, codec FROM guild_snapshots '
+                'WHERE $1::INTEGER[] IS NULL OR (guild_id >> 22) % $2 = ANY($1)',
+                shard_ids, shard_count
+            )
+        except Exception as e:
+            logger.error(f'Failed to load guild snapshots: {e}')
+            return 0
+
+        for row in rows:
+            data = bytes(row['data'])
+            try:
+                snapshot = GuildSnapshot.from_payload(decode_payload(data, row['codec']))
+            except Exception as e:
+                logger.warning(f'Skipping unreadable snapshot of guild {row["guild_id"]}: {e}')
+                continue
+            snapshot.digest = zlib.crc32(data)
+            self._stored[row['guild_id']] = snapshot
+        return len(self._stored)
+
+    async def close(self) -> None:
+        """Stop the persist loop after one last write."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+            await self.persist()
+
+    def get(self, guild_id: int) -> Optional[GuildSnapshot]:
+        return self._guilds.get(guild_id)
+
+    def build(self, guild: discord.Guild) -> GuildSnapshot:
+        """Capture a full baseline of a guild from the gateway cache."""
+        snapshot = GuildSnapshot()
+        previous = self._guilds.get(guild.id) or self._stored.pop(guild.id, None)
+        if previous is not None:
+            snapshot.deleted = previous.deleted
+            snapshot.digest = previous.digest
+        snapshot.roles = {role.id: RoleSnapshot.from_role(role) for role in guild.roles}
+        snapshot.channels = {channel.id: ChannelSnapshot.from_channel(channel) for channel in guild.channels}
+        if previous is not None:
+            # Anything in the old baseline that is gone now was deleted while we could not see it
+            now = time.monotonic()
+            for old, current in ((previous.roles, snapshot.roles), (previous.channels, snapshot.channels)):
+                for object_id, gone in old.items():
+                    if object_id not in current:
+                        snapshot.deleted.append((now, gone))
+        self._guilds[guild.id] = snapshot
+        return snapshot
+
+    def forget_guild(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
+        self._stored.pop(guild_id, None)
+
+    def _touch(self, guild_id: int) -> Optional[GuildSnapshot]:
+        snapshot = self._guilds.get(guild_id)
+        if snapshot is not None:
+            snapshot.dirty = True
+        return snapshot
+
+    def channel_changed(self, channel: discord.abc.GuildChannel) -> None:
+        """Apply a channel create or update."""
+        snapshot = self._touch(channel.guild.id)
+        if snapshot is not None:
+            snapshot.channels[channel.id] = ChannelSnapshot.from_channel(channel)
+
+    def channel_deleted(self, channel: discord.abc.GuildChannel) -> None:
+        """Apply a channel deletion, keeping the last known state for rollback."""
+        snapshot = self._touch(channel.guild.id)
+        if snapshot is not None:
+            previous = snapshot.channels.pop(channel.id, None) or ChannelSnapshot.from_channel(channel)
+            snapshot.deleted.append((time.monotonic(), previous))
+
+    def role_changed(self, role: discord.Role) -> None:
+        """Apply a role create or update."""
+        snapshot = self._touch(role.guild.id)
+        if snapshot is not None:
+            snapshot.roles[role.id] = RoleSnapshot.from_role(role)
+
+    def role_deleted(self, role: discord.Role) -> None:
+        """Apply a role deletion, keeping the last known state for rollback."""
+        snapshot = self._touch(role.guild.id)
+        if snapshot is not None:
+            previous = snapshot.roles.pop(role.id, None) or RoleSnapshot.from_role(role)
+            snapshot.deleted.append((time.monotonic(), previous))
+
+    def deleted_snapshot(self, guild_id: int, object_id: int) -> Optional[Snapshot]:
+        """Return the pre-deletion state of a recently deleted role or channel."""
+        snapshot = self._guilds.get(guild_id)
+        if snapshot is None:
+            return None
+        for _, deleted in reversed(snapshot.deleted):
+            if deleted.id == object_id:
+                return deleted
+        return None
+
+    def export(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        """Return a readable dictionary of a guild's snapshot."""
+        snapshot = self._guilds.get(guild_id)
+        if snapshot is None:
+            return None
+        return {
+            'guild_id': guild_id,
+            'roles': [dict(zip(RoleSnapshot.__slots__, role.to_tuple())) for role in snapshot.roles.values()],
+            'channels': [
+                dict(zip(ChannelSnapshot.__slots__, channel.to_tuple())) for channel in snapshot.channels.values()
+            ],
+        }
+
+    async def persist(self) -> int:
+        """Write every changed guild to Postgres in one batch.
+
+        Guilds whose encoded snapshot is identical to the last write are
+        skipped, so event storms that do not change structure cost nothing.
+
+        Returns:
+            The number of guilds written
+        """
+        cutoff = time.monotonic() - self.deleted_retention
+        rows: List[Tuple[int, bytes, str]] = []
+        digests: Dict[int, int] = {}
+        for guild_id, snapshot in self._guilds.items():
+            while snapshot.deleted and snapshot.deleted[0][0] < cutoff:
+                snapshot.deleted.popleft()
+            if not snapshot.dirty:
+                continue
+            snapshot.dirty = False
+            data, codec = encode_payload(snapshot.to_payload())
+            digest = zlib.crc32(data)
+            if digest == snapshot.digest:
+                self.skipped_writes += 1
+                continue
+            rows.append((guild_id, data, codec))
+            digests[guild_id] = digest
+
+        if not rows or not self.pool:
+            return 0
+
+        try:
+            await self.pool.executemany(
+                '''
+                INSERT INTO guild_snapshots (guild_id, data, codec, updated_at) VALUES ($1, $2, $3, NOW())
+                ON CONFLICT (guild_id) DO UPDATE
+                SET data = EXCLUDED.data, codec = EXCLUDED.codec, updated_at = EXCLUDED.updated_at
+                ''',
+                rows
+            )
+        except Exception as e:
+            logger.error(f'Failed to persist {len(rows)} guild snapshot(s): {e}')
+            for guild_id, _, _ in rows:
+                if guild_id in self._guilds:
+                    self._guilds[guild_id].dirty = True
+            return 0
+
+        for guild_id, data, _ in rows:
+            snapshot = self._guilds.get(guild_id)
+            if snapshot is not None:
+                snapshot.digest = digests[guild_id]
+                snapshot.updated_at = time.time()
+            self.writes += 1
+            self.bytes_written += len(data)
+        return len(rows)
+
+    async def _persist_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            try:
+                written = await self.persist()
+                if written:
+                    logger.debug(f'Persisted {written} guild snapshot(s)')
+            except Exception as e:
+                logger.error(f'Snapshot persist loop error: {e}')
+
+    def stats(self) -> Dict[str, int]:
+        """Return memory and write counters."""
+        sizes = [snapshot.memory_usage() for snapshot in self._guilds.values()]
+        return {
+            'guilds': len(sizes),
+            'memory_bytes': sum(sizes),
+            'max_guild_bytes': max(sizes, default=0),
+            'writes': self.writes,
+            'bytes_written': self.bytes_written,
+            'skipped_writes': self.skipped_writes,
+        }
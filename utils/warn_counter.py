@@ -0,0 +1,90 @@
+"""
+Rolling per-user warning counter used for automatic escalation.
+
+Each (guild, user) pair keeps the timestamps of its warnings inside the
+escalation window. A user's history is read from the ``warnings`` index the
+first time they are warned; after that each warning only appends to the
+in-memory window, so issuing a warning never needs a ``COUNT(*)``.
+"""
+
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Optional, Tuple
+
+import asyncpg
+
+CounterKey = Tuple[int, int]
+
+
+class WarningCounter:
+    """Bounded LRU of rolling warning windows."""
+
+    def __init__(self, window: timedelta = timedelta(hours=24), max_users: int = 20000) -> None:
+        """Create an empty counter.
+
+        Args:
+            window: How far back warnings count towards escalation
+            max_users: Maximum number of (guild, user) windows kept in memory
+        """
+        self.window = window
+        self.max_users = max_users
+        self._windows: 'OrderedDict[CounterKey, Deque[datetime]]' = OrderedDict()
+
+    def _trim(self, timestamps: Deque[datetime], now: datetime) -> None:
+        cutoff = now - self.window
+        while timestamps and timestamps[0] <= cutoff:
+            timestamps.popleft()
+
+    async def _load(self, pool: Optional[asyncpg.Pool], guild_id: int, user_id: int, now: datetime) -> Deque[datetime]:
+        """Read the user's warnings inside the window from the composite index."""
+        timestamps: Deque[datetime] = deque()
+        if pool:
+            rows = await pool.fetch(
+                '''
+                SELECT created_at FROM warnings
+                WHERE guild_id = $1 AND user_id = $2 AND created_at > $3
+                ORDER BY id
+                ''',
+                guild_id, user_id, now - self.window
+            )
+            timestamps.extend(row['created_at'] for row in rows)
+        return timestamps
+
+    async def record(
+        self,
+        pool: Optional[asyncpg.Pool],
+        guild_id: int,
+        user_id: int,
+        created_at: datetime
+    ) -> int:
+        """Add a warning that was just inserted to the user's window.
+
+        Args:
+            pool: The database pool used on a cold miss
+            guild_id: The guild the warning was issued in
+            user_id: The warned user
+            created_at: When the warning was issued, as stored in the row
+
+        Returns:
+            The number of warnings inside the window, including this one
+        """
+        key = (guild_id, user_id)
+        timestamps = self._windows.get(key)
+        if timestamps is None:
+            # The new row is already stored, so the query result includes it
+            timestamps = await self._load(pool, guild_id, user_id, created_at)
+            if not timestamps:
+                timestamps.append(created_at)
+            self._windows[key] = timestamps
+            if len(self._windows) > self.max_users:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+            timestamps.append(created_at)
+
+        self._trim(timestamps, created_at)
+        return len(timestamps)
+
+    def clear(self, guild_id: int, user_id: int) -> None:
+        """Forget a user's window, e.g. after their warnings were cleared."""
+        self._windows.pop((guild_id, user_id), None)
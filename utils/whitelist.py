@@ -0,0 +1,91 @@
+"""
+In-memory index of the ``antinuke_whitelist`` table.
+
+The whole table is loaded with one query when AntiNuke starts. Add and
+remove write to Postgres first and only then update the in-memory sets, so
+event handlers can check membership in O(1) without a query and the cache
+never contains an entry that failed to save.
+"""
+
+import logging
+from typing import Dict, FrozenSet, Optional, Set
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class WhitelistIndex:
+    """Per-guild sets of user ids exempt from anti-nuke enforcement."""
+
+    def __init__(self) -> None:
+        self.pool: Optional[asyncpg.Pool] = None
+        self._users: Dict[int, Set[int]] = {}
+
+    async def load(self, pool: Optional[asyncpg.Pool]) -> None:
+        """Replace the index with the current contents of the table.
+
+        Args:
+            pool: The bot's database pool, or None when running without a database
+        """
+        self.pool = pool
+        if not pool:
+            return
+
+        rows = await pool.fetch('SELECT guild_id, user_id FROM antinuke_whitelist')
+        users: Dict[int, Set[int]] = {}
+        for row in rows:
+            users.setdefault(row['guild_id'], set()).add(row['user_id'])
+        self._users = users
+        logger.info(f'Loaded {len(rows)} anti-nuke whitelist entr{"y" if len(rows) == 1 else "ies"}')
+
+    def contains(self, guild_id: int, user_id: int) -> bool:
+        """Return whether a user is whitelisted in a guild."""
+        users = self._users.get(guild_id)
+        return users is not None and user_id in users
+
+    def members(self, guild_id: int) -> FrozenSet[int]:
+        """Return the whitelisted user ids for a guild."""
+        return frozenset(self._users.get(guild_id, ()))
+
+    async def add(self, guild_id: int, user_id: int, added_by: int) -> bool:
+        """Whitelist a user.
+
+        Returns:
+            True if the user was added, False if they were already whitelisted
+        """
+        if self.contains(guild_id, user_id):
+            return False
+        if self.pool:
+            await self.pool.execute(
+                '''
+                INSERT INTO antinuke_whitelist (guild_id, user_id, added_by) VALUES ($1, $2, $3)
+                ON CONFLICT (guild_id, user_id) DO NOTHING
+                ''',
+                guild_id, user_id, added_by
+            )
+        self._users.setdefault(guild_id, set()).add(user_id)
+        return True
+
+    async def remove(self, guild_id: int, user_id: int) -> bool:
+        """Remove a user from the whitelist.
+
+        Returns:
+            True if the user was removed, False if they were not whitelisted
+        """
+        if not self.contains(guild_id, user_id):
+            return False
+        if self.pool:
+            await self.pool.execute(
+                'DELETE FROM antinuke_whitelist WHERE guild_id = $1 AND user_id = $2',
+                guild_id, user_id
+            )
+        users = self._users[guild_id]
+        users.discard(user_id)
+        if not users:
+            del self._users[guild_id]
+        return True
+
+    def forget_guild(self, guild_id: int) -> None:
+        """Drop a guild's entries from memory."""
+        self._users.pop(guild_id, None)
@@ -0,0 +1,306 @@
+"""
+Per-guild blocked-word matching in time linear in the message length.
+
+Terms are compiled into an Aho-Corasick automaton, so one pass over a
+message finds every blocked term, however many terms there are. Messages
+and terms go through the same normalisation: NFKC, casefolding, removing
+zero-width and other invisible characters, and mapping common leetspeak
+substitutions back to letters.
+
+Terms match whole words by default. A leading or trailing ``*`` drops the
+word boundary on that side, so ``*spam*`` matches anywhere in a word.
+
+Adding terms inserts them into the existing trie and marks the failure
+links stale; they are recomputed on the next match. Removing a term only
+drops its output, and the trie is rebuilt from the live terms once more
+than half of what it holds is dead.
+"""
+
+import asyncio
+import logging
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import asyncpg
+
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Soft hyphen, zero-width spaces/joiners, direction marks, word joiners, BOM and fillers
+INVISIBLE = (
+    '\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e'
+    '\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff'
+)
+# Punctuation that usually ends a word (!, |) is left alone so it keeps acting as a boundary
+LEET = {'0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b', '@': 'a', '$': 's'}
+_TRANSLATION = {ord(c): None for c in INVISIBLE}
+_TRANSLATION.update({ord(k): v for k, v in LEET.items()})
+
+# (term, normalised length, needs left boundary, needs right boundary)
+Output = Tuple[str, int, bool, bool]
+
+
+def normalize(text: str) -> str:
+    """Fold a string into the form blocked terms are matched in."""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    return text.casefold().translate(_TRANSLATION)
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == '_'
+
+
+class WordMatcher:
+    """Aho-Corasick automaton over a set of blocked terms."""
+
+    __slots__ = ('_goto', '_fail', '_own', '_out', '_terms', '_dirty', '_dead')
+
+    def __init__(self, terms: Iterable[str] = ()) -> None:
+        # Node 0 is the root. _own holds the terms ending at a node, _out
+        # also the ones reachable through its failure links.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._own: List[List[Output]] = [[]]
+        self._out: List[List[Output]] = [[]]
+        self._terms: Set[str] = set()
+        self._dirty = False
+        self._dead = 0
+        self.add(terms)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __bool__(self) -> bool:
+        return bool(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._terms
+
+    @property
+    def terms(self) -> List[str]:
+        return sorted(self._terms)
+
+    @property
+    def nodes(self) -> int:
+        return len(self._goto)
+
+    def _insert(self, term: str) -> None:
+        word = normalize(term.strip('*'))
+        if not word:
+            return
+        node = 0
+        for c in word:
+            child = self._goto[node].get(c)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][c] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+                self._out.append([])
+            node = child
+        self._own[node].append((term, len(word), not term.startswith('*'), not term.endswith('*')))
+
+    def add(self, terms: Iterable[str]) -> int:
+        """Insert terms into the trie.
+
+        Returns:
+            The number of terms that were new
+        """
+        added = 0
+        for term in terms:
+            if term in self._terms:
+                continue
+            self._terms.add(term)
+            self._insert(term)
+            added += 1
+        if added:
+            self._dirty = True
+        return added
+
+    def remove(self, terms: Iterable[str]) -> int:
+        """Stop matching terms.
+
+        Returns:
+            The number of terms that were removed
+        """
+        removed = {term for term in terms if term in self._terms}
+        if not removed:
+            return 0
+        self._terms -= removed
+        self._dead += len(removed)
+
+        if self._dead > len(self._terms):
+            self.__init__(list(self._terms))
+        else:
+            for outputs in self._own:
+                if outputs:
+                    outputs[:] = [output for output in outputs if output[0] not in removed]
+            self._dirty = True
+        return len(removed)
+
+    def _build_links(self) -> None:
+        """Compute failure links breadth first, merging outputs along them."""
+        goto, fail, own, out = self._goto, self._fail, self._own, self._out
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            out[child] = own[child]
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for c, child in goto[node].items():
+                state = fail[node]
+                while state and c not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(c, 0)
+                inherited = out[fail[child]]
+                out[child] = own[child] + inherited if inherited else own[child]
+                queue.append(child)
+        self._dirty = False
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the first blocked term found in ``text``, if any."""
+        if not self._terms:
+            return None
+        if self._dirty:
+            self._build_links()
+        text = normalize(text)
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        last = len(text) - 1
+        for i, c in enumerate(text):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if not out[state]:
+                continue
+            for term, size, left, right in out[state]:
+                start = i - size + 1
+                if left and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if right and i < last and _is_word_char(text[i + 1]):
+                    continue
+                return term
+        return None
+
+
+class BlocklistCache:
+    """Compiled matchers for the ``automod_blocklist`` table, cached per guild.
+
+    :meth:`get` never waits on the database: on a cold miss it returns None
+    and loads the guild's terms in the background, so at most the first few
+    messages after a guild becomes active go unchecked.
+    """
+
+    def __init__(self, maxsize: int = 1000, max_terms: int = 5000) -> None:
+        """Create an empty cache.
+
+        Args:
+            maxsize: Maximum number of guild matchers kept in memory
+            max_terms: Maximum number of terms per guild
+        """
+        self.max_terms = max_terms
+        self.pool: Optional[asyncpg.Pool] = None
+        self._cache = LRUCache(maxsize)
+        self._pending: Set[int] = set()
+        # Strong references to background loads; a lost task would leave its guild pending forever
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self, pool: Optional[asyncpg.Pool]) -> None:
+        self.pool = pool
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get(self, guild_id: int) -> Optional[WordMatcher]:
+        """Return the guild's matcher, or None while it is being loaded."""
+        matcher = self._cache.get(guild_id)
+        if matcher is not None or guild_id in self._pending:
+            return matcher
+        if not self.pool:
+            matcher = WordMatcher()
+            self._cache.set(guild_id, matcher)
+            return matcher
+        self._pending.add(guild_id)
+        task = asyncio.create_task(self._load(guild_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return None
+
+    async def _load(self, guild_id: int) -> None:
+        try:
+            await self.fetch(guild_id)
+        except Exception as e:
+            logger.error(f'Failed to load blocklist for guild {guild_id}: {e}')
+        finally:
+            self._pending.discard(guild_id)
+
+    async def fetch(self, guild_id: int) -> WordMatcher:
+        """Return the guild's matcher, loading it from the database on a miss."""
+        matcher = self._cache.get(guild_id)
+        if matcher is not None:
+            return matcher
+        if not self.pool:
+            return self.get(guild_id)
+        try:
+            rows = await self.pool.fetch('SELECT term FROM automod_blocklist WHERE guild_id = $1', guild_id)
+            # A concurrent load may have finished first and already taken writes
+            cached = self._cache.peek(guild_id)
+            if cached is not None:
+                return cached
+            matcher = WordMatcher(row['term'] for row in rows)
+            self._cache.set(guild_id, matcher)
+            return matcher
+        finally:
+            self._pending.discard(guild_id)
+
+    async def add(self, guild_id: int, terms: Iterable[str], added_by: int) -> List[str]:
+        """Block terms in a guild.
+
+        Returns:
+            The terms that were newly added
+
+        Raises:
+            ValueError: If the guild would go over ``max_terms``
+        """
+        matcher = await self.fetch(guild_id)
+        new = [term for term in dict.fromkeys(terms) if term.strip('*') and term not in matcher]
+        if len(matcher) + len(new) > self.max_terms:
+            raise ValueError(f'A server can block at most {self.max_terms} terms')
+        if new and self.pool:
+            await self.pool.executemany(
+                'INSERT INTO automod_blocklist (guild_id, term, added_by) VALUES ($1, $2, $3) '
+                'ON CONFLICT (guild_id, term) DO NOTHING',
+                [(guild_id, term, added_by) for term in new]
+            )
+        matcher.add(new)
+        return new
+
+    async def remove(self, guild_id: int, terms: Iterable[str]) -> List[str]:
+        """Unblock terms in a guild.
+
+        Returns:
+            The terms that were removed
+        """
+        matcher = await self.fetch(guild_id)
+        existing = [term for term in dict.fromkeys(terms) if term in matcher]
+        if existing and self.pool:
+            await self.pool.execute(
+                'DELETE FROM automod_blocklist WHERE guild_id = $1 AND term = ANY($2::text[])',
+                guild_id, existing
+            )
+        matcher.remove(existing)
+        return existing
+
+    def forget_guild(self, guild_id: int) -> None:
+        self._cache.pop(guild_id)
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()